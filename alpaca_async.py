@@ -0,0 +1,264 @@
+"""Cliente ASCOM Alpaca assíncrono (asyncio) para a montagem.
+
+Pelo HTTP, ler as propriedades uma depois da outra soma a latência de todas as
+requisições. :class:`AsyncAlpacaTelescope` faz todas as leituras de um ciclo
+ao mesmo tempo, limitadas a ``max_concurrency`` conexões keep-alive por
+dispositivo, e monta um único :class:`MountSnapshot`. Também oferece os
+comandos (goto, MoveAxis, park...) como corrotinas.
+
+O programa é feito de threads (Tk e UpdateValues), então as corrotinas rodam
+num único event loop numa thread própria (:class:`AsyncLoop`); quem não é
+assíncrono usa :func:`run_coroutine` ou :func:`submit`.
+
+O HTTP/1.1 é implementado sobre ``asyncio.open_connection``, sem dependências
+além da biblioteca padrão.
+"""
+import asyncio
+import json
+import threading
+import time
+from urllib.parse import urlencode
+from alpaca.device import Device
+from mount_snapshot import MountSnapshot, SNAPSHOT_PROPERTIES
+
+
+class AsyncLoop(threading.Thread):
+    """Thread com o event loop compartilhado pelos clientes assíncronos."""
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self):
+        super().__init__(name='AsyncLoop', daemon=True)
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+
+    @classmethod
+    def get(cls):
+        """Retorna o loop compartilhado, iniciando a thread na primeira vez."""
+        with cls._instance_lock:
+            if cls._instance is None or not cls._instance.is_alive():
+                cls._instance = cls()
+                cls._instance.start()
+                cls._instance.ready.wait()
+            return cls._instance
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.call_soon(self.ready.set)
+        self.loop.run_forever()
+
+
+def submit(coroutine):
+    """Agenda a corrotina no loop compartilhado.
+
+    Returns:
+        concurrent.futures.Future: resultado da corrotina
+    """
+    return asyncio.run_coroutine_threadsafe(coroutine, AsyncLoop.get().loop)
+
+
+def run_coroutine(coroutine, timeout=None):
+    """Executa a corrotina no loop compartilhado e espera o resultado."""
+    return submit(coroutine).result(timeout)
+
+
+class AlpacaHttpError(Exception):
+    """Resposta HTTP inválida do servidor Alpaca."""
+    def __init__(self, status, message):
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+
+
+class AsyncAlpacaTelescope:
+    """Montagem ASCOM Alpaca acessada com asyncio.
+
+    Args:
+        address (str): ``host:porta`` do servidor Alpaca
+        device_number (int): número do dispositivo
+        max_concurrency (int): máximo de requisições simultâneas (e de conexões abertas)
+        timeout (float): tempo máximo de cada requisição, em segundos
+        metrics (Metrics): se informado, cada leitura é medida com o nome da
+            propriedade, como no ``InstrumentedTelescope``
+    """
+    def __init__(self, address, device_number=0, max_concurrency=4, timeout=5.0, metrics=None):
+        self.address = address
+        self.device_number = device_number
+        self.host, _, port = address.rpartition(':')
+        self.host = self.host.strip('[]')
+        self.port = int(port)
+        self.base_path = f"/api/v1/telescope/{device_number}"
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = timeout
+        self.metrics = metrics
+        # Criados dentro do loop, no primeiro uso
+        self.semaphore = None
+        self.idle = []
+
+    # ======= HTTP
+
+    async def _open(self):
+        return await asyncio.open_connection(self.host, self.port)
+
+    def _close_connection(self, connection):
+        try:
+            connection[1].close()
+        except Exception:
+            pass
+
+    async def close(self):
+        """Fecha as conexões keep-alive abertas."""
+        while self.idle:
+            self._close_connection(self.idle.pop())
+
+    async def _read_response(self, reader):
+        status_line = await reader.readline()
+        if not status_line:
+            raise ConnectionResetError("Conexão fechada pelo servidor")
+        version, status, _ = (status_line.decode('latin-1') + '  ').split(' ', 2)
+        status = int(status)
+        # HTTP/1.0 fecha a conexão a cada resposta, a não ser que peça keep-alive
+        headers = {} if version == 'HTTP/1.1' else {'connection': 'close'}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+        if 'content-length' in headers:
+            body = await reader.readexactly(int(headers['content-length']))
+        elif headers.get('transfer-encoding', '').lower() == 'chunked':
+            body = b''
+            while True:
+                size = int((await reader.readline()).split(b';')[0], 16)
+                if size == 0:
+                    await reader.readline()
+                    break
+                body += await reader.readexactly(size)
+                await reader.readline()
+        else:
+            body = await reader.read()
+            headers['connection'] = 'close'
+        return status, headers, body
+
+    async def _request(self, method, attribute, params):
+        """Faz uma requisição, reaproveitando uma conexão keep-alive livre.
+
+        Com ``metrics``, as leituras (GET) são medidas a partir do momento em
+        que conseguem uma conexão, sem contar a espera pelas outras leituras do
+        ciclo, e registradas com o nome da propriedade (ex.: ``RightAscension``).
+        """
+        metrics = self.metrics if method == 'GET' else None
+        if metrics is None:
+            return await self._exchange(method, attribute, params)
+        try:
+            return await self._exchange(method, attribute, params, metrics)
+        except Exception:
+            metrics.error(attribute)
+            raise
+
+    async def _exchange(self, method, attribute, params, metrics=None):
+        if self.semaphore is None:
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+        with Device._ctid_lock:
+            transaction_id = Device._client_trans_id
+            Device._client_trans_id += 1
+        params = dict(params, ClientTransactionID=transaction_id, ClientID=Device._client_id)
+        query = urlencode(params)
+        path = f"{self.base_path}/{attribute.lower()}"
+        if method == 'GET':
+            request = f"GET {path}?{query} HTTP/1.1\r\nHost: {self.address}\r\nAccept: application/json\r\n\r\n"
+        else:
+            request = (f"PUT {path} HTTP/1.1\r\nHost: {self.address}\r\nAccept: application/json\r\n"
+                       f"Content-Type: application/x-www-form-urlencoded\r\nContent-Length: {len(query)}\r\n\r\n{query}")
+
+        async with self.semaphore:
+            start = time.perf_counter()
+            # Uma conexão reaproveitada pode ter sido fechada pelo servidor: tenta de novo com uma nova
+            for attempt in range(2):
+                reused = attempt == 0 and bool(self.idle)
+                connection = self.idle.pop() if reused else await asyncio.wait_for(self._open(), self.timeout)
+                reader, writer = connection
+                try:
+                    writer.write(request.encode('utf-8'))
+                    await writer.drain()
+                    status, headers, body = await asyncio.wait_for(self._read_response(reader), self.timeout)
+                except (ConnectionError, asyncio.IncompleteReadError) as e:
+                    self._close_connection(connection)
+                    if reused:
+                        continue
+                    raise ConnectionError(f"Falha na comunicação com {self.address}: {e}") from e
+                except BaseException:
+                    self._close_connection(connection)
+                    raise
+                if headers.get('connection', '').lower() == 'close':
+                    self._close_connection(connection)
+                else:
+                    self.idle.append(connection)
+                break
+            if metrics is not None:
+                metrics.record(attribute, time.perf_counter() - start)
+
+        if status not in range(200, 204):
+            raise AlpacaHttpError(status, body.decode('utf-8', 'replace'))
+        response = json.loads(body)
+        if response['ErrorNumber']:
+            from telescope_backend import alpaca_error
+            raise alpaca_error(response['ErrorNumber'], response['ErrorMessage'])
+        return response
+
+    async def get(self, attribute, **params):
+        """Lê uma propriedade (nome em qualquer caixa, ex.: ``RightAscension``)."""
+        return (await self._request('GET', attribute, params))['Value']
+
+    async def put(self, attribute, **params):
+        """Escreve uma propriedade ou chama um método."""
+        await self._request('PUT', attribute, params)
+
+    # ======= Leituras
+
+    async def fetch_snapshot(self):
+        """Lê todas as propriedades do ciclo ao mesmo tempo.
+
+        Returns:
+            MountSnapshot: estado da montagem
+        """
+        timestamp = time.time()
+        start = time.monotonic()
+        values = await asyncio.gather(*(self.get(name) for name in SNAPSHOT_PROPERTIES))
+        return MountSnapshot.from_values(timestamp, start, time.monotonic() - start,
+                                         dict(zip(SNAPSHOT_PROPERTIES, values)))
+
+    # ======= Comandos
+
+    async def slew_to_target(self, ra_hours, dec_degrees):
+        """Define o alvo e inicia o goto (TargetRightAscension, TargetDeclination, SlewToTargetAsync)."""
+        await asyncio.gather(self.put('TargetRightAscension', TargetRightAscension=ra_hours),
+                             self.put('TargetDeclination', TargetDeclination=dec_degrees))
+        await self.put('SlewToTargetAsync')
+
+    async def goto(self, ra_hours, dec_degrees, tracking_rate=0):
+        """Liga o rastreamento na taxa dada e faz o goto, como o botão Goto da interface."""
+        await self.put('TrackingRate', TrackingRate=int(tracking_rate))
+        await self.put('Tracking', Tracking=True)
+        await self.slew_to_target(ra_hours, dec_degrees)
+
+    async def move_axis(self, axis, rate):
+        await self.put('MoveAxis', Axis=int(axis), Rate=rate)
+
+    async def abort_slew(self):
+        await self.put('AbortSlew')
+
+    async def set_tracking(self, tracking, rate=None):
+        if rate is not None:
+            await self.put('TrackingRate', TrackingRate=int(rate))
+        await self.put('Tracking', Tracking=bool(tracking))
+
+    async def park(self):
+        await self.put('Park')
+
+    async def unpark(self):
+        await self.put('Unpark')
+
+    async def find_home(self):
+        await self.put('FindHome')
+
@@ -0,0 +1,224 @@
+"""Formatação de coordenadas e conversão entre J2000 e a época da data (JNow).
+
+As funções aceitam números ou vetores NumPy e devolvem no mesmo formato.
+
+- :func:`format_hours` e :func:`format_degrees` escrevem coordenadas em
+  sexagesimal (``05h34m32s``, ``-00°30'00"``), arredondando antes de separar
+  os campos, sem perder o sinal de declinações entre 0 e -1° e sem ``60s``.
+- :func:`parse_sexagesimal` lê esses formatos e também ``5:34:32``,
+  ``-0 30 0`` ou ``12.5``.
+- :func:`j2000_to_jnow` e :func:`jnow_to_j2000` aplicam a precessão (IAU 1976),
+  a nutação (termos principais do IAU 1980) e a aberração anual, com precisão
+  de cerca de 1". A matriz de rotação e a velocidade da Terra de cada época
+  ficam em cache; épocas a menos de ``EPOCH_RESOLUTION`` dias uma da outra
+  usam a mesma entrada.
+"""
+import math
+import re
+import time
+from functools import lru_cache
+import numpy as np
+
+UNIX_EPOCH_JD = 2440587.5
+J2000_JD = 2451545.0
+ARCSEC = math.pi / (180 * 3600)
+# Épocas mais próximas que isso (em dias) usam as mesmas matrizes
+EPOCH_RESOLUTION = 0.01
+# Constante de aberração, em radianos
+ABERRATION = 20.49552 * ARCSEC
+
+_NUMBER = re.compile(r'\d+(?:[.,]\d*)?')
+
+
+def julian_date(when=None):
+    """Data juliana de um instante (time.time); agora se omitido. Aceita vetores."""
+    when = time.time() if when is None else when
+    return np.asarray(when, dtype=float) / 86400 + UNIX_EPOCH_JD
+
+
+# ======= Formatação
+
+def _fields(value, precision, period):
+    """Separa |valor| em (graus ou horas, minutos, segundos, fração) arredondando uma única vez."""
+    value = np.asarray(value, dtype=float)
+    scale = 10 ** precision
+    units = np.round(np.abs(value) * 3600 * scale).astype(np.int64)
+    if period is not None:
+        units %= period * 3600 * scale
+    whole, fraction = np.divmod(units, scale)
+    return np.signbit(value) & (units > 0), whole // 3600, whole // 60 % 60, whole % 60, fraction
+
+
+def _format(value, precision, period, template):
+    negative, major, minutes, seconds, fraction = _fields(value, precision, period)
+    texts = [template.format(sign='-' if n else '', major=a, minutes=b, seconds=c,
+                             fraction=f".{d:0{precision}d}" if precision else '')
+             for n, a, b, c, d in zip(negative.ravel(), major.ravel(), minutes.ravel(), seconds.ravel(), fraction.ravel())]
+    if np.ndim(value) == 0:
+        return texts[0]
+    return np.array(texts, dtype=object).reshape(np.shape(value))
+
+
+def format_hours(hours, precision=0):
+    """Ascensão reta em horas decimais para ``hhhmmmsss``, ex.: ``05h34m31s``.
+
+    Args:
+        hours: horas decimais (número ou vetor); o resultado fica entre 0h e 24h
+        precision (int): casas decimais dos segundos
+    """
+    return _format(np.mod(hours, 24.0), precision, 24, "{major:02d}h{minutes:02d}m{seconds:02d}{fraction}s")
+
+
+def format_degrees(degrees, precision=0):
+    """Ângulo em graus decimais para ``gg°mm'ss"``, ex.: ``-00°30'00"``.
+
+    Args:
+        degrees: graus decimais (número ou vetor), com sinal
+        precision (int): casas decimais dos segundos
+    """
+    return _format(degrees, precision, None, "{sign}{major:02d}°{minutes:02d}'{seconds:02d}{fraction}\"")
+
+
+def parse_sexagesimal(text):
+    """Lê um ângulo em sexagesimal ou decimal, em horas ou graus.
+
+    Aceita ``05h34m31s``, ``5:34:31.9``, ``-00°30'00"``, ``-0 30 0``, ``12,5``...
+
+    Args:
+        text: texto ou lista/vetor de textos
+
+    Returns:
+        float ou np.ndarray: valor decimal, na unidade do primeiro campo
+    """
+    if not isinstance(text, str):
+        return np.array([parse_sexagesimal(item) for item in np.ravel(text)]).reshape(np.shape(text))
+    stripped = text.strip()
+    fields = _NUMBER.findall(stripped)
+    if not fields or len(fields) > 3:
+        raise ValueError(f"Coordenada inválida: {text!r}")
+    value = sum(float(field.replace(',', '.')) / 60 ** index for index, field in enumerate(fields))
+    return -value if stripped[:1] in ('-', '−') else value
+
+
+# ======= Precessão, nutação e aberração
+
+def _rotation(axis, angle):
+    """Matriz de rotação do sistema de coordenadas em torno do eixo (0=x, 1=y, 2=z)."""
+    c, s = math.cos(angle), math.sin(angle)
+    matrix = np.eye(3)
+    i, j = [(1, 2), (2, 0), (0, 1)][axis]
+    matrix[i, i] = matrix[j, j] = c
+    matrix[i, j] = s
+    matrix[j, i] = -s
+    return matrix
+
+
+def precession_matrix(jd):
+    """Precessão IAU 1976 de J2000 para a época ``jd`` (ângulos de Lieske)."""
+    t = (jd - J2000_JD) / 36525
+    zeta = (2306.2181 * t + 0.30188 * t ** 2 + 0.017998 * t ** 3) * ARCSEC
+    z = (2306.2181 * t + 1.09468 * t ** 2 + 0.018203 * t ** 3) * ARCSEC
+    theta = (2004.3109 * t - 0.42665 * t ** 2 - 0.041833 * t ** 3) * ARCSEC
+    return _rotation(2, -z) @ _rotation(1, theta) @ _rotation(2, -zeta)
+
+
+def nutation(jd):
+    """Nutação em longitude e obliquidade e obliquidade média, em radianos (termos principais do IAU 1980)."""
+    t = (jd - J2000_JD) / 36525
+    omega = math.radians(125.04452 - 1934.136261 * t)
+    sun = math.radians(2 * (280.4665 + 36000.7698 * t))
+    moon = math.radians(2 * (218.3165 + 481267.8813 * t))
+    delta_psi = (-17.20 * math.sin(omega) - 1.32 * math.sin(sun) - 0.23 * math.sin(moon) + 0.21 * math.sin(2 * omega)) * ARCSEC
+    delta_epsilon = (9.20 * math.cos(omega) + 0.57 * math.cos(sun) + 0.10 * math.cos(moon) - 0.09 * math.cos(2 * omega)) * ARCSEC
+    mean_obliquity = (84381.448 - 46.8150 * t - 0.00059 * t ** 2 + 0.001813 * t ** 3) * ARCSEC
+    return delta_psi, delta_epsilon, mean_obliquity
+
+
+def nutation_matrix(jd):
+    delta_psi, delta_epsilon, mean_obliquity = nutation(jd)
+    return _rotation(0, -(mean_obliquity + delta_epsilon)) @ _rotation(2, -delta_psi) @ _rotation(0, mean_obliquity)
+
+
+def aberration_vector(jd):
+    """Velocidade da Terra dividida pela velocidade da luz, no equador da data."""
+    t = (jd - J2000_JD) / 36525
+    mean_anomaly = math.radians(357.52911 + 35999.05029 * t)
+    center = ((1.914602 - 0.004817 * t) * math.sin(mean_anomaly) + 0.019993 * math.sin(2 * mean_anomaly)
+              + 0.000289 * math.sin(3 * mean_anomaly))
+    sun_longitude = math.radians(280.46646 + 36000.76983 * t + center)
+    eccentricity = 0.016708634 - 0.000042037 * t
+    perihelion = math.radians(102.93735 + 1.71946 * t)
+    x = ABERRATION * (math.sin(sun_longitude) - eccentricity * math.sin(perihelion))
+    y = ABERRATION * (-math.cos(sun_longitude) + eccentricity * math.cos(perihelion))
+    delta_psi, delta_epsilon, mean_obliquity = nutation(jd)
+    obliquity = mean_obliquity + delta_epsilon
+    return np.array([x, y * math.cos(obliquity), y * math.sin(obliquity)])
+
+
+@lru_cache(maxsize=256)
+def _epoch(key):
+    jd = key * EPOCH_RESOLUTION
+    return nutation_matrix(jd) @ precession_matrix(jd), aberration_vector(jd)
+
+
+def epoch_transform(when=None):
+    """Matriz J2000 -> data e vetor de aberração de cada instante.
+
+    Args:
+        when: instante ou vetor de instantes (time.time)
+
+    Returns:
+        tuple: (matrizes com formato (..., 3, 3), vetores com formato (..., 3))
+    """
+    keys = np.rint(julian_date(when) / EPOCH_RESOLUTION).astype(np.int64)
+    if keys.ndim == 0:
+        return _epoch(int(keys))
+    unique, inverse = np.unique(keys, return_inverse=True)
+    epochs = [_epoch(int(key)) for key in unique]
+    matrices = np.stack([matrix for matrix, _ in epochs])[inverse].reshape(keys.shape + (3, 3))
+    vectors = np.stack([vector for _, vector in epochs])[inverse].reshape(keys.shape + (3,))
+    return matrices, vectors
+
+
+def _to_vector(ra_hours, dec_degrees):
+    ra = np.radians(np.asarray(ra_hours, dtype=float) * 15)
+    dec = np.radians(np.asarray(dec_degrees, dtype=float))
+    return np.stack([np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)], axis=-1)
+
+
+def _from_vector(vector):
+    vector = vector / np.linalg.norm(vector, axis=-1, keepdims=True)
+    ra = np.degrees(np.arctan2(vector[..., 1], vector[..., 0])) / 15 % 24
+    dec = np.degrees(np.arcsin(np.clip(vector[..., 2], -1.0, 1.0)))
+    if ra.ndim == 0:
+        return float(ra), float(dec)
+    return ra, dec
+
+
+def j2000_to_jnow(ra_hours, dec_degrees, when=None, aberration=True):
+    """Coordenadas J2000 (catálogo) para a época da data, como as montagens usam.
+
+    Args:
+        ra_hours: ascensão reta J2000, em horas (número ou vetor)
+        dec_degrees: declinação J2000, em graus
+        when: instante (time.time) ou vetor de instantes; agora se omitido
+        aberration (bool): aplica também a aberração anual (posição aparente)
+
+    Returns:
+        tuple: (ascensão reta em horas, declinação em graus) na época da data
+    """
+    matrix, velocity = epoch_transform(when)
+    vector = np.einsum('...ij,...j->...i', matrix, _to_vector(ra_hours, dec_degrees))
+    if aberration:
+        vector = vector + velocity
+    return _from_vector(vector)
+
+
+def jnow_to_j2000(ra_hours, dec_degrees, when=None, aberration=True):
+    """Coordenadas da época da data (montagem) para J2000. Inversa de :func:`j2000_to_jnow`."""
+    matrix, velocity = epoch_transform(when)
+    vector = _to_vector(ra_hours, dec_degrees)
+    if aberration:
+        vector = vector - velocity
+        vector = vector / np.linalg.norm(vector, axis=-1, keepdims=True)
+    return _from_vector(np.einsum('...ji,...j->...i', matrix, vector))
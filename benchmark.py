@@ -0,0 +1,564 @@
+"""Medições de desempenho do Telescope Controller, sem montagem real.
+
+Roda contra a montagem simulada (``simulated_telescope``) e grava os
+resultados em JSON, para comparar versões::
+
+    python benchmark.py --output benchmark.json
+    python benchmark.py --latency 0.03 --jitter 0.01 --caches 0.25 0.5 1 --duration 5
+
+Medições:
+
+- ``poll_loop``: leituras por segundo, latência p50/p99 de cada leitura,
+  acessos ao driver por leitura e ciclos descartados da thread
+  ``UpdateValues``, para cada valor de ``cache``, e o menor ``cache`` que o
+  driver suporta sem ficar sobrecarregado;
+- ``ui_render``: custo de aplicar uma leitura na interface (``UiUpdater.render``)
+  com valores mudando e repetidos;
+- ``goto_coordinates``: latência de ``frmGoto.get_coordinates`` por corpo,
+  no primeiro cálculo e com o cache de efemérides;
+- ``catalog``: buscas no catálogo e buscas em cone do índice espacial;
+- ``catalog_large``: as mesmas medições num catálogo sintético do tamanho do
+  NGC + IC + estrelas brilhantes (``--catalog-size`` objetos), gerado numa
+  pasta temporária, já que o catálogo incluído tem só 226 objetos;
+- ``stop_latency``: tempo de cada parada (``AbortSlew`` e ``MoveAxis`` com
+  taxa 0) com a thread de atualização lendo sem parar, numa montagem que
+  atende um acesso por vez, com o driver acessado diretamente e pelo
+  ``DriverWorker``;
+- ``fanout``: acessos ao driver por segundo e idade das leituras recebidas
+  pelos clientes do servidor de telemetria local, com 0, 1 e vários clientes
+  (um deles lento), para conferir que o tráfego na montagem não muda;
+- ``startup``: tempo de importação, de criação do ``Controller`` (janela
+  pronta) e até a conexão em segundo plano terminar, num processo novo.
+
+As medições que precisam do Tk são marcadas como ``skipped`` quando não há
+display (ex.: servidor sem X).
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+REPO = os.path.dirname(os.path.abspath(__file__))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+from config_store import ConfigStore
+from driver_worker import DriverProxy, DriverWorker
+from ephemeris import BODIES
+from mount_snapshot import MountSnapshot
+from poll_cadence import PollCadence
+from pointing_model import PointingModel
+from simulated_telescope import SimulatedTelescope
+from telemetry import TelemetryRecorder
+from telemetry_server import SnapshotHub, TelemetryServer
+from telescope_capabilities import TelescopeCapabilities
+from thread_update_values import UpdateValues
+
+def percentile(values, fraction):
+    """Percentil (0 a 1) de uma lista de números, por interpolação linear."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    position = (len(ordered) - 1) * fraction
+    low = int(position)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (position - low)
+
+
+def summarize(samples):
+    """Resumo em milissegundos de uma lista de durações em segundos."""
+    samples_ms = [sample * 1000 for sample in samples]
+    return {
+        'count': len(samples_ms),
+        'mean_ms': statistics.fmean(samples_ms) if samples_ms else None,
+        'p50_ms': percentile(samples_ms, 0.50),
+        'p99_ms': percentile(samples_ms, 0.99),
+        'max_ms': max(samples_ms) if samples_ms else None,
+    }
+
+
+def make_telescope(latency, jitter, seed):
+    telescope = SimulatedTelescope(latency=latency, jitter=jitter, seed=seed)
+    telescope.Connected = True
+    telescope.Unpark()
+    telescope.Tracking = True
+    return telescope
+
+
+def make_controller(telescope, cache, config_path):
+    """Controlador mínimo com o que a thread de atualização usa."""
+    return SimpleNamespace(
+        Telescope=telescope,
+        cache=cache,
+        config=ConfigStore(config_path),
+        capabilities=TelescopeCapabilities.from_telescope(telescope),
+        telemetry=TelemetryRecorder(),
+        manual_slew=False,
+        gotoInProgress=False,
+        going_home=False,
+    )
+
+
+def bench_poll_loop(cache, duration, latency, jitter, seed, config_path):
+    """Roda a thread UpdateValues por ``duration`` segundos contra a montagem simulada."""
+    telescope = make_telescope(latency, jitter, seed)
+    controller = make_controller(telescope, cache, config_path)
+    poller = UpdateValues(controller)
+    # Só a medição da montagem: o índice do catálogo é medido em bench_catalog
+    poller.nearby_objects = False
+    durations = []
+    starts = []
+    tick = poller.tick
+
+    def timed_tick():
+        start = time.perf_counter()
+        starts.append(start)
+        snapshot = tick()
+        durations.append(time.perf_counter() - start)
+        return snapshot
+
+    poller.tick = timed_tick
+    telescope.reset_calls()
+    poller.start()
+    time.sleep(duration)
+    poller.stop()
+    poller.join(timeout=duration + 5)
+
+    ticks = len(durations)
+    intervals = [b - a for a, b in zip(starts, starts[1:])]
+    mean_tick = statistics.fmean(durations) if durations else 0.0
+    interval = statistics.fmean(intervals) if intervals else None
+    result = {
+        'cache': cache,
+        'ticks': ticks,
+        'ticks_per_second': ticks / duration,
+        'tick_latency': summarize(durations),
+        'tick_interval': summarize(intervals),
+        'driver_calls_per_tick': sum(telescope.calls.values()) / ticks if ticks else None,
+        'driver_calls': dict(telescope.calls),
+        'skipped_ticks': poller.skipped_ticks,
+        'utilization': mean_tick / interval if interval else None,
+        'cadence_state': poller.cadence.state,
+    }
+    return result
+
+
+def bench_stop_latency(worker, duration, latency, jitter, seed, config_path):
+    """Paradas enviadas em momentos aleatórios enquanto a thread UpdateValues lê a montagem.
+
+    A montagem simulada atende um acesso por vez (``serial``), como o OnStep
+    na porta USB. Sem o worker a parada disputa a porta com as leituras; com
+    ele, espera no máximo o acesso que já estiver em andamento.
+    """
+    import random
+    telescope = make_telescope(latency, jitter, seed)
+    telescope.port = threading.Lock()
+    driver = None
+    if worker:
+        driver = DriverWorker(lambda: telescope)
+        driver.start()
+        driver.ready.result()
+        telescope = DriverProxy(driver)
+    # Leituras seguidas, sem intervalo, como num slew com cache baixo
+    controller = make_controller(telescope, 0.01, config_path)
+    poller = UpdateValues(controller)
+    poller.nearby_objects = False
+    poller.start()
+    chooser = random.Random(seed)
+    stops = []
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        time.sleep(chooser.uniform(0.05, 0.3))
+        telescope.MoveAxis(0, 1.0)
+        time.sleep(chooser.uniform(0.05, 0.3))
+        start = time.perf_counter()
+        if chooser.random() < 0.5:
+            telescope.MoveAxis(0, 0)
+        else:
+            telescope.AbortSlew()
+        stops.append(time.perf_counter() - start)
+    poller.stop()
+    poller.join(timeout=5)
+    if driver:
+        driver.close()
+    return {
+        'worker': worker,
+        'stops': summarize(stops),
+        'ticks': poller.ticks,
+        'stale_polls': poller.stale_polls,
+    }
+
+
+def bench_fanout(clients, cache, duration, latency, jitter, seed, config_path):
+    """Thread UpdateValues publicando para ``clients`` clientes de /events do servidor local.
+
+    Com mais de um cliente, o último lê uma leitura por segundo, para medir o
+    descarte das leituras de um cliente lento sem atrasar os outros.
+    """
+    import http.client
+    telescope = make_telescope(latency, jitter, seed)
+    controller = make_controller(telescope, cache, config_path)
+    controller.snapshot_hub = SnapshotHub()
+    server = TelemetryServer(controller.snapshot_hub, port=0)
+    server.start()
+    poller = UpdateValues(controller)
+    poller.nearby_objects = False
+    stop = threading.Event()
+    received = [[] for _ in range(clients)]
+
+    def listen(index):
+        slow = clients > 1 and index == clients - 1
+        connection = http.client.HTTPConnection(*server.address, timeout=1)
+        connection.request('GET', '/events')
+        response = connection.getresponse()
+        while not stop.is_set():
+            try:
+                line = response.fp.readline()
+            except OSError:
+                continue
+            if not line:
+                break
+            if line.startswith(b'data: '):
+                received[index].append(time.time() - json.loads(line[6:])['timestamp'])
+                if slow:
+                    stop.wait(1.0)
+        connection.close()
+
+    listeners = [threading.Thread(target=listen, args=(index,), daemon=True) for index in range(clients)]
+    for listener in listeners:
+        listener.start()
+    telescope.reset_calls()
+    poller.start()
+    time.sleep(duration)
+    poller.stop()
+    poller.join(timeout=duration + 5)
+    calls = sum(telescope.calls.values())
+    stop.set()
+    for listener in listeners:
+        listener.join(timeout=5)
+    status = controller.snapshot_hub.status()
+    server.stop()
+    fast = [age for ages in (received[:-1] if clients > 1 else received) for age in ages]
+    return {
+        'clients': clients,
+        'ticks': poller.ticks,
+        'driver_calls_per_second': calls / duration,
+        'events_per_client': [len(ages) for ages in received],
+        'age': summarize(fast),
+        'dropped': status['dropped'],
+    }
+
+
+def recommend_cache(results):
+    """Menor ``cache`` que mantém a leitura abaixo de 1/LATENCY_FACTOR do intervalo.
+
+    Usa a pior latência p99 medida, arredondada para cima em passos de 0,05 s.
+    Abaixo desse valor o PollCadence aumenta o intervalo sozinho para não
+    sobrecarregar o driver, e configurar um ``cache`` menor não tem efeito.
+    """
+    latencies = [result['tick_latency']['p99_ms'] for result in results if result['tick_latency']['p99_ms'] is not None]
+    if not latencies:
+        return None
+    seconds = max(latencies) / 1000 * PollCadence.LATENCY_FACTOR
+    return math.ceil(seconds / 0.05) * 0.05
+
+
+def snapshots(count, moving):
+    """Leituras sintéticas; com ``moving`` cada uma muda a posição exibida."""
+    base = MountSnapshot(time.time(), time.monotonic(), 0.01, 5.5, -20.0, 120.0, 45.0,
+                         True, 0, False, False, False)
+    for i in range(count):
+        step = i if moving else 0
+        yield MountSnapshot(base.timestamp + i, base.monotonic + i, 0.01, (5.5 + step * 0.001) % 24,
+                            -20.0 + step * 0.01, (120.0 + step * 0.01) % 360, 45.0 + step * 0.001,
+                            True, 0, False, False, bool(step % 2))
+
+
+def create_root():
+    """Cria uma janela Tk escondida, ou retorna (None, motivo) se não há display."""
+    import tkinter as tk
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        return None, str(e)
+    root.withdraw()
+    return root, None
+
+
+def bench_ui_render(iterations):
+    """Custo do UiUpdater.render, com os widgets reais do Tk."""
+    root, reason = create_root()
+    if root is None:
+        return {'skipped': reason}
+    import tkinter as tk
+    from tkinter import ttk
+    from ui_updater import UiUpdater
+    try:
+        capabilities = TelescopeCapabilities(can_find_home=True, can_park=True, can_unpark=True, can_set_park=True)
+        controller = SimpleNamespace(
+            root=root, capabilities=capabilities, gotoInProgress=False, goto_started=0.0,
+            manual_slew=False, going_home=False, btnFindHome=ttk.Button(root),
+            frmConfig=SimpleNamespace(park_button=ttk.Button(root), set_park_button=ttk.Button(root)),
+        )
+        for name in ('ra', 'dec', 'az', 'alt', 'tracking_rate', 'statusMoviment', 'nearby', 'alignment_star'):
+            setattr(controller, name, tk.StringVar(root))
+        for name in ('ra', 'dec', 'az', 'alt'):
+            ttk.Entry(root, textvariable=getattr(controller, name)).pack()
+        updater = UiUpdater(controller, None)
+        result = {}
+        for label, moving in (('changing', True), ('unchanged', False)):
+            updater.invalidate()
+            render, idle = [], []
+            for snapshot in snapshots(iterations, moving):
+                start = time.perf_counter()
+                updater.render(snapshot)
+                middle = time.perf_counter()
+                root.update_idletasks()
+                render.append(middle - start)
+                idle.append(time.perf_counter() - middle)
+            result[label] = {'render': summarize(render), 'update_idletasks': summarize(idle)}
+        return result
+    finally:
+        root.destroy()
+
+
+def bench_goto_coordinates(iterations, latitude, longitude):
+    """Latência de frmGoto.get_coordinates por corpo do Sistema Solar."""
+    root, reason = create_root()
+    if root is None:
+        result = bench_ephemeris(iterations, latitude, longitude)
+        result['skipped'] = f"{reason}; medido só o cálculo de efemérides"
+        return result
+    from frame_goto import frmGoto
+    from mount_core import MountCore
+    try:
+        mount = MountCore(ConfigStore(os.devnull))
+        mount.capabilities = TelescopeCapabilities(site_latitude=latitude, site_longitude=longitude)
+        mount.pointing = PointingModel(path=None)
+        controller = SimpleNamespace(root=root, mount=mount, capabilities=mount.capabilities,
+                                     pointing=mount.pointing, show_frmMain=lambda: None)
+        goto = frmGoto(controller, root)
+        result = {}
+        for name in BODIES:
+            goto.target = name
+            start = time.perf_counter()
+            goto.get_coordinates()
+            cold = time.perf_counter() - start
+            warm = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                goto.get_coordinates()
+                warm.append(time.perf_counter() - start)
+            result[name] = {'cold_ms': cold * 1000, 'cached': summarize(warm)}
+        return result
+    finally:
+        root.destroy()
+
+
+def bench_ephemeris(iterations, latitude, longitude):
+    """Latência do EphemerisService.info por corpo (o cálculo por trás do get_coordinates)."""
+    from ephemeris import EphemerisService
+    ephemeris = EphemerisService()
+    result = {}
+    for name in BODIES:
+        start = time.perf_counter()
+        ephemeris.info(name, latitude, longitude)
+        cold = time.perf_counter() - start
+        warm = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            ephemeris.info(name, latitude, longitude)
+            warm.append(time.perf_counter() - start)
+        result[name] = {'cold_ms': cold * 1000, 'cached': summarize(warm)}
+    return result
+
+
+def bench_catalog(iterations):
+    """Buscas por nome no catálogo e buscas em cone do índice espacial."""
+    from catalog import Catalog
+    from sky_index import NearbyObjects
+    catalog = Catalog()
+    queries = ['m31', 'Andrômeda', 'NGC 224', 'nebulosa anel', 'centauri', 's', 'xyz']
+    search = {}
+    for query in queries:
+        samples = []
+        for _ in range(iterations):
+            start = time.perf_counter()
+            catalog.search(query)
+            samples.append(time.perf_counter() - start)
+        search[query] = summarize(samples)
+    start = time.perf_counter()
+    nearby = NearbyObjects(catalog)
+    build = time.perf_counter() - start
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        nearby.around((i * 0.37) % 24, ((i * 7.3) % 170) - 85)
+        samples.append(time.perf_counter() - start)
+    return {'objects': len(catalog), 'search': search, 'index_build_ms': build * 1000, 'around': summarize(samples)}
+
+
+def synthetic_catalog(csv_path, size, seed):
+    """Grava um catálogo em texto com ``size`` objetos com nomes no estilo NGC, IC e HD."""
+    rng = random.Random(seed)
+    kinds = ['Galáxia', 'Aglomerado aberto', 'Aglomerado globular', 'Nebulosa', 'Nebulosa planetária', 'Estrela']
+    with open(csv_path, 'w', encoding='utf-8') as csvfile:
+        for index in range(size):
+            if index % 3 == 0:
+                names = f"HD {index + 1}|Estrela {index + 1}"
+                kind = 'Estrela'
+            else:
+                names = f"{'NGC' if index % 3 == 1 else 'IC'} {index + 1}|Objeto {rng.randrange(100000)}"
+                kind = rng.choice(kinds[:-1])
+            ra, dec = rng.uniform(0, 23.99), rng.uniform(-89.9, 89.9)
+            csvfile.write(f"{names};{kind};{int(ra):02d}:{int(ra * 60) % 60:02d}:{ra * 3600 % 60:04.1f};"
+                          f"{'-' if dec < 0 else '+'}{int(abs(dec)):02d}:{int(abs(dec) * 60) % 60:02d}:{int(abs(dec) * 3600) % 60:02d};"
+                          f"{rng.uniform(-1, 15):.1f}\n")
+
+
+def bench_catalog_large(size, iterations, seed):
+    """Geração, buscas por nome e buscas em cone num catálogo sintético de ``size`` objetos."""
+    from catalog import Catalog, build_catalog
+    from sky_index import NearbyObjects
+    with tempfile.TemporaryDirectory() as workdir:
+        csv_path = os.path.join(workdir, 'catalog.csv')
+        bin_path = os.path.join(workdir, 'catalog.bin')
+        synthetic_catalog(csv_path, size, seed)
+        start = time.perf_counter()
+        build_catalog(csv_path, bin_path)
+        build = time.perf_counter() - start
+        start = time.perf_counter()
+        catalog = Catalog(bin_path)
+        opened = time.perf_counter() - start
+        queries = ['ngc 1', 'NGC 4565', 'ic 4', 'hd 9999', 'objeto 123', 's', 'xyz']
+        search = {}
+        for query in queries:
+            samples = []
+            for _ in range(iterations):
+                start = time.perf_counter()
+                catalog.search(query)
+                samples.append(time.perf_counter() - start)
+            search[query] = summarize(samples)
+        start = time.perf_counter()
+        nearby = NearbyObjects(catalog)
+        index_build = time.perf_counter() - start
+        samples = []
+        for i in range(iterations):
+            start = time.perf_counter()
+            nearby.around((i * 0.37) % 24, ((i * 7.3) % 170) - 85)
+            samples.append(time.perf_counter() - start)
+        result = {'objects': len(catalog), 'file_bytes': os.path.getsize(bin_path), 'build_ms': build * 1000,
+                  'open_ms': opened * 1000, 'search': search, 'index_build_ms': index_build * 1000,
+                  'around': summarize(samples)}
+        catalog.close()
+    return result
+
+
+def bench_startup(timeout):
+    """Tempo de importação, criação do Controller e conexão num processo novo, com a montagem simulada."""
+    with tempfile.TemporaryDirectory() as workdir:
+        with open(os.path.join(workdir, 'config.ini'), 'w') as config:
+            config.write("[COMMUNICATION]\nbackend = simulator\ndriver = simulador\n\n[TELEMETRY]\nrecord = false\n")
+        code = (
+            "import json, sys, time\n"
+            "start = time.perf_counter()\n"
+            f"sys.path.insert(0, {REPO!r})\n"
+            "import main\n"
+            "imported = time.perf_counter()\n"
+            "controller = main.Controller()\n"
+            "controller.root.update()\n"
+            "ready = time.perf_counter()\n"
+            "while controller.connecting and time.perf_counter() - ready < 30:\n"
+            "    controller.root.update()\n"
+            "    time.sleep(0.005)\n"
+            "connected = time.perf_counter()\n"
+            "if controller.thread_update_values is not None:\n"
+            "    controller.ui_updater.stop()\n"
+            "    controller.thread_update_values.stop()\n"
+            "controller.root.destroy()\n"
+            "print(json.dumps({'import_ms': (imported - start) * 1000, 'controller_ms': (ready - imported) * 1000,\n"
+            "                  'connected_ms': (connected - imported) * 1000}))\n"
+        )
+        start = time.perf_counter()
+        try:
+            process = subprocess.run([sys.executable, '-c', code], cwd=workdir, capture_output=True,
+                                     text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return {'skipped': f"tempo esgotado ({timeout}s)"}
+        total = time.perf_counter() - start
+    if process.returncode != 0:
+        lines = process.stderr.strip().splitlines()
+        return {'skipped': lines[-1] if lines else f"código de saída {process.returncode}"}
+    result = json.loads(process.stdout.strip().splitlines()[-1])
+    result['process_ms'] = total * 1000
+    return result
+
+
+def run(args):
+    results = {
+        'metadata': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'parameters': vars(args),
+        },
+    }
+    with tempfile.TemporaryDirectory() as workdir:
+        config_path = os.path.join(workdir, 'config.ini')
+        poll = [bench_poll_loop(cache, args.duration, args.latency, args.jitter, args.seed, config_path)
+                for cache in args.caches]
+        stop = [bench_stop_latency(worker, args.duration, args.latency, args.jitter, args.seed, config_path)
+                for worker in (False, True)]
+        fanout = [bench_fanout(clients, args.caches[0], args.duration, args.latency, args.jitter, args.seed, config_path)
+                  for clients in args.fanout_clients]
+    results['poll_loop'] = {'runs': poll, 'recommended_cache': recommend_cache(poll)}
+    results['stop_latency'] = stop
+    results['fanout'] = fanout
+    results['ui_render'] = bench_ui_render(args.iterations)
+    results['goto_coordinates'] = bench_goto_coordinates(args.iterations, args.latitude, args.longitude)
+    results['catalog'] = bench_catalog(args.iterations)
+    results['catalog_large'] = bench_catalog_large(args.catalog_size, args.iterations, args.seed)
+    results['startup'] = bench_startup(args.startup_timeout) if not args.skip_startup else {'skipped': 'desativado'}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Medições de desempenho do Telescope Controller")
+    parser.add_argument('--output', help="arquivo JSON de saída (padrão: saída padrão)")
+    parser.add_argument('--duration', type=float, default=5.0, help="segundos de leitura para cada valor de cache")
+    parser.add_argument('--caches', type=float, nargs='+', default=[0.25, 0.5, 1.0], help="valores de cache medidos")
+    parser.add_argument('--latency', type=float, default=0.03, help="tempo médio de cada acesso ao driver simulado")
+    parser.add_argument('--jitter', type=float, default=0.01, help="variação do tempo de cada acesso ao driver simulado")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--fanout-clients', type=int, nargs='+', default=[0, 1, 16],
+                        help="números de clientes do servidor de telemetria medidos")
+    parser.add_argument('--iterations', type=int, default=200, help="repetições das medições da interface e do catálogo")
+    parser.add_argument('--catalog-size', type=int, default=20000,
+                        help="objetos do catálogo sintético (padrão: 20000, perto de NGC + IC + estrelas)")
+    parser.add_argument('--latitude', type=float, default=-23.5)
+    parser.add_argument('--longitude', type=float, default=-46.6)
+    parser.add_argument('--startup-timeout', type=float, default=60.0)
+    parser.add_argument('--skip-startup', action='store_true')
+    args = parser.parse_args()
+
+    results = run(args)
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
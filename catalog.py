@@ -0,0 +1,349 @@
+"""Catálogo de objetos de céu profundo e estrelas para o Goto.
+
+O catálogo fica num arquivo binário compacto (``_internal/catalog.bin``) gerado
+a partir de ``_internal/catalog.csv`` por :func:`build_catalog`::
+
+    python catalog.py _internal/catalog.csv _internal/catalog.bin
+
+O arquivo é aberto com ``mmap`` e nunca é carregado inteiro na memória. Ele
+contém uma tabela de objetos de tamanho fixo, um índice ordenado de chaves de
+busca (para buscas por prefixo com busca binária) e um índice de trigramas
+(para buscas por trechos do nome). As chaves são normalizadas sem acentos,
+espaços e pontuação, então "Andrômeda", "andromeda", "m 31" e "NGC224"
+funcionam da mesma forma.
+"""
+import mmap
+import os
+import struct
+import sys
+import unicodedata
+import numpy as np
+import logandprint as log
+from astrometry import parse_sexagesimal
+
+
+def data_path(name):
+    """Caminho de um arquivo de ``_internal``, independente da pasta de onde o programa foi aberto.
+
+    No código-fonte a pasta fica ao lado deste módulo; no executável do
+    PyInstaller, ao lado do executável.
+    """
+    if getattr(sys, 'frozen', False):
+        base = os.path.dirname(sys.executable)
+    else:
+        base = os.path.dirname(os.path.abspath(__file__))
+    return os.path.join(base, '_internal', name)
+
+
+CATALOG_PATH = data_path('catalog.bin')
+
+MAGIC = b'TCCATLG\0'
+VERSION = 1
+# magic, versão, objetos (qtd, posição), chaves (qtd, posição), trigramas (qtd, posição),
+# textos (posição, tamanho), tipos (posição, tamanho)
+HEADER = struct.Struct('<8sIIIIIIIIIII')
+# ascensão reta (h), declinação (°), magnitude, nomes (posição, tamanho), tipo, busca (posição, tamanho)
+OBJECT = struct.Struct('<ddfIHBxIH2x')
+# Mesmo layout de OBJECT, para ler a tabela de objetos inteira como array do NumPy
+OBJECT_DTYPE = np.dtype([('ra', '<f8'), ('dec', '<f8'), ('mag', '<f4'), ('name_offset', '<u4'), ('name_length', '<u2'),
+                         ('kind', 'u1'), ('pad', 'V1'), ('search_offset', '<u4'), ('search_length', '<u2'), ('pad2', 'V2')])
+# chave (posição, tamanho), objeto
+KEY = struct.Struct('<IHI')
+# trigrama, objeto
+TRIGRAM = struct.Struct('<II')
+
+# Palavras que não viram chaves de busca sozinhas
+STOPWORDS = {'de', 'da', 'do', 'das', 'dos', 'the', 'of'}
+
+# Quantidade máxima de chaves examinadas numa busca por prefixo
+MAX_PREFIX_SCAN = 400
+# Quantidade máxima de candidatos conferidos nas buscas por palavras e por trechos do nome
+MAX_CANDIDATES = 3000
+
+
+def normalize(text):
+    """Normaliza um texto para busca: sem acentos, minúsculo e só letras e números.
+
+    Args:
+        text (str): texto digitado ou nome do objeto
+
+    Returns:
+        str: texto normalizado (ex.: "NGC 224" -> "ngc224", "Andrômeda" -> "andromeda")
+    """
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text.lower() if c.isalnum() and not unicodedata.combining(c))
+
+
+def search_keys(names):
+    """Chaves de busca de um objeto: cada nome completo e cada palavra relevante."""
+    keys = []
+    for name in names:
+        for key in [normalize(name)] + [normalize(word) for word in name.replace('-', ' ').split()
+                                         if len(word) >= 3 and word.lower() not in STOPWORDS]:
+            if key and key not in keys:
+                keys.append(key)
+    return keys
+
+
+def trigrams(key):
+    """Códigos dos trigramas (3 bytes em UTF-8) de uma chave normalizada."""
+    data = key.encode('utf-8')
+    return {int.from_bytes(data[i:i + 3], 'big') for i in range(len(data) - 2)}
+
+
+def read_csv(path):
+    """Lê o catálogo em texto (nomes;tipo;ra;dec;magnitude, linhas com # são comentários)."""
+    objects = []
+    with open(path, encoding='utf-8') as csvfile:
+        for number, line in enumerate(csvfile, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                names, kind, ra, dec, mag = line.split(';')
+                objects.append(([name.strip() for name in names.split('|')], kind.strip(),
+                                parse_sexagesimal(ra), parse_sexagesimal(dec), float(mag)))
+            except ValueError as e:
+                raise ValueError(f"{path}, linha {number}: {e}")
+    return objects
+
+
+def build_catalog(csv_path, bin_path):
+    """Gera o arquivo binário do catálogo a partir do arquivo em texto.
+
+    Args:
+        csv_path (str): catálogo em texto
+        bin_path (str): arquivo binário a ser gerado
+
+    Returns:
+        int: quantidade de objetos gravados
+    """
+    objects = read_csv(csv_path)
+    kinds = sorted({kind for _, kind, _, _, _ in objects})
+    strings = bytearray()
+
+    def add_string(text):
+        data = text.encode('utf-8')
+        offset = len(strings)
+        strings.extend(data)
+        return offset, len(data)
+
+    kinds_offset, kinds_length = add_string('\n'.join(kinds))
+    object_rows, key_rows, trigram_rows = [], [], set()
+    for index, (names, kind, ra, dec, mag) in enumerate(objects):
+        keys = search_keys(names)
+        name_offset, name_length = add_string('|'.join(names))
+        search_offset, search_length = add_string('|'.join(keys))
+        object_rows.append(OBJECT.pack(ra, dec, mag, name_offset, name_length, kinds.index(kind), search_offset, search_length))
+        for key in keys:
+            key_offset, key_length = add_string(key)
+            key_rows.append((key.encode('utf-8'), mag, key_offset, key_length, index))
+            trigram_rows.update((code, index) for code in trigrams(key))
+
+    key_rows.sort(key=lambda row: (row[0], row[1]))
+    objects_offset = HEADER.size
+    keys_offset = objects_offset + OBJECT.size * len(object_rows)
+    trigrams_offset = keys_offset + KEY.size * len(key_rows)
+    strings_offset = trigrams_offset + TRIGRAM.size * len(trigram_rows)
+
+    temp_path = bin_path + '.tmp'
+    with open(temp_path, 'wb') as binfile:
+        binfile.write(HEADER.pack(MAGIC, VERSION, len(object_rows), objects_offset, len(key_rows), keys_offset,
+                                  len(trigram_rows), trigrams_offset, strings_offset, len(strings),
+                                  kinds_offset, kinds_length))
+        for row in object_rows:
+            binfile.write(row)
+        for _, _, key_offset, key_length, index in key_rows:
+            binfile.write(KEY.pack(key_offset, key_length, index))
+        for code, index in sorted(trigram_rows):
+            binfile.write(TRIGRAM.pack(code, index))
+        binfile.write(strings)
+    os.replace(temp_path, bin_path)
+    return len(object_rows)
+
+
+class CatalogEntry:
+    """Objeto do catálogo.
+
+    Attributes:
+        index (int): posição do objeto no catálogo
+        names (list): nomes do objeto; o primeiro é o principal
+        kind (str): tipo do objeto (galáxia, nebulosa, estrela...)
+        ra_hours (float): ascensão reta J2000, em horas
+        dec_degrees (float): declinação J2000, em graus
+        magnitude (float): magnitude visual
+    """
+    def __init__(self, index, names, kind, ra_hours, dec_degrees, magnitude):
+        self.index = index
+        self.names = names
+        self.kind = kind
+        self.ra_hours = ra_hours
+        self.dec_degrees = dec_degrees
+        self.magnitude = magnitude
+
+    @property
+    def name(self):
+        return self.names[0]
+
+    @property
+    def label(self):
+        """Nome exibido na lista de resultados, ex.: "M31 (Galáxia de Andrômeda)"."""
+        if len(self.names) > 1:
+            return f"{self.names[0]} ({', '.join(self.names[1:3])})"
+        return self.names[0]
+
+    @property
+    def target(self):
+        """Alvo no formato (nome, RA em horas, DEC em graus, magnitude) usado pelas efemérides."""
+        return (self.name, self.ra_hours, self.dec_degrees, self.magnitude)
+
+    def __repr__(self):
+        return f"CatalogEntry({self.label!r})"
+
+
+class Catalog:
+    """Leitura e busca no catálogo binário, aberto com mmap.
+
+    Args:
+        path (str): caminho do arquivo binário do catálogo
+    """
+    def __init__(self, path=CATALOG_PATH):
+        self.path = path
+        with open(path, 'rb') as binfile:
+            self.data = mmap.mmap(binfile.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.n_objects, self.objects_offset, self.n_keys, self.keys_offset,
+         self.n_trigrams, self.trigrams_offset, self.strings_offset, _, kinds_offset, kinds_length) = HEADER.unpack_from(self.data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Arquivo de catálogo inválido: {path}")
+        self.kinds = self.string(kinds_offset, kinds_length).split('\n')
+        log.debug(f"Catálogo {path} aberto com {self.n_objects} objetos")
+
+    def __len__(self):
+        return self.n_objects
+
+    def close(self):
+        self.data.close()
+
+    def string(self, offset, length):
+        start = self.strings_offset + offset
+        return self.data[start:start + length].decode('utf-8')
+
+    def entry(self, index):
+        """Retorna o objeto da posição ``index``."""
+        ra, dec, mag, name_offset, name_length, kind, _, _ = OBJECT.unpack_from(self.data, self.objects_offset + OBJECT.size * index)
+        return CatalogEntry(index, self.string(name_offset, name_length).split('|'), self.kinds[kind], ra, dec, mag)
+
+    def entries(self):
+        for index in range(self.n_objects):
+            yield self.entry(index)
+
+    def columns(self):
+        """Coordenadas, magnitudes e tipos de todos os objetos, como arrays do NumPy.
+
+        Returns:
+            tuple: (ascensão reta em horas, declinação em graus, magnitude, tipo)
+        """
+        table = np.frombuffer(self.data, dtype=OBJECT_DTYPE, count=self.n_objects, offset=self.objects_offset)
+        # Cópias, para não prender o mmap (que não pode ser fechado com buffers exportados)
+        columns = table['ra'].copy(), table['dec'].copy(), table['mag'].astype(np.float64), table['kind'].copy()
+        del table
+        return columns
+
+    def magnitude(self, index):
+        return OBJECT.unpack_from(self.data, self.objects_offset + OBJECT.size * index)[2]
+
+    def _search_text(self, index):
+        fields = OBJECT.unpack_from(self.data, self.objects_offset + OBJECT.size * index)
+        start = self.strings_offset + fields[6]
+        return self.data[start:start + fields[7]]
+
+    def _key(self, position):
+        key_offset, key_length, index = KEY.unpack_from(self.data, self.keys_offset + KEY.size * position)
+        start = self.strings_offset + key_offset
+        return self.data[start:start + key_length], index
+
+    def _lower_bound(self, prefix):
+        """Primeira posição do índice de chaves com chave >= ``prefix``."""
+        low, high = 0, self.n_keys
+        while low < high:
+            middle = (low + high) // 2
+            if self._key(middle)[0] < prefix:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _prefix_range(self, prefix):
+        """Intervalo [início, fim) do índice de chaves que começam com ``prefix``."""
+        # 0xff nunca aparece em UTF-8, então é maior que qualquer continuação do prefixo
+        return self._lower_bound(prefix), self._lower_bound(prefix + b'\xff')
+
+    def _trigram_range(self, code):
+        """Intervalo [início, fim) do índice de trigramas com o trigrama ``code``."""
+        def lower_bound(value):
+            low, high = 0, self.n_trigrams
+            while low < high:
+                middle = (low + high) // 2
+                if TRIGRAM.unpack_from(self.data, self.trigrams_offset + TRIGRAM.size * middle)[0] < value:
+                    low = middle + 1
+                else:
+                    high = middle
+            return low
+        return lower_bound(code), lower_bound(code + 1)
+
+    def search(self, query, limit=15):
+        """Busca objetos pelo nome ou designação.
+
+        Os resultados que têm uma chave igual ao texto vêm primeiro, depois os
+        que têm uma chave começando com o texto, os que têm todas as palavras
+        digitadas e por fim os que contêm o texto em qualquer posição; dentro de
+        cada grupo, os de chave mais curta e os mais brilhantes primeiro.
+
+        Args:
+            query (str): texto digitado pelo usuário
+            limit (int): quantidade máxima de resultados
+
+        Returns:
+            list: objetos ``CatalogEntry`` encontrados
+        """
+        key = normalize(query).encode('utf-8')
+        if not key:
+            return []
+        ranks = {}
+        start, end = self._prefix_range(key)
+        for position in range(start, min(end, start + MAX_PREFIX_SCAN)):
+            found, index = self._key(position)
+            rank = (0 if found == key else 1, len(found))
+            if index not in ranks or rank < ranks[index]:
+                ranks[index] = rank
+
+        # Várias palavras: candidatos da palavra mais rara, conferindo as demais no texto de busca
+        words = [word for word in (normalize(word).encode('utf-8') for word in query.split()) if word]
+        if len(ranks) < limit and len(words) > 1:
+            start, end = min((self._prefix_range(word) for word in words), key=lambda bounds: bounds[1] - bounds[0])
+            if end - start <= MAX_CANDIDATES:
+                for position in range(start, end):
+                    index = self._key(position)[1]
+                    if index not in ranks and all(word in self._search_text(index) for word in words):
+                        ranks[index] = (2, 0)
+
+        # Trecho do nome: candidatos do trigrama mais raro, conferindo o texto completo
+        if len(ranks) < limit and len(key) >= 3:
+            start, end = min((self._trigram_range(code) for code in trigrams(key.decode('utf-8'))),
+                             key=lambda bounds: bounds[1] - bounds[0])
+            if end - start <= MAX_CANDIDATES:
+                for position in range(start, end):
+                    index = TRIGRAM.unpack_from(self.data, self.trigrams_offset + TRIGRAM.size * position)[1]
+                    if index not in ranks and key in self._search_text(index):
+                        ranks[index] = (3, 0)
+
+        best = sorted(ranks, key=lambda index: (ranks[index], self.magnitude(index)))[:limit]
+        return [self.entry(index) for index in best]
+
+
+if __name__ == '__main__':
+    if len(sys.argv) != 3:
+        print("Uso: python catalog.py <catálogo.csv> <catálogo.bin>")
+        sys.exit(1)
+    count = build_catalog(sys.argv[1], sys.argv[2])
+    print(f"{count} objetos gravados em {sys.argv[2]}")
@@ -0,0 +1,117 @@
+"""Controle da montagem pela linha de comando, sem abrir a janela.
+
+Usa o mesmo ``config.ini`` do programa (backend, driver, modelo de apontamento)
+e não importa o Tk, para scripts e agendamentos em computadores sem monitor::
+
+    python cli.py status
+    python cli.py goto Júpiter --wait
+    python cli.py goto "05:34:31 +22:00:52"
+    python cli.py track sideral
+    python cli.py park
+    python cli.py watch --interval 0.2
+
+``status`` e ``watch`` escrevem uma linha JSON por leitura; os outros comandos
+escrevem um resumo. Em caso de erro a mensagem vai para a saída de erro e o
+código de saída é 1.
+"""
+import argparse
+import json
+import sys
+import logandprint as log
+from config_store import ConfigStore
+from mount_core import MountCore, MountError
+
+
+def emit(data):
+    print(json.dumps(data, ensure_ascii=False), flush=True)
+
+
+def run(mount, args):
+    """Executa o comando pedido na montagem já conectada."""
+    if args.command == 'status':
+        emit(mount.status().to_dict())
+    elif args.command == 'watch':
+        for snapshot in mount.watch(args.interval, args.count):
+            emit(snapshot.to_dict())
+    elif args.command == 'goto':
+        target, future = mount.goto(mount.find_target(' '.join(args.target)), min_altitude=args.min_altitude)
+        if future is not None:
+            future.result(args.timeout)
+        print(f"Goto para {target.name} (RA {target.ra:.4f}h DEC {target.dec:.4f}°, altitude {target.altitude:.1f}°)")
+        if args.wait:
+            mount.wait_slew(args.timeout)
+            emit(mount.status().to_dict())
+    elif args.command == 'track':
+        mount.set_tracking(' '.join(args.rate))
+        print(f"Rastreamento: {mount.status().tracking_name}")
+    elif args.command == 'park':
+        mount.park()
+        print("Montagem estacionada")
+    elif args.command == 'unpark':
+        mount.unpark()
+        print("Montagem fora do estacionamento")
+    elif args.command == 'home':
+        mount.find_home()
+        print("Comando de home enviado")
+    elif args.command == 'stop':
+        mount.abort()
+        print("Movimento interrompido")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Controle da montagem pela linha de comando")
+    parser.add_argument('--config', default='config.ini', help="arquivo de configurações (padrão: config.ini)")
+    parser.add_argument('--backend', help="ascom, alpaca ou simulator (padrão: o do config.ini)")
+    parser.add_argument('--driver', help="driver ASCOM, endereço Alpaca ou parâmetros da simulação (padrão: o do config.ini)")
+    parser.add_argument('--debug', action='store_true', help="mostra o log")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('status', help="posição e estado da montagem, em JSON")
+    watch = commands.add_parser('watch', help="leituras contínuas, uma linha JSON por leitura")
+    watch.add_argument('--interval', type=float, default=1.0, help="segundos entre leituras (padrão: 1)")
+    watch.add_argument('--count', type=int, help="número de leituras (padrão: sem fim)")
+    goto = commands.add_parser('goto', help="goto para um corpo, objeto do catálogo ou coordenadas J2000")
+    goto.add_argument('target', nargs='+', help='ex.: Júpiter, M31, "05:34:31 +22:00:52"')
+    goto.add_argument('--wait', action='store_true', help="espera o fim do slew")
+    goto.add_argument('--timeout', type=float, default=300.0, help="tempo máximo do slew, em segundos")
+    goto.add_argument('--min-altitude', type=float, default=0.0, help="altitude mínima do alvo, em graus")
+    track = commands.add_parser('track', help="rastreamento: sideral, lunar, solar, king rate ou off")
+    track.add_argument('rate', nargs='+')
+    commands.add_parser('park', help="estaciona a montagem")
+    commands.add_parser('unpark', help="tira a montagem do estacionamento")
+    commands.add_parser('home', help="vai para a posição home")
+    commands.add_parser('stop', help="interrompe qualquer movimento")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.debug:
+        log.debugMode(True)
+    else:
+        log.enable(False)
+    mount = MountCore(ConfigStore(args.config))
+    try:
+        if args.backend:
+            # Só para este comando: o config.ini não é alterado
+            from telescope_backend import get_backend_name
+            mount.backend = get_backend_name(args.backend)
+        mount.connect(args.driver)
+        run(mount, args)
+    except KeyboardInterrupt:
+        pass
+    except (MountError, TimeoutError) as e:
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    except Exception as e:
+        log.error(f"Erro no comando {args.command}: {e}")
+        print(f"Erro: {e}", file=sys.stderr)
+        return 1
+    finally:
+        if mount.connected:
+            # A montagem continua no estado em que ficou (rastreando, em slew...); só a conexão é fechada
+            mount.disconnect()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
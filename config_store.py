@@ -0,0 +1,171 @@
+import configparser
+import os
+import tempfile
+import threading
+import time
+import logandprint as log
+
+
+class ConfigStore:
+    """Configurações do config.ini mantidas em memória.
+
+    O arquivo é lido uma única vez e os valores são servidos da memória. Edições
+    externas são detectadas pela data de modificação do arquivo, verificada no
+    máximo uma vez a cada ``check_interval`` segundos. As alterações são
+    agrupadas e gravadas depois de ``flush_delay`` segundos, de forma atômica
+    (arquivo temporário + rename), ou imediatamente com :meth:`flush`.
+
+    Args:
+        path (str): caminho do arquivo de configurações
+        flush_delay (float): espera, em segundos, antes de gravar as alterações
+        check_interval (float): intervalo mínimo, em segundos, entre verificações do arquivo
+    """
+    def __init__(self, path='config.ini', flush_delay=1.0, check_interval=1.0):
+        self.path = path
+        self.flush_delay = flush_delay
+        self.check_interval = check_interval
+        self.lock = threading.RLock()
+        self.parser = configparser.ConfigParser()
+        self.mtime = None
+        self.last_check = 0.0
+        self.pending = []
+        self.flush_timer = None
+        self.load()
+
+    def load(self):
+        """(Re)lê o arquivo do disco, reaplicando as alterações ainda não gravadas."""
+        with self.lock:
+            parser = configparser.ConfigParser()
+            self.mtime = self._get_mtime()
+            if self.mtime is not None:
+                parser.read(self.path)
+                log.debug(f"Configurações carregadas de {self.path}")
+            self.parser = parser
+            for operation in self.pending:
+                self._apply(*operation)
+            self.last_check = time.monotonic()
+
+    def _get_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def _refresh(self):
+        """Recarrega o arquivo se ele foi alterado fora do programa."""
+        now = time.monotonic()
+        if now - self.last_check < self.check_interval:
+            return
+        self.last_check = now
+        if self._get_mtime() != self.mtime:
+            log.debug(f"{self.path} foi alterado externamente, recarregando")
+            self.load()
+
+    def get(self, section, option, fallback=None):
+        """Retorna o valor da configuração como texto.
+
+        Args:
+            section (str): seção do config.ini
+            option (str): nome da configuração
+            fallback: valor retornado se a configuração não existir
+
+        Returns:
+            str: valor da configuração ou ``fallback``
+        """
+        with self.lock:
+            self._refresh()
+            return self.parser.get(section, option, fallback=fallback)
+
+    def get_bool(self, section, option, fallback=False):
+        """Retorna o valor da configuração como booleano."""
+        with self.lock:
+            self._refresh()
+            try:
+                return self.parser.getboolean(section, option, fallback=fallback)
+            except ValueError:
+                return fallback
+
+    def get_float(self, section, option, fallback=None):
+        """Retorna o valor da configuração como número."""
+        with self.lock:
+            self._refresh()
+            try:
+                return self.parser.getfloat(section, option, fallback=fallback)
+            except ValueError:
+                return fallback
+
+    def set(self, section, option, value):
+        """Altera uma configuração; a gravação no disco é agendada."""
+        value = str(value)
+        if value == '':
+            return
+        self._change('set', section, option, value)
+
+    def delete(self, section, option):
+        """Remove uma configuração; a gravação no disco é agendada.
+
+        Returns:
+            bool: True se a configuração existia
+        """
+        with self.lock:
+            self._refresh()
+            if not self.parser.has_option(section, option):
+                return False
+            self._change('delete', section, option, None)
+            return True
+
+    def _change(self, action, section, option, value):
+        with self.lock:
+            operation = (action, section, option, value)
+            self._apply(*operation)
+            self.pending.append(operation)
+            if self.flush_timer is None:
+                self.flush_timer = threading.Timer(self.flush_delay, self.flush)
+                self.flush_timer.daemon = True
+                self.flush_timer.start()
+
+    def _apply(self, action, section, option, value):
+        if action == 'set':
+            if not self.parser.has_section(section):
+                self.parser.add_section(section)
+            self.parser.set(section, option, value)
+        elif self.parser.has_section(section):
+            self.parser.remove_option(section, option)
+
+    def flush(self):
+        """Grava as alterações pendentes no disco de forma atômica."""
+        with self.lock:
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            if not self.pending:
+                return
+            # Aplica as alterações sobre a versão atual do arquivo, preservando edições externas
+            if self._get_mtime() != self.mtime:
+                self.load()
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, temp_path = tempfile.mkstemp(prefix='.config-', suffix='.tmp', dir=directory)
+            try:
+                with os.fdopen(fd, 'w') as configfile:
+                    self.parser.write(configfile)
+                    configfile.flush()
+                    os.fsync(configfile.fileno())
+                os.replace(temp_path, self.path)
+            except Exception:
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                raise
+            self.pending.clear()
+            self.mtime = self._get_mtime()
+            log.debug(f"Configurações gravadas em {self.path}")
+
+    def reset(self):
+        """Descarta todas as configurações e remove o arquivo."""
+        with self.lock:
+            if self.flush_timer is not None:
+                self.flush_timer.cancel()
+                self.flush_timer = None
+            self.pending.clear()
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            self.load()
@@ -0,0 +1,332 @@
+"""Acesso ao driver da montagem por uma única thread, com prioridade para as paradas.
+
+O driver COM do ASCOM (e a serial do OnStep por trás dele) atende um acesso por
+vez. Quando a thread do Tk, a thread de atualização e a sequência de observação
+usam o driver ao mesmo tempo, a ordem é a de quem conseguir o driver primeiro, e
+um PARE pode esperar atrás de uma dúzia de leituras.
+
+Com o :class:`DriverWorker`, só a thread dele fala com o driver. As outras
+threads usam um :class:`DriverProxy`, que tem a mesma interface do ITelescope e
+transforma cada acesso num comando da fila de prioridade do worker::
+
+    worker = DriverWorker(lambda: win32com.client.Dispatch(prog_id))
+    worker.start()
+    telescope = DriverProxy(worker)
+    telescope.Connected = True
+"""
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+import logandprint as log
+from mount_snapshot import MountSnapshot, SNAPSHOT_PROPERTIES
+try:
+    import pythoncom
+except ImportError:  # fora do Windows não há COM
+    pythoncom = None
+
+# Prioridades da fila (menor passa na frente)
+PRIORITY_STOP = 0
+PRIORITY_COMMAND = 1
+PRIORITY_POLL = 2
+PRIORITY_CLOSE = 3
+
+# Paradas mais lentas que isso (fila + driver) ficam registradas no log
+STOP_LATENCY_WARNING = 0.5
+
+# Enquanto espera uma resposta, quem chamou confere a cada intervalo desses (s) se o worker ainda existe
+WAIT_CHECK = 1.0
+
+# Métodos do ITelescope: obtê-los pelo proxy não fala com o driver, só a chamada
+DRIVER_METHODS = frozenset({
+    'AbortSlew', 'Action', 'AxisRates', 'CanMoveAxis', 'CommandBlind', 'CommandBool', 'CommandString',
+    'DestinationSideOfPier', 'FindHome', 'MoveAxis', 'Park', 'PulseGuide', 'SetPark', 'SetupDialog',
+    'SlewToAltAz', 'SlewToAltAzAsync', 'SlewToCoordinates', 'SlewToCoordinatesAsync', 'SlewToTarget',
+    'SlewToTargetAsync', 'SyncToAltAz', 'SyncToCoordinates', 'SyncToTarget', 'Unpark',
+})
+
+
+class StalePoll(Exception):
+    """Leitura do ciclo descartada: uma parada foi executada no meio dela, ou ela ficou velha na fila."""
+
+
+class WorkerClosed(Exception):
+    """O worker já foi encerrado (montagem desconectada)."""
+
+
+def is_stop(name, args, kwargs):
+    """Indica se a chamada para a montagem: AbortSlew ou MoveAxis com taxa 0."""
+    if name == 'AbortSlew':
+        return True
+    if name == 'MoveAxis':
+        rate = kwargs.get('Rate', args[1] if len(args) > 1 else None)
+        return rate is not None and float(rate) == 0.0
+    return False
+
+
+class _Poll:
+    """Leitura do ciclo em andamento: uma propriedade de ``SNAPSHOT_PROPERTIES`` por vez."""
+    def __init__(self):
+        self.future = Future()
+        self.remaining = list(SNAPSHOT_PROPERTIES)
+        self.values = {}
+        self.queued = time.monotonic()
+        # Preenchidos quando a primeira propriedade é lida
+        self.generation = None
+        self.timestamp = None
+        self.started = None
+
+
+class DriverWorker(threading.Thread):
+    """Única thread que acessa o driver da montagem.
+
+    Os acessos das outras threads viram comandos numa fila de prioridade:
+
+    - paradas (``AbortSlew`` e ``MoveAxis`` com taxa 0) passam na frente de tudo;
+    - os outros comandos e as leituras avulsas vêm em seguida, na ordem de chegada;
+    - as leituras do ciclo de atualização (:meth:`fetch_snapshot`) vêm por último e
+      são feitas uma propriedade por vez, voltando para a fila depois de cada uma.
+
+    Assim uma parada espera no máximo o acesso ao driver que já estiver em
+    andamento, e não a leitura inteira. O tempo de cada parada, da chamada até a
+    resposta do driver, fica em ``stop_latencies`` e na métrica ``stop.latency``.
+    Métodos que só retornam quando terminam (o ``FindHome`` de vários drivers,
+    por exemplo) não podem ser interrompidos e atrasam a parada seguinte.
+
+    Uma leitura do ciclo é descartada com :class:`StalePoll` se uma parada for
+    executada no meio dela, porque misturaria o estado de antes e de depois da
+    parada, ou se ela esperar na fila mais que ``max_poll_age`` segundos. Quem
+    leu deve simplesmente ler de novo.
+
+    O driver é criado pela própria thread (``factory``); no ASCOM o objeto COM
+    fica no apartamento dela e nunca é usado por outra thread. Quando o worker
+    termina, os comandos e leituras que ficaram na fila falham com
+    :class:`WorkerClosed`.
+
+    Args:
+        factory (callable): cria o driver, chamada na thread do worker
+        metrics (Metrics): onde registrar a latência das paradas e as leituras descartadas
+        max_poll_age (float): tempo máximo, em segundos, de uma leitura do ciclo na fila
+    """
+    def __init__(self, factory, metrics=None, max_poll_age=2.0):
+        super().__init__(name='DriverWorker', daemon=True)
+        self.factory = factory
+        self.metrics = metrics
+        self.max_poll_age = max_poll_age
+        self.commands = queue.PriorityQueue()
+        # Desempate da fila: mesma prioridade sai na ordem de chegada
+        self.order = itertools.count()
+        # Incrementado a cada parada executada; leituras começadas antes dela são descartadas
+        self.generation = 0
+        self.driver = None
+        self.closed = False
+        # Conclusão da criação do driver
+        self.ready = Future()
+        self.stop_latencies = deque(maxlen=1000)
+        self.stale_polls = 0
+
+    def run(self):
+        if pythoncom:
+            pythoncom.CoInitialize()
+        try:
+            try:
+                self.driver = self.factory()
+            except Exception as e:
+                self.closed = True
+                self.ready.set_exception(e)
+                return
+            self.ready.set_result(None)
+            while True:
+                priority, _, item = self.commands.get()
+                if item is None:
+                    break
+                if isinstance(item, _Poll):
+                    self.step_poll(item)
+                else:
+                    self.execute(priority, *item)
+        finally:
+            self.closed = True
+            self.fail_pending()
+            # O objeto COM é liberado na thread que o criou
+            self.driver = None
+            if pythoncom:
+                pythoncom.CoUninitialize()
+
+    def close(self, timeout=5.0):
+        """Encerra a thread depois dos comandos já enfileirados."""
+        self.closed = True
+        self.commands.put((PRIORITY_CLOSE, next(self.order), None))
+        if self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
+        if not self.is_alive():
+            # Enfileirados depois que a thread esvaziou a fila
+            self.fail_pending()
+
+    def fail_pending(self):
+        """Falha com WorkerClosed tudo o que ainda está na fila."""
+        while True:
+            try:
+                _, _, item = self.commands.get_nowait()
+            except queue.Empty:
+                return
+            if item is None:
+                continue
+            future = item.future if isinstance(item, _Poll) else item[1]
+            if not future.done():
+                future.set_exception(WorkerClosed("A conexão com o driver foi encerrada"))
+
+    def wait(self, future):
+        """Resultado de ``future``, ou WorkerClosed se o worker terminar sem respondê-lo.
+
+        Não há tempo máximo para a resposta: métodos como o ``FindHome`` podem
+        demorar minutos. Só se confere, a cada ``WAIT_CHECK`` segundos, se a
+        thread continua viva.
+        """
+        while True:
+            try:
+                return future.result(WAIT_CHECK)
+            except FutureTimeout:
+                if future.done():
+                    # TimeoutError do próprio driver
+                    raise
+                if not self.is_alive():
+                    raise WorkerClosed("A conexão com o driver foi encerrada") from None
+
+    # ======= Comandos
+
+    def submit(self, operation, priority=PRIORITY_COMMAND):
+        """Enfileira ``operation(driver)`` sem esperar.
+
+        Returns:
+            concurrent.futures.Future: resultado da operação
+        """
+        if self.closed:
+            raise WorkerClosed("A conexão com o driver foi encerrada")
+        future = Future()
+        self.commands.put((priority, next(self.order), (operation, future, time.monotonic())))
+        return future
+
+    def call(self, operation, priority=PRIORITY_COMMAND):
+        """Executa ``operation(driver)`` na thread do worker e espera o resultado."""
+        if threading.current_thread() is self:
+            return operation(self.driver)
+        return self.wait(self.submit(operation, priority))
+
+    def execute(self, priority, operation, future, submitted):
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            future.set_result(operation(self.driver))
+        except Exception as e:
+            future.set_exception(e)
+        if priority == PRIORITY_STOP:
+            self.generation += 1
+            latency = time.monotonic() - submitted
+            self.stop_latencies.append(latency)
+            if self.metrics:
+                self.metrics.record('stop.latency', latency)
+            if latency > STOP_LATENCY_WARNING:
+                log.warning(f"Parada levou {latency * 1000:.0f}ms até a resposta do driver")
+
+    # ======= Leitura do ciclo
+
+    def fetch_snapshot(self):
+        """Lê as propriedades do ciclo, cedendo a vez às paradas e aos comandos entre uma e outra.
+
+        Returns:
+            MountSnapshot: estado da montagem
+
+        Raises:
+            StalePoll: a leitura foi descartada e deve ser refeita
+        """
+        if self.closed:
+            raise WorkerClosed("A conexão com o driver foi encerrada")
+        poll = _Poll()
+        self.commands.put((PRIORITY_POLL, next(self.order), poll))
+        return self.wait(poll.future)
+
+    def step_poll(self, poll):
+        now = time.monotonic()
+        if poll.generation is None:
+            poll.generation = self.generation
+            poll.timestamp = time.time()
+            poll.started = now
+        if poll.generation != self.generation or now - poll.queued > self.max_poll_age:
+            self.stale_polls += 1
+            if self.metrics:
+                self.metrics.increment('poll.stale')
+            reason = "parada executada durante a leitura" if poll.generation != self.generation else "leitura velha na fila"
+            poll.future.set_exception(StalePoll(reason))
+            return
+        name = poll.remaining.pop(0)
+        try:
+            poll.values[name] = getattr(self.driver, name)
+        except Exception as e:
+            poll.future.set_exception(e)
+            return
+        if poll.remaining:
+            poll.queued = time.monotonic()
+            self.commands.put((PRIORITY_POLL, next(self.order), poll))
+        else:
+            poll.future.set_result(MountSnapshot.from_values(poll.timestamp, poll.started,
+                                                             time.monotonic() - poll.started, poll.values))
+
+    def stop_latency(self):
+        """Resumo, em milissegundos, do tempo das últimas paradas."""
+        samples = sorted(self.stop_latencies)
+        if not samples:
+            return {'count': 0, 'p50_ms': None, 'p99_ms': None, 'max_ms': None}
+        return {
+            'count': len(samples),
+            'p50_ms': round(samples[len(samples) // 2] * 1000, 2),
+            'p99_ms': round(samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000, 2),
+            'max_ms': round(samples[-1] * 1000, 2),
+        }
+
+
+class DriverProxy:
+    """O driver visto pelas outras threads: cada acesso vira um comando do :class:`DriverWorker`.
+
+    Tem a mesma interface do ITelescope (propriedades, escritas e métodos) e
+    espera a resposta como um acesso direto ao driver.
+
+    Args:
+        worker (DriverWorker): dono do driver
+        priority (int): prioridade dos acessos feitos por este proxy; as paradas
+            usam sempre ``PRIORITY_STOP``
+    """
+    def __init__(self, worker, priority=PRIORITY_COMMAND):
+        object.__setattr__(self, '_worker', worker)
+        object.__setattr__(self, '_priority', priority)
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name in DRIVER_METHODS:
+            return self._method(name)
+        value = self._worker.call(lambda driver: getattr(driver, name), self._priority)
+        # Métodos fora do ITelescope também são chamados na thread do worker
+        return self._method(name) if callable(value) else value
+
+    def __setattr__(self, name, value):
+        self._worker.call(lambda driver: setattr(driver, name, value), self._priority)
+
+    def _method(self, name):
+        def method(*args, **kwargs):
+            priority = PRIORITY_STOP if is_stop(name, args, kwargs) else self._priority
+            return self._worker.call(lambda driver: getattr(driver, name)(*args, **kwargs), priority)
+        return method
+
+    def fetch_snapshot(self):
+        """Leitura do ciclo pelo worker (ver :meth:`DriverWorker.fetch_snapshot`)."""
+        return self._worker.fetch_snapshot()
+
+    def __repr__(self):
+        return f"DriverProxy({self._worker.driver!r})"
+
+
+def driver_worker(telescope):
+    """Retorna o DriverWorker por trás da montagem, ou None se ela é acessada diretamente."""
+    return object.__getattribute__(telescope, '_worker') if isinstance(telescope, DriverProxy) else None
@@ -0,0 +1,198 @@
+import threading
+import time
+import ephem
+import logandprint as log
+
+# Corpos do Sistema Solar oferecidos no Goto, com o nome exibido na interface
+BODIES = {
+    'Sol': ephem.Sun,
+    'Lua': ephem.Moon,
+    'Mercúrio': ephem.Mercury,
+    'Vênus': ephem.Venus,
+    'Marte': ephem.Mars,
+    'Júpiter': ephem.Jupiter,
+    'Saturno': ephem.Saturn,
+    'Urano': ephem.Uranus,
+    'Netuno': ephem.Neptune,
+    'Plutão': ephem.Pluto,
+}
+
+
+def fixed_body(name, ra_hours, dec_degrees, magnitude):
+    """Cria um corpo do ephem para um objeto fixo com coordenadas J2000."""
+    name = name.replace(',', ' ').replace('|', ' ')
+    return ephem.readdb(f"{name},f,{ra_hours},{dec_degrees},{magnitude},2000")
+
+
+class BodyPosition:
+    """Posição aparente de um corpo em um instante.
+
+    Attributes:
+        ra (ephem.Angle): ascensão reta
+        dec (ephem.Angle): declinação
+        alt (ephem.Angle): altitude
+        ra_hours (float): ascensão reta em horas decimais
+        dec_degrees (float): declinação em graus decimais
+        alt_degrees (float): altitude em graus decimais
+    """
+    def __init__(self, body):
+        self.ra = body.ra
+        self.dec = body.dec
+        self.alt = body.alt
+        self.ra_hours = body.ra * 12 / ephem.pi
+        self.dec_degrees = body.dec * 180 / ephem.pi
+        self.alt_degrees = body.alt * 180 / ephem.pi
+
+
+class BodyDetails:
+    """Dados de um corpo que mudam devagar (magnitude, distâncias, nascer/pôr...).
+
+    Os instantes de nascer, trânsito e pôr são ``datetime`` locais, ou None se o
+    evento não acontece (corpo circumpolar ou que nunca nasce).
+    """
+    def __init__(self, body, observer):
+        self.mag = body.mag
+        self.size = body.size
+        self.constellation = ephem.constellation(body)[1]
+        # Objetos fixos (estrelas e céu profundo) não têm distâncias nem fase
+        self.sun_distance = getattr(body, 'sun_distance', None)
+        self.earth_distance = getattr(body, 'earth_distance', None)
+        self.phase = getattr(body, 'phase', None)
+        self.next_rising = self._next_event(observer.next_rising, body)
+        self.next_transit = self._next_event(observer.next_transit, body)
+        self.next_setting = self._next_event(observer.next_setting, body)
+
+    @staticmethod
+    def _next_event(search, body):
+        try:
+            return ephem.localtime(search(body))
+        except (ephem.AlwaysUpError, ephem.NeverUpError):
+            return None
+
+    def is_stale(self, now):
+        """True se algum dos eventos calculados já passou."""
+        return any(event is not None and event <= now
+                   for event in (self.next_rising, self.next_transit, self.next_setting))
+
+
+class EphemerisService:
+    """Cálculo de efemérides com cache por corpo, local e intervalo de tempo.
+
+    As buscas de nascer, trânsito e pôr são as partes caras do cálculo e mudam
+    pouco em alguns minutos, então ficam em cache pela chave (corpo, local,
+    intervalo de ``bucket_seconds``) e expiram depois de ``ttl`` segundos. A
+    posição (RA/DEC/altitude) é sempre recalculada. Um ``ephem.Observer`` e uma
+    instância de cada corpo são reaproveitados por local.
+
+    Args:
+        bucket_seconds (int): duração do intervalo de tempo usado na chave do cache
+        ttl (int): tempo, em segundos, que uma entrada fica no cache
+        max_entries (int): quantidade máxima de entradas no cache
+    """
+    def __init__(self, bucket_seconds=300, ttl=900, max_entries=64):
+        self.bucket_seconds = bucket_seconds
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.observers = {}
+        self.bodies = {}
+        self.details = {}
+
+    def site_key(self, latitude, longitude):
+        return (round(float(latitude), 4), round(float(longitude), 4))
+
+    def observer(self, latitude, longitude, when=None):
+        """Retorna o observador do local, com a data ajustada para ``when``.
+
+        Args:
+            latitude (float): latitude em graus
+            longitude (float): longitude em graus
+            when (float): instante (time.time); o instante atual se None
+
+        Returns:
+            ephem.Observer: observador do local
+        """
+        site = self.site_key(latitude, longitude)
+        observer = self.observers.get(site)
+        if observer is None:
+            observer = ephem.Observer()
+            observer.lat = str(latitude)
+            observer.lon = str(longitude)
+            self.observers[site] = observer
+        observer.date = ephem.Date(time.gmtime(time.time() if when is None else when)[:6])
+        return observer
+
+    def body(self, name, site):
+        """Instância reaproveitada do corpo ``name`` para o local ``site``.
+
+        ``name`` é o nome de um corpo de ``BODIES`` ou uma tupla (nome, ascensão
+        reta J2000 em horas, declinação J2000 em graus, magnitude) de um objeto
+        fixo, como os do catálogo.
+        """
+        key = (name, site)
+        body = self.bodies.get(key)
+        if body is None:
+            if isinstance(name, tuple):
+                body = fixed_body(*name)
+            elif name in BODIES:
+                body = BODIES[name]()
+            else:
+                raise ValueError(f"Objeto celeste {name} não encontrado")
+            if len(self.bodies) >= self.max_entries:
+                self.bodies.pop(next(iter(self.bodies)))
+            self.bodies[key] = body
+        return body
+
+    def position(self, name, latitude, longitude, when=None):
+        """Calcula a posição atual do corpo (sempre recalculada).
+
+        Returns:
+            BodyPosition: posição aparente do corpo
+        """
+        with self.lock:
+            observer = self.observer(latitude, longitude, when)
+            body = self.body(name, self.site_key(latitude, longitude))
+            body.compute(observer)
+            return BodyPosition(body)
+
+    def info(self, name, latitude, longitude, when=None):
+        """Calcula a posição atual e os dados lentos (em cache) do corpo.
+
+        Returns:
+            tuple: (BodyPosition, BodyDetails)
+        """
+        when = time.time() if when is None else when
+        with self.lock:
+            site = self.site_key(latitude, longitude)
+            observer = self.observer(latitude, longitude, when)
+            body = self.body(name, site)
+            body.compute(observer)
+            position = BodyPosition(body)
+
+            self._evict(when)
+            key = (name, site, int(when // self.bucket_seconds))
+            entry = self.details.get(key)
+            details = entry[1] if entry else None
+            if details is None or details.is_stale(ephem.localtime(observer.date)):
+                log.debug(f"Calculando efemérides de {name[0] if isinstance(name, tuple) else name}")
+                details = BodyDetails(body, observer)
+                self.details[key] = (when + self.ttl, details)
+                # As buscas de eventos alteram a data do observador
+                observer.date = ephem.Date(time.gmtime(when)[:6])
+            return position, details
+
+    def _evict(self, now):
+        """Remove as entradas expiradas e, se necessário, as mais antigas."""
+        expired = [key for key, (expires, _) in self.details.items() if expires <= now]
+        for key in expired:
+            del self.details[key]
+        while len(self.details) >= self.max_entries:
+            oldest = min(self.details, key=lambda key: self.details[key][0])
+            del self.details[oldest]
+
+    def clear(self):
+        """Descarta todos os cálculos e observadores (por exemplo, ao trocar de local)."""
+        with self.lock:
+            self.observers.clear()
+            self.bodies.clear()
+            self.details.clear()
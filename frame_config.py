@@ -1,7 +1,6 @@
 import tkinter as tk
 from tkinter import ttk
 from tkinter import messagebox
-import configparser
 from tooltip import ToolTip
 import os
 import sys
@@ -56,7 +55,7 @@ class frmConfig(tk.Frame):
         # Entrada para o tempo de atualização
         updating_label = tk.Label(communication_frame, text="Tempo atualização")
         updating_label.grid(row=3, column=0, padx=5, pady=5, sticky="e")
-        ToolTip(updating_label, "Tempo em segundos para atualização dos valores dos eixos e sincronização dos valores do onstep. Quanto menor for esse número, mais rápida será a atualização e mais requisições ao onstep serão feitas.", width=40)
+        ToolTip(updating_label, "Tempo em segundos para atualização dos valores dos eixos e sincronização dos valores do onstep enquanto a montagem rastreia. Durante movimentos a atualização é mais rápida e com a montagem parada ou estacionada é mais lenta. Quanto menor for esse número, mais rápida será a atualização e mais requisições ao onstep serão feitas.", width=40)
         self.updating_entry = tk.Entry(communication_frame, width=15)
         self.updating_entry.grid(row=3, column=1, padx=5, pady=5, sticky="w")
         self.updating_entry.insert(0, controller.cache)
@@ -78,7 +77,7 @@ class frmConfig(tk.Frame):
         invert_ew_label.grid(row=0, column=0, padx=5, pady=5, sticky="e")
         ToolTip(invert_ew_label, "Inverte a direção dos eixos Leste/Oeste", width=40)
         invert_ew_label.bind("<Button-1>", lambda event: self.invert_ew_var.set(not self.invert_ew_var.get()))
-        if controller.get_config('AXIS', 'invert_ew') == 'True':
+        if controller.config.get_bool('AXIS', 'invert_ew'):
             self.invert_ew_var.set(True)
         invert_ew_check = tk.Checkbutton(axis_frame, variable=self.invert_ew_var)
         invert_ew_check.grid(row=0, column=1, padx=5, pady=5, sticky="w")
@@ -91,7 +90,7 @@ class frmConfig(tk.Frame):
         invert_ns_label.grid(row=1, column=0, padx=5, pady=5, sticky="e")
         ToolTip(invert_ns_label, "Inverte a direção dos eixos Norte/Sul", width=40)
         invert_ns_label.bind("<Button-1>", lambda event: self.invert_ns_var.set(not self.invert_ns_var.get()))
-        if controller.get_config('AXIS', 'invert_ns') == 'True':
+        if controller.config.get_bool('AXIS', 'invert_ns'):
             self.invert_ns_var.set(True)
         invert_ns_check = tk.Checkbutton(axis_frame, variable=self.invert_ns_var)
         invert_ns_check.grid(row=1, column=1, padx=5, pady=5, sticky="w")
@@ -157,21 +156,11 @@ class frmConfig(tk.Frame):
 
     def set_config(self, section, option, value):
         """Salva as configurações no arquivo config.ini"""
-        value = str(value)
-        if value == '':
-            return
-        config = configparser.ConfigParser()
-        config.read('config.ini')
-        if section in config:
-            config[section][option] = value
-        else:
-            config[section] = {option: value}
-        with open('config.ini', 'w') as configfile:
-            config.write(configfile)
+        self.controller.config.set(section, option, value)
 
     def park(self):
         try:
-            self.controller.Telescope.Park()
+            self.controller.mount.park()
             self.back()
         except Exception as e:
             log.error(f"Erro ao estacionar telescópio: {e}")
@@ -183,7 +172,7 @@ class frmConfig(tk.Frame):
             if not confirm:
                 return
             log.debug("Setando posição de estacionamento")
-            self.controller.Telescope.SetPark()
+            self.controller.mount.set_park()
             messagebox.showinfo("Estacionamento", "Posição de estacionamento setada com sucesso.\n\nO telescópio irá se mover para essa posição ao ser estacionado.")
             self.back()
         except Exception as e:
@@ -197,8 +186,7 @@ class frmConfig(tk.Frame):
     def reset_config(self):
         """Reseta as configurações do programa e reinicia o programa."""
         try:
-            if os.path.exists('config.ini'):
-                os.remove('config.ini')
+            self.controller.config.reset()
             messagebox.showinfo("Configurações", "Configurações resetadas. O programa será reiniciado.")
             self.controller.root.destroy()
             os.execl(sys.executable, sys.executable, *sys.argv)
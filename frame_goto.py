@@ -4,13 +4,23 @@ from tkinter import font
 from tkinter import messagebox
 import time
 import re
-import ephem
 import logandprint as log
+from astrometry import format_degrees, format_hours
+from ephemeris import BODIES
+from night_planner import NightPlanner
+from frame_night_plan import frmNightPlan
+from frame_sequence import frmSequence
+from tooltip import ToolTip
 
 class frmGoto(tk.Frame):
     def __init__(self, controller, *args, **kwargs):
         super().__init__(*args, **kwargs)
         self.controller = controller
+        self.night_planner = NightPlanner()
+        self.search_results = []
+        # Alvo selecionado: nome de um corpo de BODIES ou um CatalogEntry
+        self.target = None
+        self.sequence = None
 
         # Configuração da barra de rolagem
         scrollbar_goto = ttk.Scrollbar(self, orient='vertical')
@@ -43,9 +53,14 @@ class frmGoto(tk.Frame):
         # Combobox para seleção do objeto
         object_label = tk.Label(object_frame, text="Objeto")
         object_label.grid(row=0, column=0, padx=5, pady=5, sticky="e")
-        self.object_combo = ttk.Combobox(object_frame, values=['Sol', 'Lua', 'Mercúrio', 'Vênus', 'Marte', 'Júpiter', 'Saturno', 'Urano', 'Netuno', 'Plutão'], state="readonly", width=25)
+        self.object_combo = ttk.Combobox(object_frame, values=list(BODIES), state="readonly", width=25)
         self.object_combo.grid(row=0, column=1, padx=5, pady=5)
-        self.object_combo.bind("<<ComboboxSelected>>", lambda event: [self.get_coordinates(), self.object_combo.focus_set()])
+        self.object_combo.bind("<<ComboboxSelected>>", lambda event: [self.select_body(self.object_combo.get()), self.object_combo.focus_set()])
+
+        btnNightPlan = ttk.Button(object_frame, text="Visíveis esta noite", command=self.show_night_plan)
+        btnNightPlan.grid(row=1, column=0, padx=5, pady=2)
+        btnSequence = ttk.Button(object_frame, text="Sequência", command=self.show_sequence)
+        btnSequence.grid(row=1, column=1, padx=5, pady=2)
 
         self.txtObjectInfo = tk.Text(object_frame, height=12, width=45, wrap='word', state='disabled', border=0, background=self.cget('background'), font=("Segoe UI", 9))
         self.txtObjectInfo.grid(row=2, column=0, columnspan=2, padx=5)
@@ -54,6 +69,43 @@ class frmGoto(tk.Frame):
         object_frame.columnconfigure(0, weight=1)
         object_frame.columnconfigure(1, weight=1)
 
+        # Céu profundo e estrelas
+        catalog_frame = ttk.LabelFrame(self.container, text="Céu profundo e estrelas")
+
+        search_label = tk.Label(catalog_frame, text="Buscar")
+        search_label.grid(row=0, column=0, padx=5, pady=5, sticky="e")
+        self.search_text = tk.StringVar()
+        self.search_entry = ttk.Entry(catalog_frame, textvariable=self.search_text, width=28)
+        self.search_entry.grid(row=0, column=1, padx=5, pady=5)
+        self.search_entry.bind("<KeyRelease>", lambda event: self.search_catalog())
+
+        self.lstResults = tk.Listbox(catalog_frame, height=6, width=45, activestyle='none', exportselection=False, font=("Segoe UI", 9))
+        self.lstResults.grid(row=1, column=0, columnspan=2, padx=5, pady=5)
+        self.lstResults.bind("<<ListboxSelect>>", lambda event: self.select_result())
+
+        search_tip = ttk.Label(catalog_frame, text='Ex.: "M31", "Andrômeda", "NGC 224", "Sirius"', font=("Segoe UI", 8))
+        search_tip.grid(row=2, column=0, columnspan=2, padx=5, pady=2)
+
+        catalog_frame.pack(pady=5, padx=15, fill='both', expand=True)
+        catalog_frame.columnconfigure(0, weight=1)
+        catalog_frame.columnconfigure(1, weight=1)
+
+        # Modelo de apontamento
+        pointing_frame = ttk.LabelFrame(self.container, text="Modelo de apontamento")
+
+        self.pointing_text = tk.StringVar(value=self.controller.pointing.describe())
+        pointing_label = ttk.Label(pointing_frame, textvariable=self.pointing_text)
+        pointing_label.grid(row=0, column=0, columnspan=2, padx=5, pady=5)
+        ToolTip(pointing_label, "Faça o goto para uma estrela, centralize-a com os botões de movimento e clique em Registrar estrela. Com mais estrelas espalhadas pelo céu, o modelo corrige o índice dos eixos, o desalinhamento polar, o cone e a flexão do tubo em todos os gotos seguintes.", width=40)
+        btnRegister = ttk.Button(pointing_frame, text="Registrar estrela", command=self.register_star)
+        btnRegister.grid(row=1, column=0, padx=5, pady=5)
+        btnClearModel = ttk.Button(pointing_frame, text="Limpar modelo", command=self.clear_pointing_model)
+        btnClearModel.grid(row=1, column=1, padx=5, pady=5)
+
+        pointing_frame.pack(pady=5, padx=15, fill='both', expand=True)
+        pointing_frame.columnconfigure(0, weight=1)
+        pointing_frame.columnconfigure(1, weight=1)
+
         frmBottom = tk.Frame(self.container)
         btnVoltar = ttk.Button(frmBottom, text="Voltar", command=controller.show_frmMain)
         btnVoltar.grid(row=2, column=0, padx=5, pady=5)
@@ -64,22 +116,16 @@ class frmGoto(tk.Frame):
 
     def sendGoto(self):
         try:
-            self.controller.unpark()
-            ra_decimal, dec_decimal, altitude = self.get_coordinates(alert=False)
-            self.controller.Telescope.TargetRightAscension = ra_decimal
-            self.controller.Telescope.TargetDeclination = dec_decimal
-            if altitude < 0:
-                raise Exception("Objeto abaixo do horizonte")
-            log.debug(f"Enviando goto para RA: {self.controller.Telescope.TargetRightAscension} DEC: {self.controller.Telescope.TargetDeclination}")
-            self.controller.Telescope.Tracking = True
-            self.controller.Telescope.SlewToTargetAsync()
+            target = self.get_coordinates(alert=False)
+            if target is None:
+                return
+            _, future = self.controller.mount.goto(target)
+            if future is not None:
+                # No Alpaca os comandos vão pelo cliente assíncrono, sem travar a interface
+                self.check_goto(future)
             self.controller.gotoInProgress = True
-            if self.object_combo.get() == "Sun":
-                self.controller.Telescope.TrackingRate = 2
-            elif self.object_combo.get() == "Moon":
-                self.controller.Telescope.TrackingRate = 1
-            else:
-                self.controller.Telescope.TrackingRate = 0
+            self.controller.goto_started = time.monotonic()
+            self.controller.thread_update_values.wake()
             self.controller.show_frmMain()
 
         except Exception as e:
@@ -96,51 +142,113 @@ class frmGoto(tk.Frame):
             self.controller.root.focus_set()
 
 
-    def get_coordinates(self, alert=False):
+    def check_goto(self, future, interval=50):
+        """Acompanha o goto enviado pelo cliente assíncrono e mostra o erro, se houver."""
+        if not future.done():
+            self.after(interval, self.check_goto, future, interval)
+            return
+        error = future.exception()
+        if error is None:
+            self.controller.thread_update_values.wake()
+            return
+        error_message = str(error)
+        match = re.search(r'SlewError: (.+)', error_message)
+        error_reason = match.group(1) if match else error_message
+        log.error(f"Erro ao enviar goto: {error_reason}")
+        self.controller.gotoInProgress = False
+        messagebox.showerror("Erro", f"Erro ao enviar goto: {error_reason}")
+
+    def register_star(self):
+        """Registra no modelo de apontamento o alvo atual, já centralizado pelo usuário."""
         try:
-            obj = self.object_combo.get()
-            log.debug(f"Obtenção das coordenadas do objeto: {obj}")
-            city = ephem.Observer()
-            log.warning(f"Latitude: {self.controller.Telescope.SiteLatitude}, Longitude: {self.controller.Telescope.SiteLongitude}")
-            city.lat = str(self.controller.Telescope.SiteLatitude)
-            city.lon = str(self.controller.Telescope.SiteLongitude)
-            hora_local = str(time.strftime("%Y/%m/%d %H:%M:%S"))
-            hora_utc = str(time.strftime("%Y/%m/%d %H:%M:%S", time.gmtime()))
-            city.date = str(hora_utc)
-
-            if obj == 'Sol':
-                obj_ephen = ephem.Sun(city)
-            elif obj == 'Lua':
-                obj_ephen = ephem.Moon(city)
-            elif obj == 'Mercúrio':
-                obj_ephen = ephem.Mercury(city)
-            elif obj == 'Vênus':
-                obj_ephen = ephem.Venus(city)
-            elif obj == 'Marte':
-                obj_ephen = ephem.Mars(city)
-            elif obj == 'Júpiter':
-                obj_ephen = ephem.Jupiter(city)
-            elif obj == 'Saturno':
-                obj_ephen = ephem.Saturn(city)
-            elif obj == 'Urano':
-                obj_ephen = ephem.Uranus(city)
-            elif obj == 'Netuno':
-                obj_ephen = ephem.Neptune(city)
-            elif obj == 'Plutão':
-                obj_ephen = ephem.Pluto(city)
-            else:
-                raise ValueError(f"Objeto celeste {obj} não encontrado")
+            if self.target is None:
+                raise ValueError("Faça o goto para uma estrela e centralize-a antes de registrar")
+            if self.controller.gotoInProgress or self.controller.Telescope.Slewing:
+                raise ValueError("Espere a montagem parar antes de registrar a estrela")
+            target = self.get_coordinates(alert=False)
+            if target is None:
+                return
+            capabilities = self.controller.capabilities
+            point = self.controller.pointing.add(target.name, target.ra, target.dec,
+                                                 self.controller.Telescope.RightAscension, self.controller.Telescope.Declination,
+                                                 capabilities.site_latitude, capabilities.site_longitude)
+            log.debug(f"Estrela registrada no modelo de apontamento: {point}")
+            self.pointing_text.set(self.controller.pointing.describe())
+        except Exception as e:
+            error = f"Erro ao registrar a estrela: {e}"
+            log.error(error)
+            messagebox.showerror("Erro", error)
 
-            obj_ephen.compute(city)
-            ra, dec = obj_ephen.ra, obj_ephen.dec
-            ra_decimal, dec_decimal = obj_ephen.ra * 12 / ephem.pi, obj_ephen.dec * 180 / ephem.pi
+    def clear_pointing_model(self):
+        """Apaga todas as estrelas do modelo de apontamento."""
+        if not self.controller.pointing.points:
+            return
+        if messagebox.askyesno("Atenção", "Deseja apagar todas as estrelas do modelo de apontamento?"):
+            self.controller.pointing.clear()
+            self.pointing_text.set(self.controller.pointing.describe())
+            log.debug("Modelo de apontamento apagado")
 
-            log.debug(f"RA: {ra}, DEC: {dec}, RA decimal: {ra_decimal}, DEC decimal: {dec_decimal}")
+    def select_body(self, name):
+        """Seleciona um corpo do Sistema Solar como alvo do Goto."""
+        self.target = name
+        self.object_combo.set(name)
+        self.lstResults.selection_clear(0, tk.END)
+        self.get_coordinates()
 
-            log.debug('A altitude de '+obj+' é: ' + str(obj_ephen.alt))
-            log.debug('A longitude do telescópio é ' + str(city.lon) + ' e a latitude é ' + str(city.lat) + ' e a data é ' + str(city.date) + ' e a hora local é ' + str(hora_local) + ' e a hora UTC é ' + str(hora_utc))
-            # altitude em decimal
-            altitude = obj_ephen.alt * 180 / ephem.pi
+    def search_catalog(self):
+        """Atualiza a lista de resultados com a busca digitada."""
+        query = self.search_text.get()
+        try:
+            self.search_results = self.controller.mount.catalog.search(query) if query.strip() else []
+        except Exception as e:
+            error = f"Erro ao buscar no catálogo: {e}"
+            log.error(error)
+            messagebox.showerror("Erro", error)
+            self.search_results = []
+        self.lstResults.delete(0, tk.END)
+        for entry in self.search_results:
+            self.lstResults.insert(tk.END, f"{entry.label} — {entry.kind}, mag. {entry.magnitude:.1f}")
+
+    def select_result(self):
+        """Seleciona o resultado da busca como alvo do Goto."""
+        selection = self.lstResults.curselection()
+        if not selection:
+            return
+        self.target = self.search_results[selection[0]]
+        self.object_combo.set('')
+        self.get_coordinates()
+
+    def show_night_plan(self):
+        """Abre a tabela com a visibilidade de todos os objetos durante a noite."""
+        try:
+            capabilities = self.controller.capabilities
+            plan = self.night_planner.plan(capabilities.site_latitude, capabilities.site_longitude, self.object_combo.cget('values'))
+            frmNightPlan(self, plan, self.controller.root)
+        except Exception as e:
+            error = f"Erro ao calcular a visibilidade dos objetos: {e}"
+            log.error(error)
+            messagebox.showerror("Erro", error)
+
+    def show_sequence(self):
+        """Abre a sequência de observação (uma única janela)."""
+        if self.sequence is not None and self.sequence.winfo_exists():
+            self.sequence.lift()
+            return
+        self.sequence = frmSequence(self, self.controller.root)
+
+    def get_coordinates(self, alert=False):
+        try:
+            if self.target is None:
+                raise ValueError("Nenhum objeto selecionado")
+            fixed = not isinstance(self.target, str)
+            obj = self.target.name if fixed else self.target
+            log.debug(f"Obtenção das coordenadas do objeto: {obj}")
+            # Coordenadas na época da data e em J2000, altitude e efemérides calculadas pelo MountCore
+            target = self.controller.mount.resolve(self.target)
+            details = target.details
+            altitude = target.altitude
+            log.debug(f"RA: {target.ra}, DEC: {target.dec}, RA J2000: {target.ra_j2000}, DEC J2000: {target.dec_j2000}")
+            log.debug('A altitude de '+obj+' é: ' + format_degrees(altitude))
             if altitude < 0 and alert:
                 messagebox.showwarning("Atenção", obj + " está abaixo do horizonte")
 
@@ -149,31 +257,51 @@ class frmGoto(tk.Frame):
             self.txtObjectInfo.tag_configure("bold", font=bold)
             self.txtObjectInfo.config(state='normal')
             self.txtObjectInfo.delete('1.0', tk.END)
-            self.txtObjectInfo.insert(tk.END, f'Objeto: {obj}\n')
-            self.txtObjectInfo.insert(tk.END, f'RA: {ra} DEC: {dec}\n')
+            self.txtObjectInfo.insert(tk.END, f'Objeto: {self.target.label if fixed else obj}\n')
+            if fixed:
+                self.txtObjectInfo.insert(tk.END, f'Tipo: {self.target.kind}\n')
+            self.txtObjectInfo.insert(tk.END, f'RA: {format_hours(target.ra)} DEC: {format_degrees(target.dec)} (data atual)\n')
+            self.txtObjectInfo.insert(tk.END, f'RA: {format_hours(target.ra_j2000)} DEC: {format_degrees(target.dec_j2000)} (J2000)\n')
             self.txtObjectInfo.insert(tk.END, f'Altitude: ')
             if altitude < 0:
-                self.txtObjectInfo.insert(tk.END, str(obj_ephen.alt).replace(":", "°", 1).replace(":", "'", 1), "bold")
+                self.txtObjectInfo.insert(tk.END, format_degrees(altitude), "bold")
             else:
-                self.txtObjectInfo.insert(tk.END, str(obj_ephen.alt).replace(":", "°", 1).replace(":", "'", 1))
-            self.txtObjectInfo.insert(tk.END, '"\n')
-            self.txtObjectInfo.insert(tk.END, f'Magnitude: {obj_ephen.mag}\n')
-            self.txtObjectInfo.insert(tk.END, f'Constelação: {ephem.constellation(obj_ephen)[1]}\n')
-            self.txtObjectInfo.insert(tk.END, f'Tamanho: {obj_ephen.size:.2f} arcseconds\n')
-            self.txtObjectInfo.insert(tk.END, f'Distância do Sol ≈ {obj_ephen.sun_distance:.2f} AU ≈ {self.descricao_numeros(obj_ephen.sun_distance)} km\n')
-            self.txtObjectInfo.insert(tk.END, f'Distância da Terra ≈ {obj_ephen.earth_distance:.2f} AU ≈ {self.descricao_numeros(obj_ephen.earth_distance)} km\n')
-            self.txtObjectInfo.insert(tk.END, f'Percentual da superfície iluminada: {obj_ephen.phase:.2f}%\n')
-            self.txtObjectInfo.insert(tk.END, f'Próximo Nascer: {ephem.localtime(city.next_rising(obj_ephen)).strftime("%d/%m/%Y às %H:%M:%S")}\n')
-            self.txtObjectInfo.insert(tk.END, f'Próximo Trânsito: {ephem.localtime(city.next_transit(obj_ephen)).strftime("%d/%m/%Y às %H:%M:%S")}\n')
-            self.txtObjectInfo.insert(tk.END, f'Próximo Pôr: {ephem.localtime(city.next_setting(obj_ephen)).strftime("%d/%m/%Y às %H:%M:%S")}')
+                self.txtObjectInfo.insert(tk.END, format_degrees(altitude))
+            self.txtObjectInfo.insert(tk.END, '\n')
+            self.txtObjectInfo.insert(tk.END, f'Magnitude: {details.mag}\n')
+            self.txtObjectInfo.insert(tk.END, f'Constelação: {details.constellation}\n')
+            if details.size:
+                self.txtObjectInfo.insert(tk.END, f'Tamanho: {details.size:.2f} arcseconds\n')
+            if details.sun_distance is not None:
+                self.txtObjectInfo.insert(tk.END, f'Distância do Sol ≈ {details.sun_distance:.2f} AU ≈ {self.descricao_numeros(details.sun_distance)} km\n')
+            if details.earth_distance is not None:
+                self.txtObjectInfo.insert(tk.END, f'Distância da Terra ≈ {details.earth_distance:.2f} AU ≈ {self.descricao_numeros(details.earth_distance)} km\n')
+            if details.phase is not None:
+                self.txtObjectInfo.insert(tk.END, f'Percentual da superfície iluminada: {details.phase:.2f}%\n')
+            self.txtObjectInfo.insert(tk.END, f'Próximo Nascer: {self.descricao_evento(details.next_rising)}\n')
+            self.txtObjectInfo.insert(tk.END, f'Próximo Trânsito: {self.descricao_evento(details.next_transit)}\n')
+            self.txtObjectInfo.insert(tk.END, f'Próximo Pôr: {self.descricao_evento(details.next_setting)}')
             self.txtObjectInfo.config(state='disabled')
 
-            return ra_decimal, dec_decimal, altitude
+            return target
         except Exception as e:
             error = f"Erro ao obter as coordenadas do objeto: {e}"
             log.error(error)
             messagebox.showerror("Erro", error)
-            return None, None
+            return None
+
+    def descricao_evento(self, when):
+        """Formata o instante de um evento (nascer, trânsito ou pôr)
+
+        Args:
+            when (datetime): instante local do evento ou None se ele não acontece
+
+        Returns:
+            str: data e hora do evento
+        """
+        if when is None:
+            return "não ocorre"
+        return when.strftime("%d/%m/%Y às %H:%M:%S")
 
     def descricao_numeros(self, ua):
         """Converte a distância em UA para uma descrição mais amigável
@@ -0,0 +1,70 @@
+import tkinter as tk
+from tkinter import ttk
+
+
+class frmMetrics(tk.Toplevel):
+    """Janela de depuração com as métricas dos acessos ao driver e da thread de atualização.
+
+    Aberta com ``--debug``; é atualizada a cada ``interval`` milissegundos.
+
+    Args:
+        controller (Controller): controlador principal
+        metrics (Metrics): métricas exibidas
+        interval (int): intervalo de atualização, em milissegundos
+    """
+    COLUMNS = (
+        ('name', 'Membro', 150),
+        ('count', 'Chamadas', 70),
+        ('errors', 'Erros', 50),
+        ('mean_ms', 'Média (ms)', 75),
+        ('p50_ms', 'p50 (ms)', 70),
+        ('p99_ms', 'p99 (ms)', 70),
+        ('max_ms', 'Máx. (ms)', 70),
+    )
+
+    def __init__(self, controller, metrics, interval=1000, *args, **kwargs):
+        super().__init__(controller.root, *args, **kwargs)
+        self.controller = controller
+        self.metrics = metrics
+        self.interval = interval
+        self.after_id = None
+
+        self.title("Métricas")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        self.tick_text = tk.StringVar()
+        ttk.Label(self, textvariable=self.tick_text, justify='left', font=("Consolas", 9)).pack(anchor='w', padx=5, pady=5)
+
+        self.tree = ttk.Treeview(self, columns=[column for column, _, _ in self.COLUMNS], show='headings', height=14)
+        for column, text, width in self.COLUMNS:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor='w' if column == 'name' else 'e')
+        self.tree.pack(fill='both', expand=True, padx=5, pady=5)
+        self.refresh()
+
+    def refresh(self):
+        data = self.metrics.snapshot()
+        counters = data['counters']
+        duration = data['tick'].get('duration', {})
+        jitter = data['tick'].get('jitter', {})
+        self.tick_text.set(
+            f"Leituras: {counters.get('tick.count', 0)}   "
+            f"atrasadas: {counters.get('tick.overruns', 0)}   "
+            f"ciclos descartados: {counters.get('tick.skipped', 0)}\n"
+            f"Duração p50/p99/máx: {duration.get('p50_ms')} / {duration.get('p99_ms')} / {duration.get('max_ms')} ms\n"
+            f"Jitter p50/p99/máx: {jitter.get('p50_ms')} / {jitter.get('p99_ms')} / {jitter.get('max_ms')} ms")
+
+        for name, stats in data['members'].items():
+            values = [name] + [stats.get(column) for column, _, _ in self.COLUMNS[1:]]
+            values = ['—' if value is None else value for value in values]
+            if self.tree.exists(name):
+                self.tree.item(name, values=values)
+            else:
+                self.tree.insert('', tk.END, iid=name, values=values)
+        self.after_id = self.after(self.interval, self.refresh)
+
+    def close(self):
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+            self.after_id = None
+        self.destroy()
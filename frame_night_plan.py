@@ -0,0 +1,95 @@
+import tkinter as tk
+from tkinter import ttk
+from tkinter import messagebox
+import time
+import logandprint as log
+
+
+class frmNightPlan(tk.Toplevel):
+    """Janela com a tabela de visibilidade dos alvos do Goto durante a noite.
+
+    Args:
+        goto (frmGoto): tela de Goto que abriu a janela
+        plan (NightPlan): plano da noite calculado pelo NightPlanner
+    """
+    COLUMNS = (
+        ('name', 'Objeto', 90),
+        ('altitude', 'Alt. agora', 70),
+        ('max_altitude', 'Alt. máx.', 70),
+        ('max_altitude_time', 'Culminação', 80),
+        ('visible_from', 'Visível de', 80),
+        ('visible_until', 'Visível até', 80),
+        ('visible_hours', 'Horas', 50),
+    )
+
+    def __init__(self, goto, plan, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.goto = goto
+        self.plan = plan
+        self.rows = plan.rows()
+        self.sort_column = 'max_altitude'
+        self.sort_reverse = True
+
+        self.title("Visíveis esta noite")
+        self.attributes('-topmost', True)
+        self.resizable(False, True)
+
+        inicio = time.strftime("%d/%m %H:%M", time.localtime(plan.start))
+        fim = time.strftime("%d/%m %H:%M", time.localtime(plan.end))
+        ttk.Label(self, text=f"Noite de {inicio} até {fim} (altitude mínima {plan.min_altitude:.0f}°)").pack(padx=5, pady=5)
+
+        self.tree = ttk.Treeview(self, columns=[column for column, _, _ in self.COLUMNS], show='headings', height=12)
+        for column, text, width in self.COLUMNS:
+            self.tree.heading(column, text=text, command=lambda column=column: self.sort_by(column))
+            self.tree.column(column, width=width, anchor='center')
+        self.tree.pack(fill='both', expand=True, padx=5, pady=5)
+        self.tree.bind("<Double-1>", lambda event: self.select())
+
+        ttk.Label(self, text="Clique no título da coluna para ordenar. Duplo clique seleciona o objeto no Goto.", font=("Segoe UI", 8)).pack(padx=5, pady=5)
+        self.fill()
+
+    def sort_by(self, column):
+        """Ordena a tabela pela coluna; clicar de novo inverte a ordem."""
+        if self.sort_column == column:
+            self.sort_reverse = not self.sort_reverse
+        else:
+            self.sort_column = column
+            self.sort_reverse = column != 'name'
+        self.fill()
+
+    def fill(self):
+        self.tree.delete(*self.tree.get_children())
+        # Alvos que não ficam visíveis vão para o fim, independente da ordem
+        missing = [row for row in self.rows if row[self.sort_column] is None]
+        present = [row for row in self.rows if row[self.sort_column] is not None]
+        present.sort(key=lambda row: row[self.sort_column], reverse=self.sort_reverse)
+        for row in present + missing:
+            self.tree.insert('', tk.END, iid=row['name'], values=self.format_row(row))
+
+    def format_row(self, row):
+        return (
+            row['name'],
+            f"{row['altitude']:.1f}°" if row['altitude'] is not None else "—",
+            f"{row['max_altitude']:.1f}°",
+            self.format_time(row['max_altitude_time']),
+            self.format_time(row['visible_from']),
+            self.format_time(row['visible_until']),
+            f"{row['visible_hours']:.1f}",
+        )
+
+    def format_time(self, when):
+        if when is None:
+            return "—"
+        return time.strftime("%H:%M", time.localtime(when))
+
+    def select(self):
+        """Seleciona o objeto escolhido na combobox do Goto."""
+        selection = self.tree.selection()
+        if not selection:
+            return
+        name = selection[0]
+        try:
+            self.goto.select_body(name)
+        except Exception as e:
+            log.error(f"Erro ao selecionar {name}: {e}")
+            messagebox.showerror("Erro", f"Erro ao selecionar {name}: {e}")
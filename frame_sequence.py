@@ -0,0 +1,256 @@
+import tkinter as tk
+from tkinter import ttk
+from tkinter import messagebox
+import threading
+import time
+from concurrent.futures import Future
+import logandprint as log
+from observing_plan import PlanRunner, PlanScheduler, PlanTarget, SlewModel
+
+
+class frmSequence(tk.Toplevel):
+    """Janela da sequência de observação.
+
+    Os alvos são acrescentados a partir do alvo selecionado no Goto, cada um com
+    o seu tempo de permanência. "Otimizar ordem" calcula a sequência com o
+    :class:`PlanScheduler` e "Iniciar" a executa com o :class:`PlanRunner`.
+
+    Args:
+        goto (frmGoto): tela de Goto que abriu a janela
+    """
+    COLUMNS = (
+        ('order', 'Nº', 35),
+        ('name', 'Objeto', 120),
+        ('start', 'Início', 60),
+        ('slew', 'Slew (s)', 60),
+        ('dwell', 'Tempo (min)', 75),
+        ('status', 'Situação', 110),
+    )
+
+    def __init__(self, goto, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.goto = goto
+        self.controller = goto.controller
+        self.targets = []
+        self.schedule = None
+        self.runner = None
+        self.after_id = None
+        # Cálculo da sequência em andamento (Future), feito fora da thread do Tk
+        self.computing = None
+
+        self.title("Sequência de observação")
+        self.protocol("WM_DELETE_WINDOW", self.close)
+
+        frmAdd = ttk.Frame(self)
+        ttk.Label(frmAdd, text="Tempo no alvo (min)").pack(side='left', padx=5)
+        self.dwell = tk.StringVar(value="10")
+        ttk.Entry(frmAdd, textvariable=self.dwell, width=6).pack(side='left', padx=5)
+        ttk.Button(frmAdd, text="Adicionar alvo do Goto", command=self.add_target).pack(side='left', padx=5)
+        ttk.Button(frmAdd, text="Remover", command=self.remove_target).pack(side='left', padx=5)
+        frmAdd.pack(padx=5, pady=5, anchor='w')
+
+        self.tree = ttk.Treeview(self, columns=[column for column, _, _ in self.COLUMNS], show='headings', height=10)
+        for column, text, width in self.COLUMNS:
+            self.tree.heading(column, text=text)
+            self.tree.column(column, width=width, anchor='w' if column == 'name' else 'center')
+        self.tree.pack(fill='both', expand=True, padx=5, pady=5)
+
+        self.summary = tk.StringVar(value="Adicione os alvos selecionados no Goto.")
+        ttk.Label(self, textvariable=self.summary).pack(padx=5, pady=2, anchor='w')
+
+        frmButtons = ttk.Frame(self)
+        self.btnOptimize = ttk.Button(frmButtons, text="Otimizar ordem", command=self.optimize)
+        self.btnOptimize.grid(row=0, column=0, padx=5)
+        self.btnStart = ttk.Button(frmButtons, text="Iniciar", command=self.start, style="Action.TButton")
+        self.btnStart.grid(row=0, column=1, padx=5)
+        self.btnStop = ttk.Button(frmButtons, text="Parar", command=self.stop, state='disabled')
+        self.btnStop.grid(row=0, column=2, padx=5)
+        frmButtons.pack(pady=5)
+
+    def add_target(self):
+        """Acrescenta o alvo selecionado no Goto."""
+        if self.computing:
+            return
+        target = self.goto.target
+        if target is None:
+            messagebox.showwarning("Atenção", "Selecione um objeto na tela de Goto", parent=self)
+            return
+        try:
+            dwell = float(self.dwell.get().replace(',', '.')) * 60
+            if dwell <= 0:
+                raise ValueError
+        except ValueError:
+            messagebox.showerror("Erro", "Tempo no alvo inválido", parent=self)
+            return
+        if isinstance(target, str):
+            self.targets.append(PlanTarget(target, target, dwell))
+        else:
+            self.targets.append(PlanTarget(target.label, target.target, dwell))
+        self.schedule = None
+        self.fill()
+
+    def remove_target(self):
+        selection = self.tree.selection()
+        if not selection or self.running or self.computing:
+            return
+        target = self.rows()[int(selection[0])][0]
+        self.targets.remove(target)
+        self.schedule = None
+        self.fill()
+
+    def rows(self):
+        """Linhas da tabela: (alvo, PlanStep ou None), na ordem da sequência se já calculada."""
+        if self.schedule is None:
+            return [(target, None) for target in self.targets]
+        return [(step.target, step) for step in self.schedule.steps] + [(target, None) for target in self.schedule.skipped]
+
+    def fill(self):
+        self.tree.delete(*self.tree.get_children())
+        for index, (target, step) in enumerate(self.rows()):
+            self.tree.insert('', tk.END, iid=str(index), values=(
+                index + 1 if step or self.schedule is None else '—',
+                target.name,
+                time.strftime("%H:%M", time.localtime(step.start)) if step else '—',
+                f"{step.slew_time:.0f}" if step else '—',
+                f"{target.dwell / 60:.0f}",
+                ('' if step else 'Fora da noite') if self.schedule else '',
+            ))
+
+    def slew_model(self):
+        """Cinemática dos eixos a partir do config.ini e das taxas do driver."""
+        config = self.controller.config
+        rates = [maximum for _, maximum in self.controller.capabilities.axis_rates]
+        return SlewModel(max_rate=config.get_float('PLAN', 'slew_rate', max(rates) if rates else 3.0),
+                         acceleration=config.get_float('PLAN', 'acceleration', 2.0),
+                         settle=config.get_float('PLAN', 'settle_time', 5.0))
+
+    def optimize(self, start=False):
+        """Calcula, numa thread separada, a ordem dos alvos com o menor tempo de slew.
+
+        A busca local do :class:`PlanScheduler` leva alguns segundos com dezenas
+        de alvos; a janela continua respondendo e o resultado é conferido por
+        :meth:`check_schedule`.
+
+        Args:
+            start (bool): executa a sequência assim que ela for calculada
+        """
+        if not self.targets or self.running or self.computing:
+            return
+        try:
+            capabilities = self.controller.capabilities
+            # Última leitura da thread de atualização: a montagem não é consultada pela thread do Tk
+            snapshot = self.controller.ui_updater.snapshot
+            position = (snapshot.right_ascension, snapshot.declination) if snapshot is not None else None
+            scheduler = PlanScheduler(self.goto.night_planner, self.slew_model())
+        except Exception as e:
+            error = f"Erro ao calcular a sequência: {e}"
+            log.error(error)
+            messagebox.showerror("Erro", error, parent=self)
+            return
+        targets = list(self.targets)
+        future = Future()
+
+        def compute():
+            try:
+                future.set_result(scheduler.schedule(targets, capabilities.site_latitude, capabilities.site_longitude,
+                                                     position=position))
+            except Exception as e:
+                future.set_exception(e)
+
+        self.computing = future
+        self.btnOptimize.config(state='disabled')
+        self.btnStart.config(state='disabled')
+        self.summary.set("Calculando a sequência...")
+        threading.Thread(target=compute, name='PlanScheduler', daemon=True).start()
+        self.check_schedule(future, start)
+
+    def check_schedule(self, future, start, interval=100):
+        """Mostra a sequência calculada por :meth:`optimize` quando ela fica pronta."""
+        if not future.done():
+            self.after_id = self.after(interval, self.check_schedule, future, start, interval)
+            return
+        self.after_id = None
+        self.computing = None
+        self.btnOptimize.config(state='normal')
+        self.btnStart.config(state='normal')
+        error = future.exception()
+        if error is not None:
+            error = f"Erro ao calcular a sequência: {error}"
+            log.error(error)
+            self.summary.set("Não foi possível calcular a sequência.")
+            messagebox.showerror("Erro", error, parent=self)
+            return
+        self.schedule = future.result()
+        self.fill()
+        schedule = self.schedule
+        if schedule.steps:
+            self.summary.set(f"{len(schedule.steps)} alvo(s), slews de {schedule.slew_time / 60:.1f} min, "
+                             f"espera de {schedule.wait_time / 60:.0f} min, fim às {time.strftime('%H:%M', time.localtime(schedule.end))}"
+                             + (f"; {len(schedule.skipped)} fora da noite" if schedule.skipped else ""))
+            if start:
+                self.start()
+        else:
+            self.summary.set("Nenhum alvo fica visível pelo tempo pedido esta noite.")
+
+    @property
+    def running(self):
+        return self.runner is not None and self.runner.is_alive()
+
+    def start(self):
+        """Executa a sequência calculada."""
+        if self.running or self.computing:
+            return
+        if self.schedule is None:
+            # Começa quando o cálculo terminar
+            self.optimize(start=True)
+            return
+        if not self.schedule.steps:
+            return
+        config = self.controller.config
+        self.runner = PlanRunner(self.controller, self.schedule,
+                                 settle=config.get_float('PLAN', 'settle_time', 5.0),
+                                 min_altitude=config.get_float('PLAN', 'min_altitude', 0.0))
+        self.runner.start()
+        log.debug(f"Sequência iniciada com {len(self.schedule.steps)} alvo(s)")
+        self.btnStart.config(state='disabled')
+        self.btnStop.config(state='normal')
+        self.poll()
+
+    def stop(self):
+        if self.running:
+            self.runner.stop()
+            log.debug("Sequência interrompida pelo usuário")
+
+    def poll(self, interval=500):
+        """Mostra o progresso publicado pelo PlanRunner."""
+        self.after_id = None
+        # Lido antes de esvaziar a fila, para não perder os últimos eventos
+        alive = self.running
+        states = {'goto': 'Buscando', 'tracking': 'Observando', 'skipped': 'Pulado'}
+        while not self.runner.events.empty():
+            event, index, detail = self.runner.events.get_nowait()
+            if event in states:
+                self.tree.set(str(index), 'status', states[event])
+                if index > 0 and event == 'goto' and self.tree.set(str(index - 1), 'status') == 'Observando':
+                    self.tree.set(str(index - 1), 'status', 'Concluído')
+            elif event == 'finished':
+                self.summary.set(f"Sequência {detail}.")
+                for item in self.tree.get_children():
+                    if self.tree.set(item, 'status') == 'Observando':
+                        self.tree.set(item, 'status', 'Concluído' if detail == 'concluída' else 'Interrompido')
+            elif event == 'error':
+                messagebox.showerror("Erro", f"Erro na sequência de observação: {detail}", parent=self)
+        if alive:
+            self.after_id = self.after(interval, self.poll)
+        else:
+            self.btnStart.config(state='normal')
+            self.btnStop.config(state='disabled')
+
+    def close(self):
+        if self.running:
+            if not messagebox.askyesno("Atenção", "A sequência está em andamento. Deseja interrompê-la?", parent=self):
+                return
+            self.runner.stop()
+        if self.after_id is not None:
+            self.after_cancel(self.after_id)
+        self.destroy()
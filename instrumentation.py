@@ -0,0 +1,289 @@
+"""Métricas de desempenho dos acessos ao driver e da thread de atualização.
+
+Ativadas com ``--debug`` (que também abre o painel de métricas) ou
+``--metrics``. Cada acesso ao driver passa pelo :class:`InstrumentedTelescope`,
+que conta as chamadas, os erros e monta um histograma de latência por membro
+(``RightAscension``, ``MoveAxis()``, ``Tracking=``...). A thread de atualização
+registra a duração de cada leitura, o atraso em relação ao horário agendado
+(jitter) e os ciclos descartados. O :class:`MetricsDumper` grava tudo
+periodicamente em ``metrics.json`` e no log.
+
+O :class:`StartupProfile` mede as etapas da abertura do programa
+(``--profile-startup``) e grava o resultado em ``startup_profile.json``.
+"""
+import json
+import math
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+import logandprint as log
+
+METRICS_PATH = 'metrics.json'
+STARTUP_PROFILE_PATH = 'startup_profile.json'
+
+
+class LatencyHistogram:
+    """Histograma de durações com faixas em escala logarítmica.
+
+    As faixas vão de ``minimum`` a ``maximum`` segundos, cada uma ``factor``
+    vezes maior que a anterior; valores fora ficam na primeira ou na última.
+    Os percentis são estimados pelo limite superior da faixa, com erro
+    relativo de no máximo ``factor``.
+    """
+    def __init__(self, minimum=1e-4, maximum=30.0, factor=1.25):
+        self.minimum = minimum
+        self.factor = factor
+        self.buckets = [0] * (int(math.ceil(math.log(maximum / minimum, factor))) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        if seconds <= self.minimum:
+            index = 0
+        else:
+            index = min(int(math.log(seconds / self.minimum, self.factor)) + 1, len(self.buckets) - 1)
+        self.buckets[index] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def upper_bound(self, index):
+        return self.minimum * self.factor ** index
+
+    def percentile(self, fraction):
+        """Estimativa do percentil (0 a 1), em segundos."""
+        if not self.count:
+            return None
+        wanted = fraction * self.count
+        seen = 0
+        for index, amount in enumerate(self.buckets):
+            seen += amount
+            if seen >= wanted and amount:
+                return min(self.upper_bound(index), self.max)
+        return self.max
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def as_dict(self):
+        def ms(value):
+            return None if value is None else round(value * 1000, 3)
+        return {
+            'count': self.count,
+            'mean_ms': ms(self.mean),
+            'p50_ms': ms(self.percentile(0.50)),
+            'p90_ms': ms(self.percentile(0.90)),
+            'p99_ms': ms(self.percentile(0.99)),
+            'max_ms': ms(self.max if self.count else None),
+        }
+
+
+class Metrics:
+    """Registro, seguro entre threads, das métricas do programa."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.histograms = {}
+        self.errors = {}
+        self.counters = {}
+
+    def record(self, name, seconds):
+        """Registra a duração de uma operação."""
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = LatencyHistogram()
+            histogram.add(seconds)
+
+    def error(self, name):
+        with self.lock:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def increment(self, name, amount=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_tick(self, jitter, duration, missed):
+        """Registra um ciclo da thread de atualização.
+
+        Args:
+            jitter (float): atraso, em segundos, do início em relação ao horário agendado
+            duration (float): duração da leitura, em segundos
+            missed (int): ciclos descartados porque a leitura passou do intervalo
+        """
+        self.record('tick.duration', duration)
+        self.record('tick.jitter', max(jitter, 0.0))
+        self.increment('tick.count')
+        if missed:
+            self.increment('tick.overruns')
+            self.increment('tick.skipped', missed)
+
+    def snapshot(self):
+        """Cópia das métricas atuais, em dicionários simples (serializáveis em JSON)."""
+        with self.lock:
+            return {
+                'started': self.started,
+                'uptime_s': round(time.time() - self.started, 1),
+                'counters': dict(self.counters),
+                'members': {name: dict(histogram.as_dict(), errors=self.errors.get(name, 0))
+                            for name, histogram in sorted(self.histograms.items()) if not name.startswith('tick.')},
+                'tick': {name[len('tick.'):]: histogram.as_dict()
+                         for name, histogram in self.histograms.items() if name.startswith('tick.')},
+            }
+
+    def report(self):
+        """Resumo em texto, uma linha por membro do driver."""
+        data = self.snapshot()
+        lines = [f"Métricas ({data['uptime_s']:.0f}s): {data['counters']}"]
+        for name, stats in data['tick'].items():
+            lines.append(f"  tick {name}: n={stats['count']} p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms max={stats['max_ms']}ms")
+        for name, stats in data['members'].items():
+            lines.append(f"  {name}: n={stats['count']} erros={stats['errors']} p50={stats['p50_ms']}ms p99={stats['p99_ms']}ms max={stats['max_ms']}ms")
+        return '\n'.join(lines)
+
+
+class InstrumentedTelescope:
+    """Envolve o driver da montagem medindo cada acesso.
+
+    Leituras de propriedades ficam com o nome da propriedade, chamadas de
+    métodos com ``()`` no fim e escritas com ``=`` no fim.
+
+    Args:
+        telescope: objeto com a interface ITelescope do ASCOM
+        metrics (Metrics): onde registrar as medições
+    """
+    def __init__(self, telescope, metrics):
+        object.__setattr__(self, '_telescope', telescope)
+        object.__setattr__(self, '_metrics', metrics)
+
+    def _timed(self, name, operation, *args):
+        start = time.perf_counter()
+        try:
+            return operation(*args)
+        except Exception:
+            self._metrics.error(name)
+            raise
+        finally:
+            self._metrics.record(name, time.perf_counter() - start)
+
+    def __getattr__(self, name):
+        start = time.perf_counter()
+        try:
+            value = getattr(self._telescope, name)
+        except Exception:
+            self._metrics.error(name)
+            self._metrics.record(name, time.perf_counter() - start)
+            raise
+        if callable(value):
+            # Obter o método não fala com a montagem; o que conta é a chamada
+            method = f"{name}()"
+            return lambda *args, **kwargs: self._timed(method, lambda: value(*args, **kwargs))
+        self._metrics.record(name, time.perf_counter() - start)
+        return value
+
+    def __setattr__(self, name, value):
+        self._timed(f"{name}=", setattr, self._telescope, name, value)
+
+    def __repr__(self):
+        return f"InstrumentedTelescope({self._telescope!r})"
+
+
+class MetricsDumper(threading.Thread):
+    """Grava as métricas periodicamente em JSON e no log.
+
+    Args:
+        metrics (Metrics): métricas a gravar
+        interval (float): intervalo entre gravações, em segundos
+        path (str): arquivo JSON, sobrescrito a cada gravação
+    """
+    def __init__(self, metrics, interval=60.0, path=METRICS_PATH):
+        super().__init__(name='MetricsDumper', daemon=True)
+        self.metrics = metrics
+        self.interval = interval
+        self.path = path
+        self.stop_event = threading.Event()
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.dump()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def dump(self):
+        log.debug(self.metrics.report())
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.metrics-', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as output:
+                json.dump(self.metrics.snapshot(), output, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log.error(f"Erro ao gravar as métricas em {self.path}: {e}")
+
+
+class StartupProfile:
+    """Tempos das etapas da abertura do programa.
+
+    As etapas podem ser medidas em qualquer thread (a conexão roda em segundo
+    plano) e são contadas a partir de ``origin``, o início da importação do
+    ``main.py``. O tempo do próprio interpretador antes disso fica de fora; para
+    o detalhe de cada módulo, use ``python -X importtime main.py``.
+
+    Args:
+        origin (float): instante inicial (time.perf_counter); agora se omitido
+    """
+    def __init__(self, origin=None):
+        self.origin = time.perf_counter() if origin is None else origin
+        self.phases = []
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        """Mede o bloco ``with`` como uma etapa."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._add(name, start, time.perf_counter())
+
+    def mark(self, name):
+        """Registra um instante (etapa sem duração), ex.: a janela pronta."""
+        now = time.perf_counter()
+        self._add(name, now, now)
+
+    def _add(self, name, start, end):
+        with self.lock:
+            self.phases.append({
+                'name': name,
+                'thread': threading.current_thread().name,
+                'start_ms': round((start - self.origin) * 1000, 1),
+                'duration_ms': round((end - start) * 1000, 1),
+            })
+
+    def snapshot(self):
+        with self.lock:
+            return sorted(self.phases, key=lambda phase: phase['start_ms'] + phase['duration_ms'])
+
+    def report(self):
+        """Resumo em texto, uma linha por etapa na ordem em que terminaram."""
+        lines = ["Abertura do programa (ms desde o início do main.py):"]
+        for phase in self.snapshot():
+            end = phase['start_ms'] + phase['duration_ms']
+            duration = f" ({phase['duration_ms']:.0f} ms)" if phase['duration_ms'] else ""
+            lines.append(f"  {end:8.0f}  {phase['name']}{duration} [{phase['thread']}]")
+        return '\n'.join(lines)
+
+    def save(self, path=STARTUP_PROFILE_PATH):
+        try:
+            directory = os.path.dirname(os.path.abspath(path))
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.startup-', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as output:
+                json.dump({'timestamp': time.time(), 'phases': self.snapshot()}, output, indent=2, ensure_ascii=False)
+            os.replace(temp_path, path)
+        except OSError as e:
+            log.error(f"Erro ao gravar os tempos da abertura em {path}: {e}")
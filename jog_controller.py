@@ -0,0 +1,395 @@
+"""Movimento manual da montagem pelos botões da janela, pelo teclado e por controle de jogo.
+
+Teclado (com a tela principal aberta e o foco fora dos campos de texto)::
+
+    setas ou W A S D    move para N, O, S e L, como os botões da janela
+    Esc                 PARE
+
+Controle de jogo (Linux, com o pacote opcional ``evdev``): o analógico esquerdo
+move com velocidade proporcional à inclinação, o direcional move como as setas
+e o botão A (BTN_SOUTH) é o PARE.
+"""
+import math
+import re
+import select
+import threading
+from tkinter import messagebox
+import logandprint as log
+
+# Direção -> (eixo do MoveAxis, sentido), antes da inversão configurada em [AXIS]
+DIRECTIONS = {'N': (1, 1), 'S': (1, -1), 'E': (0, -1), 'W': (0, 1)}
+
+# Teclas (keysym do Tk) -> direção; as setas seguem a posição dos botões na janela (L à direita)
+KEYS = {'Up': 'N', 'Down': 'S', 'Right': 'E', 'Left': 'W', 'w': 'N', 's': 'S', 'd': 'E', 'a': 'W'}
+
+# Campos em que as setas e letras são do próprio campo
+TEXT_WIDGETS = ('Entry', 'TEntry', 'Text', 'TCombobox', 'Spinbox', 'TSpinbox', 'Listbox')
+
+# Velocidades da combobox que não são números (graus/s)
+SIDEREAL_RATES = {
+    '0.5 x sideral': 0.000739,
+    '1 x sideral': 0.001478,
+    '2 x sideral': 0.002956,
+}
+
+
+def rate_value(text):
+    """Velocidade em graus/s de um item da combobox de velocidade de movimento."""
+    return SIDEREAL_RATES[text] if text in SIDEREAL_RATES else float(text)
+
+
+class JogController:
+    """Movimento manual com no máximo um ``MoveAxis`` por eixo a cada mudança.
+
+    Botões, teclas e controle de jogo só informam quais direções estão
+    pressionadas (ou quanto o analógico está inclinado). A taxa de cada eixo é
+    recalculada a partir desse estado e só vai para a montagem quando muda: a
+    repetição automática do teclado e o fluxo de eventos do analógico não geram
+    tráfego na serial, e soltar uma direção para só o eixo dela.
+
+    Segurando uma tecla ou o direcional do controle, a velocidade sobe um degrau
+    das velocidades de movimento a cada ``ramp_interval`` segundos (seção
+    ``[JOG]``), a partir da velocidade escolhida na janela. Os botões da janela
+    usam sempre a velocidade escolhida, e o analógico escolhe o degrau pela
+    inclinação.
+
+    Roda na thread do Tk; o controle de jogo é lido pelo :class:`GamepadReader`
+    numa thread própria, que só guarda o último estado, consultado aqui a cada
+    ``GAMEPAD_POLL`` ms.
+
+    Args:
+        controller (Controller): controlador principal
+    """
+    # O autorepeat do X11 manda soltar+apertar; o soltar só vale se não vier outro apertar logo depois
+    RELEASE_DELAY = 40
+    GAMEPAD_POLL = 50
+    DEADZONE = 0.15
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.root = controller.root
+        self.ramp_interval = max(0.1, controller.config.get_float('JOG', 'ramp_interval', 1.5))
+        # Direção pressionada -> origem ('button', 'keyboard' ou 'gamepad')
+        self.held = {}
+        # Direção -> after do soltar adiado
+        self.releases = {}
+        # Inclinação do analógico por eixo, de -1 a 1, no sentido de DIRECTIONS
+        self.analog = [0.0, 0.0]
+        # Última taxa enviada a cada eixo
+        self.sent = [0.0, 0.0]
+        self.active = False
+        # Lidos uma vez no início de cada movimento
+        self.rates = []
+        self.level = 0
+        self.invert = (False, False)
+        self.ramp_job = None
+        self.gamepad = None
+        self.gamepad_version = 0
+
+    # ======= Entradas
+
+    def press(self, directions, source='button'):
+        """Direções (ex.: ``'N'``, ``'NW'``) pressionadas."""
+        if all(direction in self.held and direction not in self.releases for direction in directions):
+            # Repetição automática da tecla: nada mudou
+            return
+        for direction in directions:
+            job = self.releases.pop(direction, None)
+            if job is not None:
+                self.root.after_cancel(job)
+            self.held.setdefault(direction, source)
+        self.apply()
+
+    def release(self, directions, delay=False):
+        """Direções soltas; só o eixo delas para."""
+        for direction in directions:
+            if direction not in self.held:
+                continue
+            if not delay:
+                self.held.pop(direction)
+            elif direction not in self.releases:
+                self.releases[direction] = self.root.after(self.RELEASE_DELAY, self._released, direction)
+        if not delay:
+            self.apply()
+
+    def _released(self, direction):
+        self.releases.pop(direction, None)
+        self.held.pop(direction, None)
+        self.apply()
+
+    def bind_keys(self, root):
+        root.bind('<KeyPress>', self.key_press, add='+')
+        root.bind('<KeyRelease>', self.key_release, add='+')
+        # Sem o foco a janela não recebe o soltar da tecla: para o que estava vindo do teclado
+        root.bind('<FocusOut>', self.focus_out, add='+')
+
+    def key_direction(self, event):
+        widget_class = event.widget.winfo_class() if hasattr(event.widget, 'winfo_class') else ''
+        if widget_class in TEXT_WIDGETS or not self.controller.frmMain.winfo_ismapped():
+            return None
+        return KEYS.get(event.keysym if len(event.keysym) > 1 else event.keysym.lower())
+
+    def key_press(self, event):
+        if event.keysym == 'Escape' and self.controller.frmMain.winfo_ismapped():
+            self.controller.stop()
+            return 'break'
+        direction = self.key_direction(event)
+        if direction is not None:
+            self.press(direction, 'keyboard')
+            return 'break'
+
+    def key_release(self, event):
+        direction = self.key_direction(event)
+        if direction is not None:
+            self.release(direction, delay=True)
+            return 'break'
+
+    def focus_out(self, event):
+        if event.widget is self.root:
+            self.release([direction for direction, source in self.held.items() if source == 'keyboard'])
+
+    # ======= Taxas
+
+    def begin(self):
+        """Início de um movimento: velocidades, inversão dos eixos e estado da montagem."""
+        controller = self.controller
+        self.rates = sorted(rate_value(value) for value in controller.comboSpeed.cget('values'))
+        selected = float(controller.axis_rate.get())
+        # Degrau mais próximo da velocidade escolhida na janela
+        self.level = min(range(len(self.rates)), key=lambda i: abs(self.rates[i] - selected))
+        self.rates[self.level] = selected
+        self.invert = (controller.config.get_bool('AXIS', 'invert_ew'), controller.config.get_bool('AXIS', 'invert_ns'))
+        controller.unpark()
+        controller.manual_slew = True
+        controller.thread_update_values.wake()
+        self.active = True
+
+    def axis_rate(self, axis):
+        """Taxa, em graus/s, que o eixo deve ter no estado atual das entradas."""
+        sign = sum(direction_sign for direction, (direction_axis, direction_sign) in DIRECTIONS.items()
+                   if direction_axis == axis and direction in self.held)
+        if sign:
+            rate = sign * self.rates[self.level]
+        else:
+            value = self.analog[axis]
+            if abs(value) <= self.DEADZONE:
+                return 0.0
+            # Degraus pela inclinação, do mais lento ao mais rápido
+            span = (abs(value) - self.DEADZONE) / (1 - self.DEADZONE)
+            rate = math.copysign(self.rates[min(len(self.rates) - 1, int(span * len(self.rates)))], value)
+        return -rate if self.invert[axis] else rate
+
+    def apply(self):
+        """Envia o MoveAxis dos eixos cuja taxa mudou."""
+        moving = bool(self.held) or any(abs(value) > self.DEADZONE for value in self.analog)
+        if not moving and not self.active:
+            return
+        if not self.controller.require_telescope():
+            self.clear()
+            return
+        try:
+            if moving and not self.active:
+                self.begin()
+            for axis in (0, 1):
+                rate = self.axis_rate(axis) if moving else 0.0
+                if rate != self.sent[axis]:
+                    log.debug(f"Movimento manual: eixo {axis} a {rate} graus/s")
+                    self.controller.move_axis(axis, rate)
+                    self.sent[axis] = rate
+        except Exception as e:
+            self.fail(e)
+            return
+        if not moving:
+            self.end()
+        else:
+            self.schedule_ramp()
+
+    def schedule_ramp(self):
+        ramping = any(source != 'button' for source in self.held.values())
+        if ramping and self.ramp_job is None and self.level < len(self.rates) - 1:
+            self.ramp_job = self.root.after(int(self.ramp_interval * 1000), self.ramp)
+        elif not ramping and self.ramp_job is not None:
+            self.root.after_cancel(self.ramp_job)
+            self.ramp_job = None
+
+    def ramp(self):
+        self.ramp_job = None
+        self.level = min(self.level + 1, len(self.rates) - 1)
+        self.apply()
+
+    def end(self):
+        self.active = False
+        self.controller.manual_slew = False
+        if self.ramp_job is not None:
+            self.root.after_cancel(self.ramp_job)
+            self.ramp_job = None
+
+    def clear(self):
+        """Esquece as entradas pressionadas, sem falar com a montagem."""
+        for job in self.releases.values():
+            self.root.after_cancel(job)
+        self.releases.clear()
+        self.held.clear()
+        self.analog = [0.0, 0.0]
+        self.sent = [0.0, 0.0]
+        self.end()
+
+    def reset(self):
+        """A montagem foi parada (PARE): o movimento manual recomeça do zero."""
+        self.clear()
+
+    def fail(self, error):
+        error_message = str(error)
+        match = re.search(r'SlewError: (.+)', error_message)
+        error_reason = match.group(1) if match else error_message
+        log.error(f"Erro no movimento manual: {error_reason}")
+        # O outro eixo pode já estar em movimento: sem o estado, soltar o botão não o pararia
+        for axis in (0, 1):
+            if self.sent[axis]:
+                try:
+                    self.controller.move_axis(axis, 0)
+                except Exception as e:
+                    log.error(f"Não foi possível parar o eixo {axis}: {e}")
+        self.clear()
+        messagebox.showerror("Erro", f"Erro no movimento manual: {error_reason}")
+        self.root.focus_set()
+
+    # ======= Controle de jogo
+
+    def start_gamepad(self):
+        """Começa a ler o controle de jogo, se houver um e o ``evdev`` estiver instalado."""
+        if self.gamepad is not None or not self.controller.config.get_bool('JOG', 'gamepad', True):
+            return
+        device = GamepadReader.find(self.controller.config.get('JOG', 'gamepad_device'))
+        if device is None:
+            return
+        self.gamepad = GamepadReader(device)
+        self.gamepad.start()
+        self.root.after(self.GAMEPAD_POLL, self.poll_gamepad)
+
+    def stop_gamepad(self):
+        if self.gamepad is not None:
+            self.gamepad.stop()
+            self.gamepad = None
+
+    def poll_gamepad(self):
+        gamepad = self.gamepad
+        if gamepad is None:
+            return
+        version, stick, hat, stop = gamepad.state()
+        if version != self.gamepad_version:
+            # Só o último estado importa: os eventos entre duas consultas já foram resumidos nele
+            self.gamepad_version = version
+            if stop:
+                self.controller.stop()
+            else:
+                self.analog = stick
+                pressed = {direction for direction, on in (('W', hat[0] < 0), ('E', hat[0] > 0), ('N', hat[1] > 0), ('S', hat[1] < 0)) if on}
+                released = [direction for direction, source in self.held.items()
+                            if source == 'gamepad' and direction not in pressed]
+                for direction in released:
+                    self.held.pop(direction)
+                for direction in pressed:
+                    self.held.setdefault(direction, 'gamepad')
+                self.apply()
+        if gamepad.is_alive():
+            self.root.after(self.GAMEPAD_POLL, self.poll_gamepad)
+        else:
+            self.gamepad = None
+
+
+class GamepadReader(threading.Thread):
+    """Lê um controle de jogo pelo ``evdev`` e guarda só o último estado.
+
+    Args:
+        device (evdev.InputDevice): controle aberto
+    """
+    def __init__(self, device):
+        super().__init__(name='GamepadReader', daemon=True)
+        self.device = device
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.version = 0
+        self.stick = [0.0, 0.0]
+        self.hat = [0, 0]
+        self.stop_pressed = False
+        from evdev import ecodes
+        self.ecodes = ecodes
+        # Faixa de cada eixo analógico, para normalizar de -1 a 1
+        self.ranges = {}
+        for code in (ecodes.ABS_X, ecodes.ABS_Y):
+            info = device.absinfo(code)
+            self.ranges[code] = ((info.min + info.max) / 2, (info.max - info.min) / 2 or 1)
+
+    @staticmethod
+    def find(path=None):
+        """Abre o controle em ``path`` ou o primeiro dispositivo com analógico.
+
+        Returns:
+            evdev.InputDevice: controle, ou None se não há controle ou o ``evdev`` não está instalado
+        """
+        try:
+            import evdev
+        except ImportError:  # opcional: controle de jogo só no Linux, com o pacote evdev
+            return None
+        try:
+            paths = [path] if path else evdev.list_devices()
+            for device_path in paths:
+                device = evdev.InputDevice(device_path)
+                axes = [code for code, _ in device.capabilities().get(evdev.ecodes.EV_ABS, [])]
+                if evdev.ecodes.ABS_X in axes and evdev.ecodes.ABS_Y in axes:
+                    log.debug(f"Controle de jogo: {device.name} ({device.path})")
+                    return device
+                device.close()
+        except OSError as e:
+            log.warning(f"Não foi possível abrir o controle de jogo: {e}")
+        return None
+
+    def run(self):
+        try:
+            while not self.stop_event.is_set():
+                if not select.select([self.device.fd], [], [], 0.5)[0]:
+                    continue
+                for event in self.device.read():
+                    self.handle(event)
+        except OSError as e:
+            log.warning(f"Controle de jogo desconectado: {e}")
+            with self.lock:
+                # Solta tudo, para a montagem não continuar andando
+                self.stick, self.hat = [0.0, 0.0], [0, 0]
+                self.version += 1
+        finally:
+            try:
+                self.device.close()
+            except OSError:
+                pass
+
+    def handle(self, event):
+        ecodes = self.ecodes
+        with self.lock:
+            if event.type == ecodes.EV_ABS and event.code in self.ranges:
+                center, half = self.ranges[event.code]
+                value = max(-1.0, min(1.0, (event.value - center) / half))
+                # Para a direita é L (sentido negativo do eixo 0); para cima (valor negativo) é N
+                if event.code == ecodes.ABS_X:
+                    self.stick[0] = -value
+                else:
+                    self.stick[1] = -value
+            elif event.type == ecodes.EV_ABS and event.code in (ecodes.ABS_HAT0X, ecodes.ABS_HAT0Y):
+                if event.code == ecodes.ABS_HAT0X:
+                    self.hat[0] = event.value
+                else:
+                    self.hat[1] = -event.value
+            elif event.type == ecodes.EV_KEY and event.code == ecodes.BTN_SOUTH:
+                self.stop_pressed = event.value == 1
+            else:
+                return
+            self.version += 1
+
+    def state(self):
+        """(versão, analógico, direcional, PARE pressionado) mais recentes."""
+        with self.lock:
+            return self.version, list(self.stick), tuple(self.hat), self.stop_pressed
+
+    def stop(self):
+        self.stop_event.set()
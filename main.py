@@ -1,24 +1,28 @@
-from frame_config import frmConfig
-from frame_goto import frmGoto
-from thread_update_values import UpdateValues
+import time
+STARTED = time.perf_counter()
+import sys
+import threading
+from concurrent.futures import Future
 import tkinter as tk
 from tkinter import ttk
-from tkinter import font
+from tkinter import messagebox
+from tkinter import simpledialog
 import logandprint as log
 from tooltip import ToolTip
-import win32com.client
-from tkinter import messagebox
-import configparser
-import os
-import sys
-from alpaca.telescope import *      # Multiple Classes including Enumerations
-from alpaca.exceptions import *
-import re
+from config_store import ConfigStore
+from instrumentation import Metrics, MetricsDumper, StartupProfile
+from jog_controller import JogController, rate_value
+from motion_estimator import MotionEstimator
+from mount_core import MountCore, MountError
+# Os módulos pesados (alpaca, requests, win32com, numpy, ephem) e as telas de Goto e
+# Configurações são importados no primeiro uso, para a janela abrir sem esperar por eles
 params = sys.argv
 if '--debug' in params:
     log.debugMode(True)
 else:
     log.enable(False)
+# Tempos da abertura, contados a partir daqui; relatório com --profile-startup
+startup = StartupProfile(STARTED)
 
 class Controller:
     """
@@ -40,27 +44,20 @@ class Controller:
         self.version = '1.0.1'
 
         # Configurações iniciais - Arquivo config.ini que tem as configurações de ip, porta e cache
-        self.cache = self.get_config('COMMUNICATION', 'cache') or 0.5
+        self.config = ConfigStore('config.ini')
+        self.cache = self.config.get_float('COMMUNICATION', 'cache', 0.5)
 
-        # Depois de criada a janela, verifica se o telescópio está conectado
-        self.device_id = None
-        driver = self.get_config('COMMUNICATION', 'driver')
-        if driver:
-            try:
-                self.device_id = driver
-                self.Telescope = win32com.client.Dispatch(driver)
-                self.Telescope.Connected = True
-                self.unpark()
-            except Exception as e:
-                log.error(f"Erro ao conectar com o telescópio: {e}")
-                messagebox.showerror("Erro", f"Erro ao conectar com o telescópio: {e}")
-                self.del_config('COMMUNICATION', 'driver')
-                self.Telescope = None
-                self.open_ascom_chooser()
-        else:
-            self.open_ascom_chooser()
+        # Métricas dos acessos ao driver e da thread de atualização (só com --debug ou --metrics)
+        self.metrics = Metrics() if '--debug' in params or '--metrics' in params else None
+        self.metrics_dumper = None
+        if self.metrics:
+            self.metrics_dumper = MetricsDumper(self.metrics, self.config.get_float('DEBUG', 'metrics_interval', 60.0))
+            self.metrics_dumper.start()
 
-        # self.telescope_properties()
+        # Montagem e comandos, sem interface gráfica (os mesmos da linha de comando).
+        # O backend é definido na conexão em segundo plano, que importa o telescope_backend
+        self.mount = MountCore(self.config, self.metrics)
+        self.connecting = True
 
         self.window_width = window_width
         self.window_height = window_height
@@ -97,17 +94,16 @@ class Controller:
 
 
         # ======= Frame principal
-        self.frmMain = tk.Frame(self.root)
-        self.create_frmMain()
-        self.frmMain.pack(fill='both', expand=True)
-
-
-        # ======== frmConfig
-        self.frmConfig = frmConfig(self)
-
-        # ======== frmGoto
+        with startup.phase('tela principal'):
+            self.frmMain = tk.Frame(self.root)
+            self.create_frmMain()
+            self.frmMain.pack(fill='both', expand=True)
+
+        # As telas de Configurações e Goto são criadas na primeira vez em que forem abertas
+        self.frmConfig = None
+        self.frmGoto = None
         self.gotoInProgress = False
-        self.frmGoto = frmGoto(self)
+        self.goto_started = 0.0
 
         self.root.update_idletasks()
         icon = '_internal/icon.ico'
@@ -115,11 +111,139 @@ class Controller:
 
         self.manual_slew = False
         self.going_home = False
+        # Movimento manual pelos botões, teclado e controle de jogo
+        self.jog = JogController(self)
+        self.jog.bind_keys(self.root)
+        # Estimativa da posição entre as leituras, para a exibição andar suavemente
+        self.motion = MotionEstimator() if self.config.get_bool('DISPLAY', 'interpolate', True) else None
+
+        # Leituras da montagem e telemetria: criadas quando a montagem conectar (start_polling)
+        self.telemetry = None
+        self.snapshot_hub = None
+        self.telemetry_server = None
+        self.thread_update_values = None
+        self.ui_updater = None
+
+        self.root.after_idle(startup.mark, 'janela pronta')
+        self.start_connection()
+
+    def start_connection(self):
+        """Conecta a montagem em segundo plano, com a janela já aberta no estado "conectando"."""
+        self.statusMoviment.set("Conectando à montagem...")
+        future = Future()
+        threading.Thread(target=self.load_backend, args=(future,), name='Connect', daemon=True).start()
+        self.check_connection(future)
+
+    def load_backend(self, future):
+        """Roda fora da thread do Tk: importa os módulos pesados e conecta a montagem.
+
+        O objeto COM do ASCOM é criado depois, na thread do Tk (:meth:`check_connection`),
+        como antes; o Alpaca e o simulador conectam aqui mesmo.
+        """
+        try:
+            with startup.phase('importação do backend e modelo de apontamento'):
+                from telescope_backend import BACKEND_ASCOM
+                import thread_update_values, ui_updater, telemetry
+                self.mount.load()
+            # A tela de Goto é a mais pesada de importar: já fica pronta para o primeiro clique
+            with startup.phase('importação da tela de Goto'):
+                import frame_goto
+            if self.device_id and self.backend != BACKEND_ASCOM:
+                with startup.phase('conexão com a montagem'):
+                    self.connect_telescope(self.device_id)
+            future.set_result(None)
+        except Exception as e:
+            future.set_exception(e)
+
+    def check_connection(self, future, interval=50):
+        """Acompanha a conexão em segundo plano e, terminada, começa as leituras."""
+        if not future.done():
+            self.root.after(interval, self.check_connection, future, interval)
+            return
+        self.connecting = False
+        try:
+            future.result()
+            if self.device_id and self.Telescope is None:
+                with startup.phase('conexão com a montagem'):
+                    self.connect_telescope(self.device_id)
+        except Exception as e:
+            log.error(f"Erro ao conectar com o telescópio: {e}")
+            messagebox.showerror("Erro", f"Erro ao conectar com o telescópio: {e}")
+            self.del_config('COMMUNICATION', 'driver')
+            self.mount.telescope = None
+            self.mount.capabilities = None
+        startup.mark('conexão concluída')
+        self.report_startup()
+        if self.Telescope is not None:
+            self.start_polling()
+        else:
+            self.statusMoviment.set("Montagem desconectada")
+            if self.backend is not None:
+                self.open_ascom_chooser()
 
-        self.thread_update_values = UpdateValues(self)
-        self.thread_update_values.daemon = True # Define a thread como daemon para que ela termine quando o programa principal terminar
+    # A janela só exibe o estado: a montagem fica no MountCore
+    @property
+    def Telescope(self):
+        return self.mount.telescope
+
+    @property
+    def capabilities(self):
+        return self.mount.capabilities
+
+    @property
+    def pointing(self):
+        return self.mount.pointing
+
+    @property
+    def backend(self):
+        return self.mount.backend
+
+    @property
+    def device_id(self):
+        return self.mount.device_id
+
+    def start_polling(self):
+        """Começa as leituras da montagem depois da primeira conexão."""
+        self.comboSpeed.config(values=self.get_possible_rates())
+        if self.thread_update_values is not None:
+            return
+        from telemetry import TelemetryRecorder
+        from telemetry_server import SnapshotHub, TelemetryServer
+        from thread_update_values import UpdateValues
+        from ui_updater import UiUpdater
+
+        # Registro das leituras da montagem (buffer em memória + arquivo da sessão)
+        self.telemetry = TelemetryRecorder.for_session(self.config)
+
+        # Outros programas recebem as mesmas leituras pelo servidor local, sem consultar a montagem
+        self.snapshot_hub = SnapshotHub()
+        self.telemetry_server = TelemetryServer.for_config(self.config, self.snapshot_hub)
+        if self.telemetry_server:
+            self.telemetry_server.start()
+
+        self.thread_update_values = UpdateValues(self) # Thread daemon: termina junto com o programa principal
         self.thread_update_values.start()
 
+        # Os widgets só são atualizados na thread do Tk, a partir da fila da thread de atualização
+        self.ui_updater = UiUpdater(self, self.thread_update_values.updates, motion=self.motion)
+        self.ui_updater.start()
+
+        # Controle de jogo (opcional, Linux com evdev): só depois que a montagem conectou
+        self.jog.start_gamepad()
+
+        if self.metrics and '--debug' in params:
+            from frame_metrics import frmMetrics
+            self.frmMetrics = frmMetrics(self, self.metrics)
+
+    def report_startup(self):
+        """Mostra e grava os tempos da abertura (somente com --profile-startup)."""
+        if '--profile-startup' not in params:
+            return
+        report = startup.report()
+        print(report)
+        log.debug(report)
+        startup.save()
+
     def create_frmMain(self):
         # Label com o título da janela
         lblTitulo = ttk.Label(self.frmMain, text=self.title, font=("Segoe UI", 10, "bold"))
@@ -227,6 +351,15 @@ class Controller:
         self.entry_az = ttk.Entry(frmPos, textvariable=self.az, state="readonly", style="Pos.TEntry").grid(row=2, column=1, padx=2, pady=2)
         self.entry_alt = ttk.Entry(frmPos, textvariable=self.alt, state="readonly", style="Pos.TEntry").grid(row=3, column=1, padx=2, pady=2)
 
+        # Objetos do catálogo perto do apontamento e estrela de alinhamento mais próxima
+        self.nearby = tk.StringVar()
+        self.alignment_star = tk.StringVar()
+        tk.Label(frmPos, text="Perto", font=("Arial", 8)).grid(row=4, column=0, sticky="e")
+        tk.Label(frmPos, textvariable=self.nearby, font=("Arial", 8), anchor="w", width=24, wraplength=170, justify="left").grid(row=4, column=1, sticky="w", padx=2)
+        tk.Label(frmPos, text="Estrela", font=("Arial", 8)).grid(row=5, column=0, sticky="e")
+        tk.Label(frmPos, textvariable=self.alignment_star, font=("Arial", 8), anchor="w", width=24).grid(row=5, column=1, sticky="w", padx=2)
+        ToolTip(frmPos, "Perto: objetos do catálogo a até 2° do apontamento\nEstrela: estrela de alinhamento mais próxima", width=30)
+
         self.btnFindHome = ttk.Button(frmBottom, text=u"\u2302 Go to Home", command=self.find_home, width=15)
         self.btnFindHome.grid(row=0, column=1, padx=10, pady=2)
 
@@ -269,63 +402,46 @@ class Controller:
         canvas.create_text(width / 2, height / 2, text="PARE", fill="white", font=("Helvetica", 9, "bold"))
 
 
+    def require_telescope(self):
+        """Avisa o usuário e retorna False enquanto a montagem não estiver conectada."""
+        if self.thread_update_values is not None:
+            return True
+        if self.connecting:
+            messagebox.showinfo("Atenção", "Aguarde a conexão com a montagem")
+        else:
+            messagebox.showwarning("Atenção", "Nenhuma montagem conectada. Escolha o driver do telescópio em Config.")
+        self.root.focus_set()
+        return False
+
     def start_movement(self, direcao):
         # Função chamada quando um botão de movimento é pressionado
-        try:
-            self.unpark()
-            rate = float(self.axis_rate.get())
-            self.manual_slew = True
-            log.debug(f"Iniciando movimento para {direcao}")
-            invert_ns = self.get_config('AXIS', 'invert_ns') == 'True'
-            invert_ew = self.get_config('AXIS', 'invert_ew') == 'True'
-            if 'N' in direcao:
-                self.Telescope.MoveAxis(1, -rate if invert_ns else rate)
-            if 'S' in direcao:
-                self.Telescope.MoveAxis(1, rate if invert_ns else -rate)
-            if 'E' in direcao:
-                self.Telescope.MoveAxis(0, rate if invert_ew else -rate)
-            if 'W' in direcao:
-                self.Telescope.MoveAxis(0, -rate if invert_ew else rate)
-            self.root.focus_set()
-        except Exception as e:
-            error_message = str(e)
-            match = re.search(r'SlewError: (.+)', error_message)
-            if match:
-                error_reason = match.group(1)
-            else:
-                error_reason = error_message
-            log.error(f"Erro ao iniciar movimento: {error_reason}")
-            messagebox.showerror("Erro", f"Erro ao iniciar movimento: {error_reason}")
-            self.manual_slew = False
-            self.root.focus_set()
-
+        self.jog.press(direcao)
+        self.root.focus_set()
 
     def stop_movement(self, direcao):
-        # Função chamada quando um botão de moviment é solto
-        log.debug(f"Parando movimento para {direcao}")
-        if 'N' or 'S' in direcao:
-            self.Telescope.MoveAxis(1, 0)
-        if 'E' or 'W' in direcao:
-            self.Telescope.MoveAxis(0, 0)
+        # Função chamada quando um botão de movimento é solto: para só o(s) eixo(s) da direção
+        self.jog.release(direcao)
         self.root.focus_set()
-        self.manual_slew = False
+
+    def move_axis(self, axis, rate):
+        """Move um eixo da montagem, avisando o estimador da posição exibida."""
+        self.mount.move_axis(axis, rate)
+        if self.motion:
+            self.motion.command(axis, rate)
 
     def stop(self):
+        if not self.require_telescope():
+            return
         log.debug("Parando movimento")
-        self.Telescope.AbortSlew()
+        self.mount.abort()
+        self.jog.reset()
+        if self.motion:
+            self.motion.stop()
         self.root.focus_set()
 
     def set_axis_rate(self, rate):
         """Atualiza a taxa de movimento da montagem."""
-        if rate == '0.5 x sideral':
-            rate = 0.000739
-        elif rate == '1 x sideral':
-            rate = 0.001478
-        elif rate == '2 x sideral':
-            rate = 0.002956
-        else:
-            rate = float(rate)
-        self.axis_rate.set(rate)
+        self.axis_rate.set(rate_value(rate))
         self.root.focus_set()
 
     def get_possible_rates(self):
@@ -335,13 +451,17 @@ class Controller:
         rates.append('1 x sideral') # 0.001478
         rates.append('2 x sideral') # 0.002956
         try:
-            rate = self.Telescope.AxisRates(0)[0]
-            log.debug(f'Taxa mínima: {rate.Minimum}, Taxa máxima: {rate.Maximum}')
+            if self.capabilities is None:
+                # Ainda conectando: as taxas do driver entram quando a montagem conectar
+                raise LookupError("montagem não conectada")
+            minimum, maximum = self.capabilities.axis_rates[0]
+            log.debug(f'Taxa mínima: {minimum}, Taxa máxima: {maximum}')
             for i in range(1, 10):
-                tax = round((rate.Minimum + ((rate.Maximum - rate.Minimum) / 9) * i) - 0.01, 2)
+                tax = round((minimum + ((maximum - minimum) / 9) * i) - 0.01, 2)
                 rates.append(str(tax))
         except Exception as e:
-            log.error(f"Erro ao obter as taxas de movimento: {e}")
+            if self.capabilities is not None:
+                log.error(f"Erro ao obter as taxas de movimento: {e}")
             rates.append(str(0.100000))
             rates.append(str(0.250000))
             rates.append(str(0.500000))
@@ -353,54 +473,36 @@ class Controller:
 
     def set_tracking(self, tracking):
         """Atualiza a taxa de rastreamento da montagem."""
+        if not self.require_telescope():
+            self.tracking_rate.set('Off')
+            return
         log.debug(f"Alterando rastreamento para {tracking}")
-        if tracking == 'Off':
-            self.Telescope.Tracking = False
-        elif tracking == 'Sideral':
-            self.Telescope.TrackingRate = 0
-            self.Telescope.Tracking = True
-        elif tracking == 'Lunar':
-            self.Telescope.TrackingRate = 1
-            self.Telescope.Tracking = True
-        elif tracking == 'Solar':
-            self.Telescope.TrackingRate = 2
-            self.Telescope.Tracking = True
-        elif tracking == 'King rate':
-            self.Telescope.TrackingRate = 3
-            self.Telescope.Tracking = True
+        self.mount.set_tracking(tracking)
         self.tracking_rate.set(tracking)
+        # A combobox foi alterada pelo usuário: a próxima leitura deve sobrescrevê-la mesmo que a montagem não tenha mudado
+        self.ui_updater.invalidate('tracking_rate')
         log.debug(f"Rastreamento alterado para {self.Telescope.TrackingRate}")
         self.root.focus_set()
 
     def unpark(self):
-        if self.Telescope.AtPark:
-            if self.Telescope.CanUnpark:
-                self.Telescope.Unpark()
-                log.debug('Desparkeado')
-            else:
-                log.debug('Não é possível desparkear')
-        else:
-            log.debug('Já desparkeado')
+        self.mount.unpark()
 
     def park(self):
-        if self.Telescope.CanPark:
-            try:
-                self.Telescope.Park()
-                log.debug('Parkeado')
-            except Exception as e:
-                messagebox.showwarning("Atenção", "Em algumas montagens, após o parkeamento, a montagem é desconectada do Windows. Reconexão do cabo USB pode ser necessária. Para evitar esse tipo de problema, evite fazer o parkeamento da montagem usando esse programa.")
-        else:
-            log.debug('Não é possível parkear')
+        try:
+            self.mount.park()
+        except MountError as e:
+            log.debug(str(e))
+        except Exception as e:
+            messagebox.showwarning("Atenção", "Em algumas montagens, após o parkeamento, a montagem é desconectada do Windows. Reconexão do cabo USB pode ser necessária. Para evitar esse tipo de problema, evite fazer o parkeamento da montagem usando esse programa.")
 
 
     def find_home(self):
+        if not self.require_telescope():
+            return
         try:
-            self.unpark()
             self.going_home = True
-            log.debug('Enviando comando de home')
-            if self.Telescope.CanFindHome:
-                self.Telescope.FindHome()
-            log.debug('Terminou o comando de home')
+            self.thread_update_values.wake()
+            self.mount.find_home()
         except Exception as e:
             error_message = 'Houve um problema ao enviar o comando de home: ' + str(e)
             log.error(error_message)
@@ -410,46 +512,61 @@ class Controller:
     def close(self):
         try:
             log.debug('Inicializando fechamento')
-            if self.Telescope.Slewing or self.Telescope.Tracking:
+            if self.Telescope is not None and (self.Telescope.Slewing or self.Telescope.Tracking):
                 ask = messagebox.askyesno("Atenção", "A montagem está em movimento/rastreando. Deseja sair mesmo assim?")
                 if not ask:
                     log.debug('Fechamento cancelado')
                     return
-            self.thread_update_values.join()
-            self.thread_update_values.stop()
-            self.Telescope.Connected = False
+            # Pede para a thread de atualização parar e espera o ciclo atual terminar
+            if self.thread_update_values is not None:
+                self.ui_updater.stop()
+                self.thread_update_values.stop()
+                self.thread_update_values.join(timeout=float(self.cache) + 5)
+            self.jog.stop_gamepad()
+            if self.mount.connected:
+                self.mount.disconnect()
+            if self.telemetry_server:
+                self.telemetry_server.stop()
+            if self.telemetry:
+                self.telemetry.close()
+            self.stop_metrics()
+            self.config.flush()
             self.root.destroy()
             log.debug('Fechou corretamente')
             sys.exit()
         except Exception as e:
             log.error(f"Erro ao fechar o programa: {e}")
+            if self.telemetry_server:
+                self.telemetry_server.stop()
+            if self.telemetry:
+                self.telemetry.close()
+            self.stop_metrics()
+            self.config.flush()
             self.root.destroy()
             sys.exit()
 
+    def stop_metrics(self):
+        """Para a gravação periódica das métricas, gravando uma última vez."""
+        if self.metrics_dumper:
+            self.metrics_dumper.stop()
+            self.metrics_dumper.dump()
+
     def open_ascom_chooser(self):
         try:
-            # Cria uma instância do ASCOM Chooser
-            chooser = win32com.client.Dispatch("ASCOM.Utilities.Chooser")
-
-            # Abre a caixa de diálogo de seleção de dispositivos ASCOM
-            device_id = chooser.Choose("Telescope")
+            device_id = self.choose_device()
 
             # Verifica se um dispositivo foi selecionado
             if device_id:
                 # verifica se já existe o self.Telescope, se sim, desconecta
-                if hasattr(self, 'Telescope'):
+                if self.mount.connected:
                     log.debug(f'Montagem conectado: {self.Telescope} Desconectando...')
-                    self.Telescope.Connected = False
+                    self.mount.disconnect(close_sessions=False)
 
-                self.device_id = device_id
                 # Cria uma instância do dispositivo selecionado
-                self.Telescope = win32com.client.Dispatch(device_id)
-                self.Telescope.Connected = True
-                self.unpark()
+                self.connect_telescope(device_id)
                 log.debug(f'Conexão realizada com sucesso com driver {device_id}')
-                # verifica se já existe o self.comboSpeed, se sim, atualiza os valores
-                if hasattr(self, 'comboSpeed'):
-                    self.comboSpeed.config(values=self.get_possible_rates())
+                # Atualiza as velocidades e começa as leituras, se ainda não começaram
+                self.start_polling()
                 try:
                     self.frmConfig.entryTelescope.config(state="normal")
                     self.frmConfig.entryTelescope.delete(0, tk.END)
@@ -459,7 +576,7 @@ class Controller:
                     pass
 
                 # verifica se a classe frmConfig já foi criada e atualiza o campo entry self.telescope_entry
-                if hasattr(self, 'frmConfig'):
+                if self.frmConfig is not None:
                     self.frmConfig.telescope_entry.config(state="normal")
                     self.frmConfig.telescope_entry.delete(0, tk.END)
                     self.frmConfig.telescope_entry.insert(0, self.device_id)
@@ -473,50 +590,79 @@ class Controller:
             messagebox.showerror("Erro", f"Erro ao buscar driver do telescópio: {e}")
             return None
 
+    def connect_telescope(self, device_id):
+        """Cria e conecta a montagem, lendo as características fixas do driver.
+
+        Args:
+            device_id (str): ProgID do driver ASCOM ou endereço Alpaca
+        """
+        self.mount.connect(device_id)
+        # A janela sempre deixou a montagem pronta para mover ao conectar
+        self.mount.unpark()
+
+    def choose_device(self):
+        """Abre a seleção do dispositivo de acordo com o backend configurado.
+
+        Returns:
+            str: id do dispositivo escolhido ou None se nada foi selecionado
+        """
+        from telescope_backend import BACKEND_ALPACA, BACKEND_SIMULATOR, discover_alpaca_telescopes
+        if self.backend == BACKEND_ALPACA:
+            # Procura montagens Alpaca na rede e deixa o usuário confirmar ou digitar o endereço
+            try:
+                found = discover_alpaca_telescopes()
+            except Exception as e:
+                log.warning(f"Erro ao procurar montagens Alpaca: {e}")
+                found = []
+            initial = found[0] if found else (self.device_id or "127.0.0.1:11111/0")
+            return simpledialog.askstring("Montagem Alpaca", "Endereço da montagem (host:porta/número):", initialvalue=initial)
+        if self.backend == BACKEND_SIMULATOR:
+            return self.device_id or "simulador"
+
+        # Cria uma instância do ASCOM Chooser e abre a caixa de diálogo de seleção de dispositivos
+        import win32com.client
+        chooser = win32com.client.Dispatch("ASCOM.Utilities.Chooser")
+        return chooser.Choose("Telescope")
 
     def show_frmMain(self):
         self.frmMain.pack(fill='both', expand=True)
-        self.frmGoto.pack_forget()
-        self.frmConfig.pack_forget()
+        if self.frmGoto is not None:
+            self.frmGoto.pack_forget()
+        if self.frmConfig is not None:
+            self.frmConfig.pack_forget()
 
     def show_frmConfig(self):
+        if self.connecting:
+            messagebox.showinfo("Atenção", "Aguarde a conexão com a montagem")
+            return
+        if self.frmConfig is None:
+            from frame_config import frmConfig
+            self.frmConfig = frmConfig(self)
+            # Os botões de estacionamento são ajustados na próxima leitura
+            if self.ui_updater is not None:
+                self.ui_updater.invalidate('park', 'set_park')
         self.frmMain.pack_forget()
         self.frmConfig.pack(fill='both', expand=True)
         self.update_visibility(self.frmConfig.canvas_config, self.frmConfig.container)
 
     def show_frmGoto(self):
+        if not self.require_telescope():
+            return
+        if self.frmGoto is None:
+            from frame_goto import frmGoto
+            self.frmGoto = frmGoto(self)
         self.frmMain.pack_forget()
         # canvas_goto e container_goto estão dentro da classe frmGoto
         self.frmGoto.pack(fill='both', expand=True)
         self.update_visibility(self.frmGoto.canvas_goto, self.frmGoto.container)
 
     def get_config(self, section, option):
-        """Lê as configurações do arquivo config.ini"""
-        config = configparser.ConfigParser()
-        if not os.path.exists('config.ini'):
-            log.debug("Arquivo de configurações não encontrado")
-            return None
-        config.read('config.ini')
-        log.debug(f"Obtendo configuração {option} do arquivo config.ini")
-        if section in config:
-            log.debug(f"Seção {section} encontrada")
-            if option in config[section]:
-                log.debug(f"Configuração {option} encontrada: {config[section][option]}")
-                return config[section][option]
-        log.debug(f"Configuração {option} não encontrada, retornando None")
-        return None
+        """Lê as configurações do config.ini (mantidas em memória pelo ConfigStore)"""
+        return self.config.get(section, option)
 
     def del_config(self, section, option):
         """Deleta as configurações do arquivo config.ini"""
-        config = configparser.ConfigParser()
-        config.read('config.ini')
-        if section in config:
-            if option in config[section]:
-                del config[section][option]
-                with open('config.ini', 'w') as configfile:
-                    config.write(configfile)
-                return True
-        return None
+        return self.config.delete(section, option) or None
 
 
     def update_visibility(self, canvas, container):
@@ -528,6 +674,6 @@ class Controller:
             canvas.bind_all("<MouseWheel>", lambda event: canvas.yview_scroll(int(-1*(event.delta/120)), "units"))
 
 
-# Exemplo de utilização
-controller = Controller()
-controller.root.mainloop()
+if __name__ == '__main__':
+    controller = Controller()
+    controller.root.mainloop()
@@ -0,0 +1,177 @@
+import math
+import time
+
+# Velocidade do céu em ascensão reta, em horas por segundo (dia sideral)
+SIDEREAL_RATE = 1.00273790935 / 3600
+# Velocidade de rastreamento de cada DriveRates do ASCOM, em segundos de arco por segundo de tempo
+TRACKING_RATES = {
+    0: 15.041067,   # sideral
+    1: 14.685,      # lunar
+    2: 15.0,        # solar
+    3: 15.0369,     # King rate
+}
+# Coordenadas da posição: (nome, período para dar a volta ou None)
+AXES = (('right_ascension', 24.0), ('declination', None), ('azimuth', 360.0), ('altitude', None))
+
+
+def wrap(value, period):
+    """Diferença de coordenadas reduzida a meio período (ex.: 23.9h - 0.1h = -0.2h)."""
+    if period is None:
+        return value
+    return (value + period / 2) % period - period / 2
+
+
+class MotionEstimator:
+    """Estima a posição da montagem entre duas leituras (dead reckoning).
+
+    A cada leitura a velocidade de cada coordenada é estimada pela reta que
+    melhor passa pelas últimas ``history`` leituras do mesmo movimento. Enquanto
+    ainda não há leituras suficientes, usa a velocidade pedida no ``MoveAxis``
+    (:meth:`command`) ou, com a montagem sem slew, o movimento do céu: parada,
+    a ascensão reta anda com o tempo sideral; rastreando, só a diferença entre
+    a taxa de rastreamento e a sideral.
+
+    A posição exibida é a última leitura avançada por essa velocidade, por no
+    máximo ``horizon`` intervalos entre leituras. Quando chega uma leitura nova,
+    a diferença para o que estava sendo exibido some aos poucos (constante de
+    tempo ``smoothing``), em vez de um salto; diferenças maiores que
+    ``snap_degrees`` são aplicadas de uma vez.
+
+    Args:
+        history (int): leituras usadas para estimar a velocidade
+        horizon (float): quantos intervalos entre leituras extrapolar, no máximo
+        smoothing (float): constante de tempo da correção, em segundos
+        snap_degrees (float): diferença a partir da qual a correção é imediata
+    """
+    MAX_EXTRAPOLATION = 5.0
+
+    def __init__(self, history=4, horizon=1.5, smoothing=0.15, snap_degrees=5.0):
+        self.history = history
+        self.horizon = horizon
+        self.smoothing = smoothing
+        self.snap_degrees = snap_degrees
+        self.samples = []
+        self.segment = None
+        self.rates = None
+        self.sample_interval = None
+        self.offset = (0.0, 0.0, 0.0, 0.0)
+        self.offset_time = 0.0
+        # Velocidade pedida em cada eixo (graus/s) e o sentido observado do eixo na montagem
+        self.commanded = [0.0, 0.0]
+        self.axis_sign = [1.0, 1.0]
+
+    def command(self, axis, rate):
+        """Informa a velocidade pedida no MoveAxis.
+
+        Args:
+            axis (int): 0 para o eixo primário (AR), 1 para o secundário (DEC)
+            rate (float): velocidade em graus por segundo (0 para parar)
+        """
+        self.commanded[int(axis)] = float(rate)
+
+    def stop(self):
+        """Esquece as velocidades pedidas (AbortSlew)."""
+        self.commanded = [0.0, 0.0]
+
+    def add(self, snapshot, now=None):
+        """Acrescenta uma leitura real da montagem.
+
+        Args:
+            snapshot (MountSnapshot): leitura
+            now (float): relógio monotônico no momento em que a leitura é aplicada
+        """
+        now = time.monotonic() if now is None else now
+        displayed = self.estimate(now) if self.samples else None
+        moving = snapshot.slewing or any(self.commanded)
+        segment = (moving, snapshot.tracking, snapshot.tracking_rate, tuple(self.commanded))
+        sample = (snapshot.monotonic + snapshot.duration / 2,
+                  (snapshot.right_ascension, snapshot.declination, snapshot.azimuth, snapshot.altitude))
+        if self.samples:
+            interval = sample[0] - self.samples[-1][0]
+            if interval > 0:
+                self.sample_interval = interval
+        if segment != self.segment:
+            # Movimento novo: a última leitura só serve de ponto de partida
+            self.samples = self.samples[-1:] if moving and self.samples else []
+            self.segment = segment
+        self.samples = (self.samples + [sample])[-self.history:]
+        self.rates = self.fit(snapshot, moving)
+        self.offset_time = now
+        self.offset = (0.0, 0.0, 0.0, 0.0)
+        if displayed is not None:
+            offset = tuple(wrap(shown - real, period)
+                           for shown, real, (_, period) in zip(displayed, self.model(now), AXES))
+            if max(abs(offset[0]) * 15, *map(abs, offset[1:])) < self.snap_degrees:
+                self.offset = offset
+
+    def fit(self, snapshot, moving):
+        """Velocidade de cada coordenada, em unidades por segundo."""
+        rates = list(self.sky_rates(snapshot, moving))
+        if len(self.samples) < 2:
+            return rates
+        t0 = self.samples[0][0]
+        times = [t - t0 for t, _ in self.samples]
+        mean_time = sum(times) / len(times)
+        spread = sum((t - mean_time) ** 2 for t in times)
+        if spread <= 0:
+            return rates
+        for index, (_, period) in enumerate(AXES):
+            if not moving and index < 2:
+                continue  # sem slew, AR e DEC seguem o céu
+            first = self.samples[0][1][index]
+            values = [wrap(position[index] - first, period) for _, position in self.samples]
+            mean_value = sum(values) / len(values)
+            rates[index] = sum((t - mean_time) * (v - mean_value) for t, v in zip(times, values)) / spread
+        if moving:
+            self.learn_axis_sign(rates)
+        return rates
+
+    def learn_axis_sign(self, rates):
+        """Aprende o sentido de cada eixo comparando a velocidade pedida com a medida."""
+        ra_rate = rates[0] * 15 - (0.0 if self.segment[1] else SIDEREAL_RATE * 15)
+        for axis, measured in enumerate((ra_rate, rates[1])):
+            commanded = self.commanded[axis]
+            if commanded and abs(measured) > abs(commanded) / 2:
+                self.axis_sign[axis] = math.copysign(1.0, measured * commanded)
+
+    def sky_rates(self, snapshot, moving):
+        """Velocidades sem leituras suficientes: movimento do céu mais o MoveAxis pedido."""
+        if snapshot.tracking:
+            ra_rate = (TRACKING_RATES[0] - TRACKING_RATES.get(snapshot.tracking_rate, TRACKING_RATES[0])) / 15 / 3600
+        else:
+            ra_rate = SIDEREAL_RATE
+        dec_rate = 0.0
+        if moving:
+            ra_rate += self.commanded[0] * self.axis_sign[0] / 15
+            dec_rate = self.commanded[1] * self.axis_sign[1]
+        if not self.samples or len(self.samples) < 2:
+            return [ra_rate, dec_rate, 0.0, 0.0]
+        # Altitude e azimute acompanham a rotação do céu medida nas últimas leituras
+        return [ra_rate, dec_rate] + list(self.rates[2:] if self.rates else (0.0, 0.0))
+
+    def model(self, now):
+        """Última leitura avançada pela velocidade estimada, sem a correção."""
+        sample_time, position = self.samples[-1]
+        limit = self.MAX_EXTRAPOLATION
+        if self.sample_interval:
+            limit = min(limit, self.sample_interval * self.horizon)
+        elapsed = max(0.0, min(now - sample_time, limit))
+        return tuple(value + rate * elapsed for value, rate in zip(position, self.rates))
+
+    def estimate(self, now=None):
+        """Posição estimada para exibição.
+
+        Returns:
+            tuple: (ascensão reta em horas, declinação, azimute, altitude em graus),
+            ou None se ainda não houve leitura
+        """
+        if not self.samples:
+            return None
+        now = time.monotonic() if now is None else now
+        decay = math.exp(-max(0.0, now - self.offset_time) / self.smoothing) if self.smoothing else 0.0
+        position = [value + offset * decay for value, offset in zip(self.model(now), self.offset)]
+        position[0] %= 24.0
+        position[1] = max(-90.0, min(90.0, position[1]))
+        position[2] %= 360.0
+        position[3] = max(-90.0, min(90.0, position[3]))
+        return tuple(position)
@@ -0,0 +1,380 @@
+"""Controle da montagem sem interface gráfica.
+
+O :class:`MountCore` conecta o driver e executa os comandos (goto, rastreamento,
+park, home, movimento manual e leitura da posição) sem depender do Tk. A janela
+(``main.Controller``), a sequência de observação (``observing_plan``) e a linha
+de comando (``cli.py``) usam o mesmo núcleo; a janela só acrescenta as mensagens
+e o estado da interface.
+
+Os erros de uso (montagem desconectada, alvo desconhecido ou abaixo do
+horizonte) são levantados como :class:`MountError`, com a mensagem pronta para
+ser exibida; os erros do driver passam sem alteração.
+"""
+import time
+from dataclasses import dataclass, replace
+import logandprint as log
+from mount_snapshot import MountSnapshot
+
+# Taxas de rastreamento (DriveRates do ASCOM) pelo nome normalizado; None desliga
+TRACKING_RATES = {
+    'off': None,
+    'sideral': 0,
+    'sidereal': 0,
+    'lunar': 1,
+    'solar': 2,
+    'king': 3,
+    'kingrate': 3,
+}
+# Taxa de rastreamento depois do goto para os corpos que não seguem o céu
+BODY_TRACKING = {'Sol': 2, 'Lua': 1}
+
+
+class MountError(Exception):
+    """Comando que não pode ser executado no estado atual da montagem."""
+
+
+@dataclass(frozen=True)
+class GotoTarget:
+    """Alvo de um goto já resolvido para o instante do cálculo.
+
+    Attributes:
+        name (str): nome exibido do alvo
+        ra (float): ascensão reta na época da data (a que a montagem usa), em horas
+        dec (float): declinação na época da data, em graus
+        ra_j2000 (float): ascensão reta J2000, em horas
+        dec_j2000 (float): declinação J2000, em graus
+        altitude (float): altitude no local, em graus
+        tracking_rate (int): taxa de rastreamento (DriveRates) depois do goto
+        details (BodyDetails): magnitude, eventos e distâncias (só corpos e objetos
+            do catálogo)
+        mount_ra (float): ascensão reta enviada à montagem, com o modelo de
+            apontamento aplicado, em horas (preenchida por :meth:`MountCore.goto`)
+        mount_dec (float): declinação enviada à montagem, em graus
+    """
+    name: str
+    ra: float
+    dec: float
+    ra_j2000: float
+    dec_j2000: float
+    altitude: float
+    tracking_rate: int = 0
+    details: object = None
+    mount_ra: float = None
+    mount_dec: float = None
+
+
+class MountCore:
+    """Montagem conectada e os comandos enviados a ela.
+
+    Os módulos pesados (backend, efemérides, catálogo, modelo de apontamento)
+    são importados no primeiro uso.
+
+    Args:
+        config (ConfigStore): configurações do config.ini
+        metrics (Metrics): métricas dos acessos ao driver, ou None
+    """
+    def __init__(self, config, metrics=None):
+        self.config = config
+        self.metrics = metrics
+        self.backend = None
+        self.device_id = config.get('COMMUNICATION', 'driver')
+        self.telescope = None
+        self.capabilities = None
+        self.pointing = None
+        self._ephemeris = None
+        self._catalog = None
+
+    def load(self):
+        """Importa o backend e lê o modelo de apontamento (pode rodar fora da thread do Tk)."""
+        if self.pointing is None:
+            from pointing_model import PointingModel
+            # Estrelas registradas e modelo de apontamento aplicado aos gotos
+            self.pointing = PointingModel.load()
+        if self.backend is None:
+            from telescope_backend import get_backend_name
+            self.backend = get_backend_name(self.config.get('COMMUNICATION', 'backend'))
+
+    @property
+    def ephemeris(self):
+        if self._ephemeris is None:
+            from ephemeris import EphemerisService
+            self._ephemeris = EphemerisService()
+        return self._ephemeris
+
+    @property
+    def catalog(self):
+        """Catálogo de céu profundo e estrelas, aberto na primeira busca."""
+        if self._catalog is None:
+            from catalog import Catalog
+            self._catalog = Catalog()
+        return self._catalog
+
+    # ======= Conexão
+
+    @property
+    def connected(self):
+        return self.telescope is not None
+
+    def connect(self, device_id=None):
+        """Cria e conecta a montagem, lendo as características fixas do driver.
+
+        Não altera o estado da montagem: quem vai movê-la (goto, home, movimento
+        manual) tira do estacionamento antes, com :meth:`unpark`.
+
+        Args:
+            device_id (str): ProgID do driver ASCOM, endereço Alpaca ou parâmetros
+                da simulação; o ``driver`` do config.ini se omitido
+        """
+        from telescope_backend import BACKEND_ALPACA, AlpacaTelescope, create_telescope
+        from telescope_capabilities import TelescopeCapabilities
+        from instrumentation import InstrumentedTelescope
+        from driver_worker import DriverProxy, DriverWorker
+        self.load()
+        device_id = device_id or self.device_id
+        if not device_id:
+            raise MountError("Nenhum driver configurado. Escolha o driver do telescópio")
+        self.device_id = device_id
+        # Máximo de requisições Alpaca simultâneas por dispositivo
+        AlpacaTelescope.POOL_SIZE = max(1, int(self.config.get_float('COMMUNICATION', 'alpaca_concurrency', AlpacaTelescope.POOL_SIZE)))
+        backend, metrics = self.backend, self.metrics
+
+        def factory():
+            telescope = create_telescope(backend, device_id)
+            if not metrics:
+                return telescope
+            if isinstance(telescope, AlpacaTelescope):
+                # As leituras do ciclo vão todas juntas pelo cliente assíncrono: medidas lá, uma a uma
+                telescope.async_client.metrics = metrics
+            return InstrumentedTelescope(telescope, metrics)
+
+        if backend != BACKEND_ALPACA and self.config.get_bool('COMMUNICATION', 'driver_worker', True):
+            # Driver acessado só pela thread do worker; paradas passam na frente das leituras.
+            # No Alpaca cada acesso é uma requisição HTTP independente e as leituras vão em paralelo
+            worker = DriverWorker(factory, metrics)
+            worker.start()
+            worker.ready.result()
+            telescope = DriverProxy(worker)
+        else:
+            worker = None
+            telescope = factory()
+        self.telescope = telescope
+        self.capabilities = None
+        telescope.Connected = True
+        if worker:
+            # Lidas na thread dona do driver, inclusive as coleções COM devolvidas pelo AxisRates
+            self.capabilities = worker.call(TelescopeCapabilities.from_telescope)
+        else:
+            self.capabilities = TelescopeCapabilities.from_telescope(telescope)
+
+    def disconnect(self, close_sessions=True):
+        """Desconecta a montagem e, no Alpaca, fecha as conexões HTTP."""
+        from driver_worker import driver_worker
+        telescope, self.telescope, self.capabilities = self.telescope, None, None
+        if telescope is not None:
+            try:
+                telescope.Connected = False
+            finally:
+                worker = driver_worker(telescope)
+                if worker is not None:
+                    worker.close()
+        if close_sessions:
+            from telescope_backend import AlpacaTelescope
+            AlpacaTelescope.close_sessions()
+
+    def require(self):
+        """Montagem conectada, ou MountError."""
+        if self.telescope is None:
+            raise MountError("Nenhuma montagem conectada")
+        return self.telescope
+
+    # ======= Comandos
+
+    def unpark(self):
+        telescope = self.require()
+        if telescope.AtPark:
+            if self.capabilities.can_unpark:
+                telescope.Unpark()
+                log.debug('Desparkeado')
+            else:
+                log.debug('Não é possível desparkear')
+        else:
+            log.debug('Já desparkeado')
+
+    def park(self):
+        telescope = self.require()
+        if not self.capabilities.can_park:
+            raise MountError("A montagem não pode ser estacionada")
+        telescope.Park()
+        log.debug('Parkeado')
+
+    def set_park(self):
+        self.require().SetPark()
+
+    def find_home(self):
+        telescope = self.require()
+        self.unpark()
+        log.debug('Enviando comando de home')
+        if self.capabilities.can_find_home:
+            telescope.FindHome()
+        log.debug('Terminou o comando de home')
+
+    def abort(self):
+        self.require().AbortSlew()
+
+    def move_axis(self, axis, rate):
+        """Move um eixo (0 = AR, 1 = DEC) em graus por segundo; 0 para parar."""
+        self.require().MoveAxis(axis, rate)
+
+    def set_tracking(self, rate):
+        """Liga o rastreamento na taxa pedida ou o desliga.
+
+        Args:
+            rate: nome da taxa (``sideral``, ``lunar``, ``solar``, ``king rate``
+                ou ``off``, sem diferenciar maiúsculas), número do DriveRates ou
+                None para desligar
+        """
+        telescope = self.require()
+        if isinstance(rate, str):
+            from catalog import normalize
+            key = normalize(rate)
+            if key not in TRACKING_RATES:
+                raise MountError(f"Taxa de rastreamento desconhecida: {rate}")
+            rate = TRACKING_RATES[key]
+        if rate is None:
+            telescope.Tracking = False
+            return
+        telescope.TrackingRate = int(rate)
+        telescope.Tracking = True
+
+    def status(self):
+        """Lê o estado atual da montagem; no Alpaca, todas as propriedades ao mesmo tempo."""
+        from telescope_backend import alpaca_driver
+        telescope = self.require()
+        if alpaca_driver(telescope):
+            return telescope.fetch_snapshot()
+        return MountSnapshot.fetch(telescope)
+
+    def watch(self, interval=1.0, count=None):
+        """Gera leituras a cada ``interval`` segundos, agendadas pelo relógio monotônico.
+
+        Leituras mais demoradas que o intervalo não se acumulam: os ciclos
+        perdidos são descartados, como na thread de atualização da janela.
+
+        Args:
+            interval (float): intervalo entre leituras, em segundos
+            count (int): número de leituras, ou None para sem fim
+        """
+        next_tick = time.monotonic()
+        read = 0
+        while count is None or read < count:
+            yield self.status()
+            read += 1
+            next_tick += interval
+            now = time.monotonic()
+            if now > next_tick:
+                next_tick += ((now - next_tick) // interval + 1) * interval
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+
+    def wait_slew(self, timeout=300.0, poll=0.5):
+        """Espera a montagem terminar o slew."""
+        telescope = self.require()
+        deadline = time.monotonic() + timeout
+        while telescope.Slewing:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"O slew não terminou em {timeout:.0f}s")
+            time.sleep(poll)
+
+    # ======= Goto
+
+    def find_target(self, text):
+        """Encontra o alvo digitado: corpo do Sistema Solar, objeto do catálogo ou coordenadas.
+
+        Args:
+            text (str): ex.: ``Júpiter``, ``M31``, ``Andrômeda`` ou ``05:34:31 +22:00:52``
+                (coordenadas J2000)
+
+        Returns:
+            str, CatalogEntry ou tuple: alvo aceito por :meth:`resolve`
+        """
+        from catalog import normalize
+        from ephemeris import BODIES
+        key = normalize(text)
+        for name in BODIES:
+            if normalize(name) == key:
+                return name
+        coordinates = self.parse_coordinates(text)
+        if coordinates is not None:
+            return (text.strip(),) + coordinates + (0.0,)
+        results = self.catalog.search(text, limit=1)
+        if not results:
+            raise MountError(f"Objeto {text} não encontrado")
+        return results[0]
+
+    @staticmethod
+    def parse_coordinates(text):
+        """Lê ``"ra dec"`` (J2000), ex.: ``05h34m31s +22°00'52"`` ou ``5.575 22.01``; None se não forem coordenadas."""
+        from astrometry import parse_sexagesimal
+        fields = text.replace(',', ' ').split()
+        for split in range(1, len(fields)):
+            try:
+                ra = parse_sexagesimal(' '.join(fields[:split]))
+                dec = parse_sexagesimal(' '.join(fields[split:]))
+            except ValueError:
+                continue
+            if 0 <= ra < 24 and -90 <= dec <= 90 and fields[split][:1] in '+-−0123456789':
+                return ra, dec
+        return None
+
+    def resolve(self, target, when=None):
+        """Posição do alvo para o goto, no instante ``when`` (agora se omitido).
+
+        Args:
+            target: nome de um corpo de ``BODIES``, ``CatalogEntry`` ou tupla
+                (nome, ascensão reta J2000 em horas, declinação J2000 em graus, magnitude)
+
+        Returns:
+            GotoTarget: alvo resolvido
+        """
+        from astrometry import j2000_to_jnow, jnow_to_j2000
+        capabilities = self.capabilities
+        if capabilities is None:
+            raise MountError("Nenhuma montagem conectada")
+        latitude, longitude = capabilities.site_latitude, capabilities.site_longitude
+        fixed = getattr(target, 'target', target)
+        position, details = self.ephemeris.info(fixed, latitude, longitude, when)
+        if isinstance(fixed, tuple):
+            # A montagem aponta na época da data: precessão, nutação e aberração a partir do J2000
+            name, ra_j2000, dec_j2000 = fixed[0], fixed[1], fixed[2]
+            ra, dec = j2000_to_jnow(ra_j2000, dec_j2000, when)
+        else:
+            name = fixed
+            ra, dec = position.ra_hours, position.dec_degrees
+            ra_j2000, dec_j2000 = jnow_to_j2000(ra, dec, when)
+        return GotoTarget(getattr(target, 'label', name), ra, dec, ra_j2000, dec_j2000, position.alt_degrees,
+                          BODY_TRACKING.get(name, 0), details)
+
+    def goto(self, target, min_altitude=0.0, when=None):
+        """Inicia o goto para o alvo, com o modelo de apontamento aplicado.
+
+        Args:
+            target: alvo aceito por :meth:`resolve`, ou ``GotoTarget`` já resolvido
+            min_altitude (float): altitude mínima do alvo, em graus
+
+        Returns:
+            tuple: (GotoTarget com as coordenadas enviadas em ``mount_ra`` e
+            ``mount_dec``, Future da conclusão dos comandos no Alpaca ou None)
+        """
+        self.require()
+        resolved = target if isinstance(target, GotoTarget) else self.resolve(target, when)
+        if resolved.altitude < min_altitude:
+            raise MountError(f"{resolved.name} está abaixo do horizonte" if min_altitude <= 0
+                             else f"{resolved.name} está abaixo de {min_altitude:.0f}°")
+        ra, dec = resolved.ra, resolved.dec
+        if self.config.get_bool('POINTING', 'apply', True) and self.pointing is not None:
+            # Coordenadas corrigidas pelo modelo de apontamento (sem estrelas registradas, ficam iguais)
+            ra, dec = self.pointing.correct(ra, dec, self.capabilities.site_longitude)
+        from telescope_backend import send_goto
+        self.unpark()
+        log.debug(f"Goto para {resolved.name} (RA: {ra} DEC: {dec})")
+        future = send_goto(self.telescope, ra, dec, resolved.tracking_rate)
+        return replace(resolved, mount_ra=ra, mount_dec=dec), future
@@ -0,0 +1,115 @@
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class MountSnapshot:
+    """Estado da montagem lido uma única vez por ciclo de atualização.
+
+    Cada propriedade do driver é lida exatamente uma vez em :meth:`fetch` e o
+    resultado é repassado para todos que precisam dele no mesmo ciclo, evitando
+    idas e voltas repetidas pela serial do OnStep.
+
+    Attributes:
+        timestamp (float): hora (time.time) em que a leitura começou
+        monotonic (float): relógio monotônico (time.monotonic) no início da leitura
+        duration (float): tempo gasto, em segundos, para ler todas as propriedades
+        nearby (tuple): pares (nome, distância em graus) dos objetos do catálogo
+            perto do apontamento, preenchidos pela thread de atualização
+        alignment_star (tuple): par (nome, distância em graus) da estrela de
+            alinhamento mais próxima, ou None
+    """
+    timestamp: float
+    monotonic: float
+    duration: float
+    right_ascension: float
+    declination: float
+    azimuth: float
+    altitude: float
+    tracking: bool
+    tracking_rate: int
+    at_park: bool
+    at_home: bool
+    slewing: bool
+    nearby: tuple = ()
+    alignment_star: tuple = None
+
+    @classmethod
+    def fetch(cls, telescope):
+        """Lê o estado atual da montagem.
+
+        Args:
+            telescope: objeto com a interface ITelescope do ASCOM
+
+        Returns:
+            MountSnapshot: estado da montagem
+        """
+        timestamp = time.time()
+        start = time.monotonic()
+        values = {name: getattr(telescope, name) for name in SNAPSHOT_PROPERTIES}
+        return cls.from_values(timestamp, start, time.monotonic() - start, values)
+
+    @classmethod
+    def from_values(cls, timestamp, monotonic, duration, values):
+        """Monta a leitura a partir dos valores já obtidos do driver.
+
+        Args:
+            timestamp (float): hora (time.time) em que a leitura começou
+            monotonic (float): relógio monotônico no início da leitura
+            duration (float): tempo gasto na leitura, em segundos
+            values (dict): valor de cada propriedade de ``SNAPSHOT_PROPERTIES``
+
+        Returns:
+            MountSnapshot: estado da montagem
+        """
+        return cls(
+            timestamp=timestamp,
+            monotonic=monotonic,
+            duration=duration,
+            right_ascension=float(values['RightAscension'] or 0.0),
+            declination=float(values['Declination'] or 0.0),
+            azimuth=float(values['Azimuth'] or 0.0),
+            altitude=float(values['Altitude'] or 0.0),
+            tracking=bool(values['Tracking']),
+            tracking_rate=int(values['TrackingRate']),
+            at_park=bool(values['AtPark']),
+            at_home=bool(values['AtHome']),
+            slewing=bool(values['Slewing']),
+        )
+
+    def to_dict(self):
+        """Leitura como dicionário serializável em JSON (usado pela linha de comando e pelo servidor local)."""
+        from astrometry import format_degrees, format_hours
+        return {
+            'timestamp': round(self.timestamp, 3),
+            'ra': round(self.right_ascension, 6),
+            'dec': round(self.declination, 5),
+            'ra_hms': format_hours(self.right_ascension, 1),
+            'dec_dms': format_degrees(self.declination),
+            'azimuth': round(self.azimuth, 4),
+            'altitude': round(self.altitude, 4),
+            'tracking': self.tracking_name,
+            'slewing': self.slewing,
+            'at_park': self.at_park,
+            'at_home': self.at_home,
+        }
+
+    @property
+    def tracking_name(self):
+        """Nome da taxa de rastreamento como aparece na combobox de rastreamento."""
+        if not self.tracking:
+            return 'Off'
+        return TRACKING_NAMES.get(self.tracking_rate, 'Off')
+
+
+# Propriedades do driver lidas a cada ciclo, na ordem em que são lidas
+SNAPSHOT_PROPERTIES = ('RightAscension', 'Declination', 'Azimuth', 'Altitude', 'Tracking',
+                       'TrackingRate', 'AtPark', 'AtHome', 'Slewing')
+
+# Nomes das taxas de rastreamento (DriveRates do ASCOM) usados na interface
+TRACKING_NAMES = {
+    0: 'Sideral',
+    1: 'Lunar',
+    2: 'Solar',
+    3: 'King rate',
+}
@@ -0,0 +1,225 @@
+import math
+import time
+import ephem
+import numpy as np
+import logandprint as log
+from ephemeris import BODIES
+
+UNIX_EPOCH_JD = 2440587.5
+
+
+class NightPlan:
+    """Altitude e azimute de vários alvos ao longo de uma noite.
+
+    Attributes:
+        names (list): nomes dos alvos, na ordem das linhas das matrizes
+        times (np.ndarray): instantes da grade (time.time), formato (n_tempos,)
+        altitude (np.ndarray): altitude em graus, formato (n_alvos, n_tempos)
+        azimuth (np.ndarray): azimute em graus, formato (n_alvos, n_tempos)
+        min_altitude (float): altitude mínima, em graus, para considerar o alvo visível
+        ra (np.ndarray): ascensão reta em radianos, formato (n_alvos, n_tempos), ou None
+        dec (np.ndarray): declinação em radianos, mesmo formato de ``ra``, ou None
+    """
+    def __init__(self, names, times, altitude, azimuth, min_altitude, ra=None, dec=None):
+        self.names = names
+        self.times = times
+        self.altitude = altitude
+        self.azimuth = azimuth
+        self.min_altitude = min_altitude
+        self.ra = ra
+        self.dec = dec
+        self.visible = altitude >= min_altitude
+
+    @property
+    def start(self):
+        return float(self.times[0])
+
+    @property
+    def end(self):
+        return float(self.times[-1])
+
+    def windows(self, index):
+        """Janelas em que o alvo fica acima da altitude mínima.
+
+        Args:
+            index (int): índice do alvo em ``names``
+
+        Returns:
+            list: pares (início, fim) em time.time
+        """
+        visible = self.visible[index].astype(np.int8)
+        edges = np.diff(np.concatenate(([0], visible, [0])))
+        starts = np.flatnonzero(edges == 1)
+        ends = np.flatnonzero(edges == -1) - 1
+        return [(float(self.times[s]), float(self.times[e])) for s, e in zip(starts, ends)]
+
+    def rows(self, now=None):
+        """Resumo por alvo, para exibição em tabela.
+
+        Returns:
+            list: dicionários com nome, altitude atual, altitude máxima, horário
+            da altitude máxima, início e fim da visibilidade e horas visíveis.
+            A altitude e o azimute atuais são None quando ``now`` está fora da
+            noite do plano (durante o dia, por exemplo)
+        """
+        now = time.time() if now is None else now
+        step = float(self.times[1] - self.times[0]) if len(self.times) > 1 else 0.0
+        current = None
+        if self.start - step / 2 <= now <= self.end + step / 2:
+            # Ponto da grade mais próximo de agora
+            current = int(np.clip(np.rint((now - self.start) / step) if step else 0, 0, len(self.times) - 1))
+        peak = np.argmax(self.altitude, axis=1)
+        rows = []
+        for index, name in enumerate(self.names):
+            windows = self.windows(index)
+            rows.append({
+                'name': name,
+                'altitude': float(self.altitude[index, current]) if current is not None else None,
+                'azimuth': float(self.azimuth[index, current]) if current is not None else None,
+                'max_altitude': float(self.altitude[index, peak[index]]),
+                'max_altitude_time': float(self.times[peak[index]]),
+                'visible_from': windows[0][0] if windows else None,
+                'visible_until': windows[-1][1] if windows else None,
+                'visible_hours': float(np.count_nonzero(self.visible[index])) * step / 3600,
+            })
+        return rows
+
+
+class NightPlanner:
+    """Calcula, de uma vez, a altitude/azimute de todos os alvos durante a noite.
+
+    As coordenadas equatoriais de cada alvo são calculadas com o ephem numa
+    grade grossa (``sample_minutes``) e interpoladas para a grade fina
+    (``step_minutes``); a conversão para altitude/azimute de todos os alvos em
+    todos os instantes é feita numa única passada vetorizada com NumPy. O
+    resultado fica em cache por noite e local.
+
+    Args:
+        step_minutes (float): passo da grade fina, em minutos
+        sample_minutes (float): passo da grade em que o ephem é consultado, em minutos
+        min_altitude (float): altitude mínima, em graus, para considerar o alvo visível
+        max_cached (int): quantidade de noites mantidas em cache
+    """
+    def __init__(self, step_minutes=5, sample_minutes=60, min_altitude=15.0, max_cached=4):
+        self.step_minutes = step_minutes
+        self.sample_minutes = sample_minutes
+        self.min_altitude = min_altitude
+        self.max_cached = max_cached
+        self.cache = {}
+
+    def night_bounds(self, latitude, longitude, when=None):
+        """Início (pôr do Sol) e fim (nascer do Sol) da noite atual ou da próxima.
+
+        Returns:
+            tuple: (início, fim) em time.time
+        """
+        when = time.time() if when is None else when
+        observer = ephem.Observer()
+        observer.lat = str(latitude)
+        observer.lon = str(longitude)
+        observer.date = ephem.Date(time.gmtime(when)[:6])
+        sun = ephem.Sun()
+        try:
+            sun.compute(observer)
+            if sun.alt < 0:
+                start = observer.previous_setting(sun)
+            else:
+                start = observer.next_setting(sun)
+            observer.date = start
+            end = observer.next_rising(sun)
+        except (ephem.AlwaysUpError, ephem.NeverUpError):
+            # Noite ou dia polar: usa as próximas 24 horas
+            return when, when + 86400
+        return self.to_unix(start), self.to_unix(end)
+
+    @staticmethod
+    def to_unix(date):
+        return (float(date) + 2415020.0 - UNIX_EPOCH_JD) * 86400
+
+    def plan(self, latitude, longitude, targets=None, when=None):
+        """Monta (ou obtém do cache) o plano da noite.
+
+        Args:
+            latitude (float): latitude do local, em graus
+            longitude (float): longitude do local, em graus
+            targets (list): nomes de corpos de ``BODIES`` ou tuplas
+                (nome, ascensão reta em horas, declinação em graus) de alvos fixos;
+                todos os corpos de ``BODIES`` se None
+            when (float): instante de referência (time.time); o atual se None
+
+        Returns:
+            NightPlan: plano da noite
+        """
+        targets = tuple(BODIES) if targets is None else tuple(targets)
+        start, end = self.night_bounds(latitude, longitude, when)
+        key = (round(start / 60), round(float(latitude), 4), round(float(longitude), 4), targets)
+        plan = self.cache.get(key)
+        if plan is None:
+            log.debug(f"Calculando plano da noite para {len(targets)} alvos")
+            plan = self.compute(latitude, longitude, targets, start, end)
+            if len(self.cache) >= self.max_cached:
+                self.cache.pop(next(iter(self.cache)))
+            self.cache[key] = plan
+        return plan
+
+    def compute(self, latitude, longitude, targets, start, end):
+        """Calcula o plano entre ``start`` e ``end`` (time.time) sem usar o cache."""
+        times = np.arange(start, end + 1, self.step_minutes * 60.0)
+        samples = np.arange(start, end + self.sample_minutes * 60.0, self.sample_minutes * 60.0)
+
+        names = []
+        ra = np.empty((len(targets), len(times)))
+        dec = np.empty((len(targets), len(times)))
+        observer = ephem.Observer()
+        observer.lat = str(latitude)
+        observer.lon = str(longitude)
+        for index, target in enumerate(targets):
+            if isinstance(target, str):
+                names.append(target)
+                body = BODIES[target]()
+                sample_ra = np.empty(len(samples))
+                sample_dec = np.empty(len(samples))
+                for i, sample in enumerate(samples):
+                    observer.date = ephem.Date(time.gmtime(sample)[:6])
+                    body.compute(observer)
+                    sample_ra[i] = body.ra
+                    sample_dec[i] = body.dec
+                ra[index] = np.interp(times, samples, np.unwrap(sample_ra))
+                dec[index] = np.interp(times, samples, sample_dec)
+            else:
+                name, ra_hours, dec_degrees = target
+                names.append(name)
+                ra[index] = math.radians(ra_hours * 15)
+                dec[index] = math.radians(dec_degrees)
+
+        altitude, azimuth = equatorial_to_horizontal(ra, dec, times, latitude, longitude)
+        return NightPlan(names, times, altitude, azimuth, self.min_altitude, ra, dec)
+
+
+def local_sidereal_time(times, longitude):
+    """Tempo sideral local, em radianos, para um vetor de instantes (time.time)."""
+    days = np.asarray(times) / 86400 + UNIX_EPOCH_JD - 2451545.0
+    gmst_hours = 18.697374558 + 24.06570982441908 * days
+    return np.radians((gmst_hours * 15 + longitude) % 360)
+
+
+def equatorial_to_horizontal(ra, dec, times, latitude, longitude):
+    """Converte coordenadas equatoriais em altitude/azimute.
+
+    Args:
+        ra (np.ndarray): ascensão reta em radianos, formato (n_alvos, n_tempos)
+        dec (np.ndarray): declinação em radianos, mesmo formato de ``ra``
+        times (np.ndarray): instantes (time.time), formato (n_tempos,)
+        latitude (float): latitude do local, em graus
+        longitude (float): longitude do local, em graus (leste positivo)
+
+    Returns:
+        tuple: (altitude, azimute) em graus, azimute medido do norte para o leste
+    """
+    phi = math.radians(latitude)
+    hour_angle = local_sidereal_time(times, longitude) - ra
+    sin_dec, cos_dec = np.sin(dec), np.cos(dec)
+    cos_ha = np.cos(hour_angle)
+    altitude = np.arcsin(math.sin(phi) * sin_dec + math.cos(phi) * cos_dec * cos_ha)
+    azimuth = np.arctan2(-cos_dec * np.sin(hour_angle), sin_dec * math.cos(phi) - cos_dec * math.sin(phi) * cos_ha)
+    return np.degrees(altitude), np.degrees(azimuth) % 360
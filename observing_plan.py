@@ -0,0 +1,411 @@
+"""Sequência de observação: ordem dos alvos e execução automática dos gotos.
+
+:class:`PlanScheduler` recebe os alvos com o tempo de permanência de cada um
+e escolhe a ordem que gasta menos tempo em slews sem sair das janelas de
+visibilidade. Começa por uma rota gulosa (vizinho mais próximo, com prioridade
+para os alvos que se põem antes) e a melhora com trocas 2-opt e realocações,
+como numa heurística do caixeiro-viajante. O tempo de cada slew vem da
+cinemática dos eixos (:class:`SlewModel`), e a visibilidade vem do
+:class:`NightPlanner`.
+
+:class:`PlanRunner` executa a sequência numa thread: faz o goto para cada
+alvo na hora prevista, detecta o fim do slew e espera o tempo de permanência
+antes de passar ao próximo.
+"""
+import math
+import queue
+import threading
+import time
+from dataclasses import dataclass
+import numpy as np
+import logandprint as log
+from night_planner import NightPlanner, local_sidereal_time
+from mount_core import MountError
+try:
+    import pythoncom
+except ImportError:  # fora do Windows não há COM (backend Alpaca)
+    pythoncom = None
+
+
+@dataclass(frozen=True)
+class PlanTarget:
+    """Alvo da sequência.
+
+    Attributes:
+        name (str): nome exibido
+        target: nome de um corpo de ``BODIES`` ou tupla (nome, ascensão reta J2000
+            em horas, declinação J2000 em graus, magnitude) de um objeto fixo
+        dwell (float): tempo de permanência no alvo, em segundos
+    """
+    name: str
+    target: object
+    dwell: float
+
+    @property
+    def planner_target(self):
+        """Alvo no formato do NightPlanner."""
+        return self.target if isinstance(self.target, str) else tuple(self.target[:3])
+
+
+@dataclass(frozen=True)
+class PlanStep:
+    """Alvo já posicionado na sequência (instantes em time.time).
+
+    Attributes:
+        target (PlanTarget): alvo
+        slew_start (float): início do slew
+        slew_time (float): duração prevista do slew, em segundos (com a acomodação)
+        start (float): início da permanência, depois do slew e de uma eventual espera
+        end (float): fim da permanência
+    """
+    target: PlanTarget
+    slew_start: float
+    slew_time: float
+    start: float
+    end: float
+
+
+@dataclass(frozen=True)
+class Schedule:
+    """Resultado do :meth:`PlanScheduler.schedule`.
+
+    Attributes:
+        steps (tuple): PlanStep na ordem de execução
+        skipped (tuple): PlanTarget que não cabem na noite ou nunca ficam visíveis
+        slew_time (float): soma das durações dos slews, em segundos
+        wait_time (float): soma das esperas até os alvos ficarem visíveis, em segundos
+    """
+    steps: tuple
+    skipped: tuple
+    slew_time: float
+    wait_time: float
+
+    @property
+    def end(self):
+        return self.steps[-1].end if self.steps else None
+
+
+class SlewModel:
+    """Tempo de slew de uma montagem equatorial a partir da cinemática dos eixos.
+
+    Cada eixo acelera até ``max_rate``, anda em velocidade constante e
+    desacelera (perfil trapezoidal); os dois eixos se movem juntos, então o
+    slew dura o tempo do eixo mais lento, mais ``settle`` segundos de acomodação.
+    Funciona com números ou vetores NumPy.
+
+    Args:
+        max_rate (float): velocidade máxima dos eixos, em graus por segundo
+        acceleration (float): aceleração dos eixos, em graus por segundo²
+        settle (float): tempo de acomodação depois do slew, em segundos
+    """
+    def __init__(self, max_rate=3.0, acceleration=2.0, settle=5.0):
+        self.max_rate = max_rate
+        self.acceleration = acceleration
+        self.settle = settle
+
+    def axis_time(self, distance):
+        distance = np.abs(distance)
+        ramp = self.max_rate ** 2 / self.acceleration
+        return np.where(distance > ramp,
+                        distance / self.max_rate + self.max_rate / self.acceleration,
+                        2 * np.sqrt(distance / self.acceleration))
+
+    def time(self, ha_from, dec_from, ha_to, dec_to):
+        """Duração do slew entre duas posições (ângulo horário e declinação em graus)."""
+        ha_distance = (np.asarray(ha_to) - ha_from + 180) % 360 - 180
+        moving = np.maximum(self.axis_time(ha_distance), self.axis_time(np.asarray(dec_to) - dec_from))
+        return np.where(moving > 0, moving + self.settle, 0.0)
+
+
+class PlanScheduler:
+    """Ordena os alvos da sequência minimizando o tempo de slew.
+
+    Args:
+        planner (NightPlanner): cálculo da visibilidade dos alvos
+        slew_model (SlewModel): tempo de slew entre dois alvos
+        max_passes (int): máximo de passadas da melhoria local
+    """
+    def __init__(self, planner=None, slew_model=None, max_passes=20):
+        self.planner = planner or NightPlanner()
+        self.slew_model = slew_model or SlewModel()
+        self.max_passes = max_passes
+
+    def schedule(self, targets, latitude, longitude, start=None, position=None):
+        """Calcula a ordem e os horários da sequência.
+
+        Args:
+            targets (list): PlanTarget a observar
+            latitude (float): latitude do local, em graus
+            longitude (float): longitude do local, em graus
+            start (float): início da sequência (time.time); agora se omitido
+            position (tuple): (ascensão reta em horas, declinação em graus) da montagem
+                no início; se omitida, o primeiro slew não é contado
+
+        Returns:
+            Schedule: sequência calculada
+        """
+        targets = list(targets)
+        start = time.time() if start is None else start
+        if not targets:
+            return Schedule((), (), 0.0, 0.0)
+        plan = self.planner.plan(latitude, longitude, [target.planner_target for target in targets], start)
+        self.prepare(plan, targets, longitude, start, position)
+        order = self.greedy(len(targets))
+        order = self.improve(order)
+        return self.build(order, targets)
+
+    # ======= Preparação
+
+    def prepare(self, plan, targets, longitude, start, position):
+        self.plan = plan
+        self.start = max(start, plan.start)
+        self.step = float(plan.times[1] - plan.times[0]) if len(plan.times) > 1 else 60.0
+        self.lst = np.degrees(local_sidereal_time(plan.times, longitude))
+        self.position = None
+        if position is not None:
+            ra, dec = position
+            index = self.index(self.start)
+            self.position = ((self.lst[index] - ra * 15) % 360, dec)
+        # startable[i, k]: o alvo i pode começar no instante k e fica visível durante toda a permanência
+        self.startable = np.zeros(plan.visible.shape, dtype=bool)
+        for i, target in enumerate(targets):
+            span = int(math.ceil(target.dwell / self.step)) + 1
+            visible = np.concatenate(([0], np.cumsum(plan.visible[i].astype(np.int32))))
+            windows = visible[span:] - visible[:-span] if span <= len(plan.times) else np.array([], dtype=np.int32)
+            self.startable[i, :len(windows)] = windows == span
+        self.dwell = np.array([target.dwell for target in targets])
+
+    def index(self, when):
+        return int(np.clip(round((when - self.plan.times[0]) / self.step), 0, len(self.plan.times) - 1))
+
+    def coordinates(self, target, when):
+        """Ângulo horário e declinação (graus) do alvo no instante."""
+        index = self.index(when)
+        return ((self.lst[index] - math.degrees(self.plan.ra[target, index])) % 360,
+                math.degrees(self.plan.dec[target, index]))
+
+    def visit(self, position, target, when):
+        """Slew, espera e início da permanência ao ir da posição até o alvo.
+
+        Returns:
+            tuple: (duração do slew, início da permanência), ou None se o alvo não
+            cabe mais na noite
+        """
+        ha, dec = self.coordinates(target, when)
+        slew = float(self.slew_model.time(*position, ha, dec)) if position is not None else 0.0
+        arrival = when + slew
+        # A visibilidade é conhecida na grade do plano: vale a do instante da grade em que o slew termina
+        first = max(int((arrival - self.plan.times[0]) // self.step), 0)
+        candidates = np.flatnonzero(self.startable[target, first:])
+        if not len(candidates):
+            return None
+        return slew, max(arrival, float(self.plan.times[first + candidates[0]]))
+
+    def deadline(self, target, when):
+        """Último instante em que o alvo ainda pode começar."""
+        candidates = np.flatnonzero(self.startable[target])
+        return float(self.plan.times[candidates[-1]]) if len(candidates) else when
+
+    # ======= Ordenação
+
+    def greedy(self, count):
+        """Rota inicial: o próximo alvo é o que começa antes, com prioridade aos que se põem logo."""
+        remaining = set(range(count))
+        order = []
+        position, now = self.position, self.start
+        while remaining:
+            best = None
+            for target in remaining:
+                visit = self.visit(position, target, now)
+                if visit is None:
+                    continue
+                slew, begin = visit
+                score = (begin - now) + 0.05 * (self.deadline(target, now) - begin)
+                if best is None or score < best[0]:
+                    best = (score, target, begin)
+            if best is None:
+                break
+            _, target, begin = best
+            order.append(target)
+            remaining.discard(target)
+            now = begin + self.dwell[target]
+            position = self.coordinates(target, now)
+        # Os alvos que não couberam ficam no fim, para a melhoria local tentar encaixá-los
+        return order + sorted(remaining)
+
+    def simulate(self, order):
+        """Percorre a ordem dada.
+
+        Returns:
+            tuple: (custo para comparar ordens, lista de (alvo, início do slew, slew, início, fim))
+        """
+        position, now = self.position, self.start
+        visits = []
+        slew_total = 0.0
+        for target in order:
+            visit = self.visit(position, target, now)
+            if visit is None:
+                continue
+            slew, begin = visit
+            visits.append((target, now, slew, begin, begin + self.dwell[target]))
+            slew_total += slew
+            now = begin + self.dwell[target]
+            position = self.coordinates(target, now)
+        # Primeiro encaixar o máximo de alvos, depois gastar menos tempo em slews e terminar antes
+        return (-len(visits), round(slew_total, 3), float(now)), visits
+
+    def improve(self, order):
+        """Melhoria local com trocas 2-opt e realocação de um alvo."""
+        best_cost, _ = self.simulate(order)
+        count = len(order)
+        for _ in range(self.max_passes):
+            improved = False
+            for i in range(count - 1):
+                for j in range(i + 1, count):
+                    candidates = (
+                        order[:i] + order[i:j + 1][::-1] + order[j + 1:],        # 2-opt
+                        order[:i] + order[i + 1:j + 1] + [order[i]] + order[j + 1:],  # leva i para depois de j
+                        order[:i] + [order[j]] + order[i:j] + order[j + 1:],      # traz j para antes de i
+                    )
+                    for candidate in candidates:
+                        cost, _ = self.simulate(candidate)
+                        if cost < best_cost:
+                            order, best_cost, improved = candidate, cost, True
+            if not improved:
+                break
+        return order
+
+    def build(self, order, targets):
+        _, visits = self.simulate(order)
+        steps = tuple(PlanStep(targets[target], slew_start, slew, begin, end)
+                      for target, slew_start, slew, begin, end in visits)
+        scheduled = {target for target, *_ in visits}
+        skipped = tuple(target for index, target in enumerate(targets) if index not in scheduled)
+        slew_time = sum(step.slew_time for step in steps)
+        wait_time = sum(step.start - step.slew_start - step.slew_time for step in steps)
+        log.debug(f"Sequência com {len(steps)} alvo(s), {len(skipped)} fora da noite, slews de {slew_time:.0f}s")
+        return Schedule(steps, skipped, slew_time, wait_time)
+
+
+class PlanRunner(threading.Thread):
+    """Executa a sequência: goto, fim do slew e permanência em cada alvo.
+
+    O progresso é publicado em ``events`` como tuplas ``(evento, índice, detalhe)``,
+    com os eventos ``goto``, ``tracking``, ``skipped``, ``finished`` e ``error``;
+    quem exibe é a interface, na thread do Tk.
+
+    O fim do slew é detectado quando a montagem deixa de informar ``Slewing``
+    e fica a menos de ``tolerance`` graus das coordenadas enviadas a ela (já
+    corrigidas pelo modelo de apontamento), ou quando ``Slewing`` volta a ser
+    falso depois de ter sido verdadeiro. Nos dois casos a montagem precisa
+    ficar parada por ``settle`` segundos. Um slew que não termina em
+    ``slew_timeout`` segundos pula o alvo, sem interromper a sequência.
+
+    Args:
+        controller (Controller): controlador principal
+        schedule (Schedule): sequência calculada pelo PlanScheduler
+        poll (float): intervalo entre as consultas durante o slew, em segundos
+        settle (float): tempo de acomodação depois do slew, em segundos
+        tolerance (float): distância máxima ao alvo, em graus, para considerar o slew concluído
+        slew_timeout (float): tempo máximo de um slew, em segundos
+        min_altitude (float): altitude mínima, em graus, na hora do goto
+    """
+    def __init__(self, controller, schedule, poll=0.5, settle=5.0, tolerance=0.5, slew_timeout=300.0, min_altitude=0.0):
+        super().__init__(name='PlanRunner', daemon=True)
+        self.controller = controller
+        self.schedule = schedule
+        self.poll = poll
+        self.settle = settle
+        self.tolerance = tolerance
+        self.slew_timeout = slew_timeout
+        self.min_altitude = min_altitude
+        self.stop_event = threading.Event()
+        self.events = queue.Queue()
+        self.slewing = False
+
+    def stop(self):
+        """Interrompe a sequência; um slew em andamento é abortado."""
+        self.stop_event.set()
+        if self.slewing:
+            try:
+                self.controller.Telescope.AbortSlew()
+            except Exception as e:
+                log.error(f"Erro ao abortar o slew da sequência: {e}")
+
+    def run(self):
+        if pythoncom:
+            pythoncom.CoInitialize()
+        try:
+            for index, step in enumerate(self.schedule.steps):
+                # Com espera até o alvo ficar visível, o slew sai o mais tarde possível
+                departure = max(step.slew_start, step.start - step.slew_time)
+                if self.stop_event.wait(max(0.0, departure - time.time())):
+                    break
+                self.visit(index, step)
+                if self.stop_event.is_set():
+                    break
+            self.events.put(('finished', None, 'interrompida' if self.stop_event.is_set() else 'concluída'))
+        except Exception as e:
+            log.error(f"Erro na sequência de observação: {e}")
+            self.events.put(('error', None, str(e)))
+        finally:
+            self.controller.gotoInProgress = False
+            if pythoncom:
+                pythoncom.CoUninitialize()
+
+    def visit(self, index, step):
+        controller = self.controller
+        self.events.put(('goto', index, None))
+        try:
+            # Coordenadas na hora do goto, com o modelo de apontamento aplicado pelo MountCore
+            resolved, future = controller.mount.goto(step.target.target, min_altitude=self.min_altitude)
+        except MountError as e:
+            log.warning(f"{e}; pulando")
+            self.events.put(('skipped', index, 'abaixo do horizonte'))
+            return
+        self.slewing = True
+        controller.gotoInProgress = True
+        controller.goto_started = time.monotonic()
+        controller.thread_update_values.wake()
+        try:
+            if future is not None:
+                future.result(self.slew_timeout)
+            # A montagem informa a posição nas coordenadas que recebeu, não nas verdadeiras
+            self.wait_slew(resolved.mount_ra, resolved.mount_dec)
+        except TimeoutError as e:
+            log.warning(f"{resolved.name}: {e}; pulando")
+            self.events.put(('skipped', index, 'o slew não terminou'))
+            return
+        finally:
+            self.slewing = False
+        if self.stop_event.is_set():
+            return
+
+        self.events.put(('tracking', index, None))
+        self.stop_event.wait(step.target.dwell)
+
+    def wait_slew(self, ra, dec):
+        """Espera o fim do slew para (ra, dec)."""
+        telescope = self.controller.Telescope
+        deadline = time.monotonic() + self.slew_timeout
+        seen_slewing = False
+        stopped_since = None
+        while not self.stop_event.wait(self.poll):
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"O slew não terminou em {self.slew_timeout:.0f}s")
+            if telescope.Slewing:
+                seen_slewing = True
+                stopped_since = None
+                continue
+            if not seen_slewing and separation(telescope.RightAscension, telescope.Declination, ra, dec) > self.tolerance:
+                continue
+            stopped_since = stopped_since or time.monotonic()
+            if time.monotonic() - stopped_since >= self.settle:
+                return
+
+
+def separation(ra1, dec1, ra2, dec2):
+    """Distância angular, em graus, entre duas posições (ascensão reta em horas, declinação em graus)."""
+    ra1, dec1, ra2, dec2 = math.radians(ra1 * 15), math.radians(dec1), math.radians(ra2 * 15), math.radians(dec2)
+    cos_distance = math.sin(dec1) * math.sin(dec2) + math.cos(dec1) * math.cos(dec2) * math.cos(ra1 - ra2)
+    return math.degrees(math.acos(max(-1.0, min(1.0, cos_distance))))
@@ -0,0 +1,275 @@
+"""Modelo de apontamento da montagem a partir de estrelas sincronizadas.
+
+O usuário faz o goto para uma estrela, centraliza a estrela com os botões de
+movimento e registra o ponto. Cada ponto guarda a posição verdadeira da
+estrela e a posição que a montagem informa depois de centralizada. A diferença
+entre as duas é ajustada por mínimos quadrados com os termos clássicos de uma
+montagem equatorial:
+
+- ``IH``, ``ID``: erro de índice (zero) dos eixos de AR e DEC;
+- ``CH``: colimação (cone), o tubo fora de perpendicular ao eixo de DEC;
+- ``NP``: eixos de AR e DEC fora de perpendicular;
+- ``MA``, ``ME``: eixo polar desalinhado em azimute e em altitude;
+- ``TF``: flexão do tubo.
+
+Os coeficientes ficam em cache até que um ponto seja acrescentado ou removido,
+e :meth:`PointingModel.correct` aplica o modelo de forma vetorizada (NumPy) a
+uma ou várias coordenadas antes de enviá-las à montagem. A montagem nunca é
+sincronizada (SyncToCoordinates), então os pontos continuam válidos entre uma
+sessão e outra enquanto o equipamento não for remontado.
+"""
+import json
+import math
+import os
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+import numpy as np
+import logandprint as log
+from night_planner import local_sidereal_time
+
+POINTING_PATH = 'pointing_model.json'
+
+# Termos na ordem em que entram no ajuste: com poucos pontos só os primeiros são usados
+TERMS = ('IH', 'ID', 'MA', 'ME', 'CH', 'NP', 'TF')
+# IH e ID entram já com uma estrela (equivale a sincronizar a montagem nela)
+BASE_TERMS = 2
+# Cada termo além de IH e ID exige duas equações a mais que as incógnitas (2 por estrela)
+REDUNDANCY = 2
+# Maior número de condição aceito, com as colunas normalizadas: acima disso as estrelas não
+# cobrem ângulo horário e declinação suficientes para separar o termo dos outros (ex.: IH, CH e
+# NP numa faixa estreita de declinação), e ele só absorveria o erro de centralização
+MAX_CONDITION = 10.0
+# Menor cosseno da declinação usado nos termos com sec(δ) e tan(δ), perto do polo
+MIN_COS_DEC = 0.05
+
+
+@dataclass(frozen=True)
+class SyncPoint:
+    """Estrela centralizada e registrada no modelo.
+
+    Attributes:
+        name (str): nome do objeto
+        ra (float): ascensão reta verdadeira, em horas
+        dec (float): declinação verdadeira, em graus
+        mount_ra (float): ascensão reta informada pela montagem, em horas
+        mount_dec (float): declinação informada pela montagem, em graus
+        lst (float): tempo sideral local no registro, em horas
+        timestamp (float): instante do registro (time.time)
+    """
+    name: str
+    ra: float
+    dec: float
+    mount_ra: float
+    mount_dec: float
+    lst: float
+    timestamp: float
+
+
+def basis(hour_angle, declination, latitude):
+    """Funções de cada termo do modelo, calculadas para vários pontos de uma vez.
+
+    Args:
+        hour_angle (np.ndarray): ângulo horário, em radianos
+        declination (np.ndarray): declinação, em radianos
+        latitude (float): latitude do local, em graus
+
+    Returns:
+        tuple: (termos do erro em ângulo horário, termos do erro em declinação),
+        cada um com formato (pontos, len(TERMS)), em graus por grau de coeficiente
+    """
+    h = np.asarray(hour_angle, dtype=float)
+    d = np.asarray(declination, dtype=float)
+    phi = math.radians(latitude or 0.0)
+    cos_d = np.cos(d)
+    cos_d = np.where(np.abs(cos_d) < MIN_COS_DEC, np.copysign(MIN_COS_DEC, cos_d), cos_d)
+    sec_d, tan_d = 1 / cos_d, np.sin(d) / cos_d
+    sin_h, cos_h = np.sin(h), np.cos(h)
+    zero, one = np.zeros_like(h), np.ones_like(h)
+    dh = np.stack([one, zero, -cos_h * tan_d, sin_h * tan_d, sec_d, tan_d, math.cos(phi) * sin_h * sec_d], axis=-1)
+    dd = np.stack([zero, one, sin_h, cos_h, zero, zero,
+                   math.cos(phi) * cos_h * np.sin(d) - math.sin(phi) * np.cos(d)], axis=-1)
+    return dh, dd
+
+
+class PointingModel:
+    """Pontos sincronizados e o modelo de apontamento ajustado a eles.
+
+    Args:
+        path (str): arquivo JSON onde os pontos são gravados, ou None para não gravar
+        latitude (float): latitude do local, em graus (atualizada a cada ponto registrado)
+    """
+    def __init__(self, path=POINTING_PATH, latitude=None):
+        self.path = path
+        self.latitude = latitude
+        self.points = []
+        self._fit = None
+
+    @classmethod
+    def load(cls, path=POINTING_PATH):
+        """Lê os pontos gravados; se o arquivo não existir, começa um modelo vazio."""
+        model = cls(path)
+        if path is None or not os.path.exists(path):
+            return model
+        try:
+            with open(path, encoding='utf-8') as source:
+                data = json.load(source)
+            model.latitude = data.get('latitude')
+            model.points = [SyncPoint(**point) for point in data.get('points', [])]
+            log.debug(f"Modelo de apontamento com {len(model.points)} ponto(s) lido de {path}")
+        except (OSError, ValueError, TypeError) as e:
+            log.error(f"Erro ao ler o modelo de apontamento {path}: {e}")
+        return model
+
+    def save(self):
+        if self.path is None:
+            return
+        try:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            fd, temp_path = tempfile.mkstemp(dir=directory, prefix='.pointing-', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as output:
+                json.dump({'latitude': self.latitude, 'points': [asdict(point) for point in self.points]},
+                          output, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            log.error(f"Erro ao gravar o modelo de apontamento em {self.path}: {e}")
+
+    def add(self, name, ra, dec, mount_ra, mount_dec, latitude, longitude, when=None):
+        """Registra uma estrela centralizada.
+
+        Args:
+            name (str): nome do objeto
+            ra (float): ascensão reta verdadeira, em horas
+            dec (float): declinação verdadeira, em graus
+            mount_ra (float): ascensão reta informada pela montagem, em horas
+            mount_dec (float): declinação informada pela montagem, em graus
+            latitude (float): latitude do local, em graus
+            longitude (float): longitude do local, em graus
+            when (float): instante do registro (time.time); agora se omitido
+
+        Returns:
+            SyncPoint: ponto registrado
+        """
+        when = time.time() if when is None else when
+        lst = math.degrees(float(local_sidereal_time(when, longitude))) / 15
+        point = SyncPoint(name, float(ra), float(dec), float(mount_ra), float(mount_dec), lst, when)
+        self.latitude = latitude
+        self.points.append(point)
+        self._fit = None
+        self.save()
+        return point
+
+    def remove(self, index):
+        del self.points[index]
+        self._fit = None
+        self.save()
+
+    def clear(self):
+        self.points = []
+        self._fit = None
+        self.save()
+
+    @property
+    def terms(self):
+        """Termos usados no ajuste (ver :meth:`fit`)."""
+        return tuple(self.fit()[0])
+
+    @staticmethod
+    def select_terms(matrix, stars):
+        """Colunas do ajuste: IH e ID, e os outros termos que as estrelas conseguem determinar.
+
+        Um termo entra, na ordem de ``TERMS``, se sobrarem ``REDUNDANCY``
+        equações além das incógnitas e se ele não for quase combinação dos já
+        escolhidos nas posições das estrelas registradas.
+
+        Args:
+            matrix (np.ndarray): equações do ajuste, formato (2 * estrelas, len(TERMS))
+            stars (int): estrelas registradas
+
+        Returns:
+            list: índices das colunas de ``TERMS`` usadas
+        """
+        columns = list(range(BASE_TERMS))
+        for column in range(BASE_TERMS, len(TERMS)):
+            if 2 * stars < len(columns) + 1 + REDUNDANCY:
+                break
+            candidate = matrix[:, columns + [column]]
+            norms = np.linalg.norm(candidate, axis=0)
+            if np.all(norms > 0) and np.linalg.cond(candidate / norms) <= MAX_CONDITION:
+                columns.append(column)
+        return columns
+
+    def fit(self):
+        """Ajusta (ou devolve do cache) os coeficientes do modelo.
+
+        Returns:
+            tuple: (dicionário termo -> coeficiente em graus, erro RMS no céu em graus),
+            ou (``{}``, None) sem pontos. O erro RMS é None quando não sobram
+            equações além das incógnitas (com uma estrela, por exemplo), já que o
+            ajuste passaria exatamente pelos pontos
+        """
+        if self._fit is not None:
+            return self._fit
+        if not self.points:
+            self._fit = ({}, None)
+            return self._fit
+        ra = np.array([point.ra for point in self.points])
+        dec = np.radians([point.dec for point in self.points])
+        lst = np.array([point.lst for point in self.points])
+        # Erros medidos: ângulo horário da montagem menos o verdadeiro, e o mesmo na declinação
+        error_h = -(((np.array([point.mount_ra for point in self.points]) - ra + 12) % 24) - 12) * 15
+        error_d = np.array([point.mount_dec for point in self.points]) - np.degrees(dec)
+        dh, dd = basis(np.radians((lst - ra) * 15), dec, self.latitude)
+        # O erro em ângulo horário vale cos(δ) no céu; assim todos os pontos pesam igual
+        cos_d = np.cos(dec)[:, None]
+        matrix = np.vstack([dh * cos_d, dd])
+        measured = np.concatenate([error_h * cos_d[:, 0], error_d])
+        columns = self.select_terms(matrix, len(self.points))
+        coefficients, _, _, _ = np.linalg.lstsq(matrix[:, columns], measured, rcond=None)
+        rms = None
+        if len(measured) > len(columns):
+            residuals = measured - matrix[:, columns] @ coefficients
+            rms = float(np.sqrt(np.sum(residuals[:len(ra)] ** 2 + residuals[len(ra):] ** 2) / (len(measured) - len(columns))))
+        self._fit = ({TERMS[column]: value for column, value in zip(columns, coefficients.tolist())}, rms)
+        log.debug(f"Modelo de apontamento ajustado: {self.describe()}")
+        return self._fit
+
+    def correct(self, ra_hours, dec_degrees, longitude, when=None):
+        """Coordenadas a enviar para a montagem apontar para as coordenadas verdadeiras.
+
+        Aceita números ou vetores NumPy (vários alvos de uma vez).
+
+        Args:
+            ra_hours: ascensão reta verdadeira, em horas
+            dec_degrees: declinação verdadeira, em graus
+            longitude (float): longitude do local, em graus
+            when (float): instante do goto (time.time); agora se omitido
+
+        Returns:
+            tuple: (ascensão reta em horas, declinação em graus) para a montagem
+        """
+        coefficients, _ = self.fit()
+        if not coefficients:
+            return ra_hours, dec_degrees
+        when = time.time() if when is None else when
+        ra = np.asarray(ra_hours, dtype=float)
+        dec = np.asarray(dec_degrees, dtype=float)
+        hour_angle = local_sidereal_time(when, longitude) - np.radians(ra * 15)
+        dh, dd = basis(hour_angle, np.radians(dec), self.latitude)
+        columns = [TERMS.index(term) for term in coefficients]
+        vector = np.array(list(coefficients.values()))
+        mount_ra = (ra - (dh[..., columns] @ vector) / 15) % 24
+        mount_dec = np.clip(dec + dd[..., columns] @ vector, -90.0, 90.0)
+        if mount_ra.ndim == 0:
+            return float(mount_ra), float(mount_dec)
+        return mount_ra, mount_dec
+
+    def describe(self):
+        """Resumo do modelo, ex.: "3 estrelas, erro RMS 1.2'"."""
+        if not self.points:
+            return "Sem estrelas registradas"
+        coefficients, rms = self.fit()
+        stars = "1 estrela" if len(self.points) == 1 else f"{len(self.points)} estrelas"
+        if rms is None:
+            return f"{stars}, {len(coefficients)} termos (sem sobra para o erro RMS)"
+        return f"{stars}, {len(coefficients)} termos, erro RMS {rms * 60:.1f}'"
@@ -0,0 +1,81 @@
+import logandprint as log
+
+
+class PollCadence:
+    """Define o intervalo entre leituras da montagem de acordo com o estado dela.
+
+    - em movimento (slew, movimento manual, goto ou indo para home): intervalo
+      rápido, ``cache_fast`` (padrão de 0,25s, ou 0,5s quando a posição exibida é
+      estimada entre as leituras pelo ``MotionEstimator``);
+    - rastreando: o tempo de atualização configurado pelo usuário (``cache``);
+    - estacionada ou parada: intervalo longo, ``cache_idle``.
+
+    Depois que um movimento termina, o intervalo rápido é mantido por
+    ``active_hold`` segundos para acompanhar a acomodação da montagem. Se o
+    driver ficar lento, o intervalo aumenta para que a leitura nunca ocupe mais
+    que ``1 / latency_factor`` do tempo da comunicação.
+
+    Args:
+        controller (Controller): controlador principal
+    """
+    MIN_INTERVAL = 0.1
+    MAX_INTERVAL = 10.0
+    LATENCY_FACTOR = 3.0
+    LATENCY_SMOOTHING = 0.2
+    ACTIVE_HOLD = 2.0
+    FAST = 0.25
+    FAST_INTERPOLATED = 0.5
+
+    def __init__(self, controller):
+        self.controller = controller
+        self.latency = None
+        self.active_until = 0.0
+        self.state = None
+
+    def update_latency(self, duration):
+        """Atualiza a média móvel exponencial do tempo de leitura."""
+        if self.latency is None:
+            self.latency = duration
+        else:
+            self.latency += self.LATENCY_SMOOTHING * (duration - self.latency)
+
+    def intervals(self):
+        """Retorna os intervalos (rápido, normal, ocioso) configurados, em segundos."""
+        base = max(float(self.controller.cache), self.MIN_INTERVAL)
+        config = self.controller.config
+        # Com a posição estimada entre leituras, o movimento continua suave com menos leituras
+        fast_default = self.FAST_INTERPOLATED if getattr(self.controller, 'motion', None) else self.FAST
+        fast = config.get_float('COMMUNICATION', 'cache_fast', min(base, fast_default))
+        idle = config.get_float('COMMUNICATION', 'cache_idle', max(base * 4, 2.0))
+        return max(fast, self.MIN_INTERVAL), base, max(idle, base)
+
+    def is_active(self, snapshot):
+        controller = self.controller
+        return (snapshot.slewing or controller.manual_slew or controller.gotoInProgress
+                or controller.going_home)
+
+    def next_interval(self, snapshot):
+        """Calcula o intervalo até a próxima leitura.
+
+        Args:
+            snapshot (MountSnapshot): última leitura da montagem
+
+        Returns:
+            float: intervalo em segundos
+        """
+        self.update_latency(snapshot.duration)
+        fast, base, idle = self.intervals()
+        if self.is_active(snapshot):
+            self.active_until = snapshot.monotonic + self.ACTIVE_HOLD
+            state, interval = 'ativo', fast
+        elif snapshot.monotonic < self.active_until:
+            state, interval = 'ativo', fast
+        elif snapshot.tracking:
+            state, interval = 'rastreando', base
+        else:
+            state, interval = 'ocioso', idle
+        interval = max(interval, min(self.latency * self.LATENCY_FACTOR, self.MAX_INTERVAL))
+        if state != self.state:
+            log.debug(f"Cadência de leitura: {state}, intervalo de {interval:.2f}s")
+            self.state = state
+        return interval
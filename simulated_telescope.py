@@ -0,0 +1,617 @@
+"""Montagem simulada, para usar o programa, medir e testar sem hardware.
+
+:class:`SimulatedTelescope` implementa, em processo, a mesma superfície do
+ITelescope do ASCOM que o controlador usa (posição, rastreamento, MoveAxis,
+SlewToTargetAsync, AbortSlew, Park/Unpark/SetPark, FindHome, AxisRates...).
+Os eixos têm velocidade máxima e aceleração limitadas, como uma montagem
+equatorial real, e cada acesso ao driver pode demorar um tempo configurável
+(latência + variação aleatória com semente fixa), imitando o OnStep na serial
+USB.
+
+Para usá-la no programa, configure ``backend = simulator`` na seção
+``[COMMUNICATION]`` do config.ini. A opção ``driver`` pode trazer parâmetros,
+por exemplo ``simulador?latency=0.03&jitter=0.01&seed=1``.
+
+Também pode ser exposta como um servidor ASCOM Alpaca (HTTP), para testar o
+backend ``alpaca``::
+
+    python simulated_telescope.py --port 11111 --latency 0.03 --jitter 0.01
+"""
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import logandprint as log
+
+# Velocidade sideral, em graus por segundo
+SIDEREAL_RATE = 360.0 / 86164.0905
+# Taxas de rastreamento (DriveRates do ASCOM) em graus por segundo
+TRACKING_RATES = {
+    0: SIDEREAL_RATE,
+    1: 14.685 / 3600,
+    2: 15.0 / 3600,
+    3: 15.0369 / 3600,
+}
+UNIX_EPOCH_JD = 2440587.5
+
+
+class SimulatorError(Exception):
+    """Erro do driver simulado, com o código de erro equivalente do ASCOM Alpaca."""
+    error_number = 0x500
+
+
+class NotConnectedError(SimulatorError):
+    error_number = 0x407
+
+
+class InvalidValueError(SimulatorError):
+    error_number = 0x401
+
+
+class ParkedError(SimulatorError):
+    error_number = 0x408
+
+
+class InvalidOperationError(SimulatorError):
+    error_number = 0x40B
+
+
+class Rate:
+    """Faixa de velocidade do AxisRates, como o IRate do ASCOM."""
+    def __init__(self, minimum, maximum):
+        self.Minimum = minimum
+        self.Maximum = maximum
+
+
+class Axis:
+    """Eixo da montagem com velocidade e aceleração limitadas.
+
+    Args:
+        position (float): posição inicial, em graus
+        max_rate (float): velocidade máxima de slew, em graus/s
+        acceleration (float): aceleração, em graus/s²
+    """
+    def __init__(self, position, max_rate, acceleration):
+        self.position = position
+        self.max_rate = max_rate
+        self.acceleration = acceleration
+        self.velocity = 0.0
+        # Velocidade pedida pelo MoveAxis (graus/s)
+        self.move_rate = 0.0
+
+    @property
+    def moving(self):
+        return self.move_rate != 0.0 or self.velocity != 0.0
+
+    def step(self, dt, target=None):
+        """Avança o eixo ``dt`` segundos em direção ao alvo ou à velocidade pedida."""
+        if target is not None:
+            error = target - self.position
+            # Velocidade que ainda permite frear até o alvo
+            desired = math.copysign(min(self.max_rate, math.sqrt(2 * self.acceleration * abs(error))), error)
+        else:
+            desired = self.move_rate
+        change = self.acceleration * dt
+        self.velocity += max(-change, min(change, desired - self.velocity))
+        self.position += self.velocity * dt
+        # Perto do alvo a discretização faz o eixo oscilar: a menos de um passo de aceleração, chega
+        if target is not None and abs(target - self.position) <= max(1e-5, change * dt) and abs(self.velocity) <= 2 * change:
+            self.position = target
+            self.velocity = 0.0
+            return True
+        if target is None and self.move_rate == 0.0 and abs(self.velocity) <= change:
+            self.velocity = 0.0
+        return False
+
+
+class SimulatedTelescope:
+    """Montagem equatorial simulada com a interface ITelescope do ASCOM.
+
+    O estado é avançado sob demanda, a cada acesso, a partir do relógio
+    ``clock``; com um relógio e um ``sleep`` virtuais a simulação fica
+    totalmente determinística.
+
+    Args:
+        latitude (float): latitude do local, em graus
+        longitude (float): longitude do local, em graus
+        latency (float): tempo médio, em segundos, de cada acesso ao driver
+        jitter (float): desvio padrão, em segundos, do tempo de cada acesso
+        seed (int): semente da variação aleatória do tempo de acesso
+        max_rate (float): velocidade máxima de slew, em graus/s
+        acceleration (float): aceleração dos eixos, em graus/s²
+        clock (callable): relógio monotônico, em segundos
+        sleep (callable): função usada para simular a latência
+        time_step (float): passo de integração do movimento, em segundos
+        serial (bool): atende um acesso por vez, como a porta serial do OnStep;
+            acessos simultâneos esperam o anterior terminar
+    """
+    def __init__(self, latitude=-23.5, longitude=-46.6, latency=0.0, jitter=0.0, seed=0,
+                 max_rate=3.0, acceleration=2.0, clock=time.monotonic, sleep=time.sleep, time_step=0.02,
+                 serial=False):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.latency = latency
+        self.jitter = jitter
+        self.random = random.Random(seed)
+        self.clock = clock
+        self.sleep = sleep
+        self.time_step = time_step
+        self.lock = threading.RLock()
+        # Porta compartilhada pelos acessos quando ``serial`` está ligado
+        self.port = threading.Lock() if serial else None
+        # Horário civil correspondente ao relógio monotônico, para o tempo sideral
+        self.epoch = time.time() - clock()
+        self.last_update = clock()
+        self.calls = {}
+
+        pole = 90.0 if latitude >= 0 else -90.0
+        # Eixos: ângulo horário (graus) e declinação; home com o tubo apontando para o polo
+        self.home_position = (0.0, pole)
+        self.park_position = self.home_position
+        self.ha_axis = Axis(self.home_position[0], max_rate, acceleration)
+        self.dec_axis = Axis(self.home_position[1], max_rate, acceleration)
+
+        self._connected = False
+        self._tracking = False
+        self._tracking_rate = 0
+        self._at_park = True
+        self._parking = False
+        self._homing = False
+        self._target_ra = None
+        self._target_dec = None
+        self._slew_target = None
+
+    @classmethod
+    def from_device_id(cls, device_id):
+        """Cria a montagem a partir do ``driver`` do config.ini (ex.: ``simulador?latency=0.03``)."""
+        _, _, query = (device_id or '').partition('?')
+        options = {}
+        for key, value in parse_qsl(query):
+            if key == 'serial':
+                options[key] = value.strip().lower() in ('1', 'true', 'yes')
+            else:
+                options[key] = int(value) if key == 'seed' else float(value)
+        return cls(**options)
+
+    # ======= Infraestrutura
+
+    def _round_trip(self, member):
+        """Conta o acesso, simula o tempo de comunicação e avança a simulação."""
+        self.calls[member] = self.calls.get(member, 0) + 1
+        if self.latency or self.jitter:
+            with self.lock:
+                delay = max(0.0, self.random.gauss(self.latency, self.jitter))
+            if self.port is not None:
+                with self.port:
+                    self.sleep(delay)
+            else:
+                self.sleep(delay)
+        self._update()
+
+    def _check_connected(self):
+        if not self._connected:
+            raise NotConnectedError("Montagem simulada desconectada")
+
+    def _check_unparked(self):
+        if self._at_park:
+            raise ParkedError("A montagem está estacionada")
+
+    def reset_calls(self):
+        """Zera a contagem de acessos por membro do driver."""
+        self.calls = {}
+
+    def sidereal_time(self, when=None):
+        """Tempo sideral local, em graus, no instante ``when`` do relógio (o atual se None)."""
+        when = self.clock() if when is None else when
+        days = (when + self.epoch) / 86400 + UNIX_EPOCH_JD - 2451545.0
+        return (280.46061837 + 360.98564736629 * days + self.longitude) % 360
+
+    def _update(self):
+        """Avança os eixos até o instante atual."""
+        with self.lock:
+            now = self.clock()
+            elapsed = now - self.last_update
+            self.last_update = now
+            if elapsed <= 0:
+                return
+            tracking_rate = TRACKING_RATES[self._tracking_rate] if self._tracking else 0.0
+            if self._slew_target is None and not (self.ha_axis.moving or self.dec_axis.moving):
+                # Parada: só o rastreamento muda o ângulo horário
+                self.ha_axis.position = self._wrap_ha(self.ha_axis.position + tracking_rate * elapsed)
+                return
+            steps = max(1, int(math.ceil(elapsed / self.time_step)))
+            dt = elapsed / steps
+            for step in range(1, steps + 1):
+                self.ha_axis.position += tracking_rate * dt
+                ha_target = dec_target = None
+                if self._slew_target is not None:
+                    ha_target, dec_target = self._slew_target_axes(now - elapsed + step * dt)
+                ha_done = self.ha_axis.step(dt, ha_target)
+                dec_done = self.dec_axis.step(dt, dec_target)
+                if self._slew_target is not None and ha_done and dec_done:
+                    self._finish_slew()
+            self.ha_axis.position = self._wrap_ha(self.ha_axis.position)
+
+    def _slew_target_axes(self, when):
+        """Posição dos eixos para o alvo atual do slew (o ângulo horário muda com o tempo)."""
+        kind, first, second = self._slew_target
+        if kind == 'radec':
+            ha = self._wrap_ha(self.sidereal_time(when) - first * 15)
+            # O alvo sai do caminho mais curto a partir da posição atual do eixo
+            ha = self.ha_axis.position + self._wrap_ha(ha - self.ha_axis.position)
+            return ha, second
+        return first, second
+
+    def _finish_slew(self):
+        kind = self._slew_target[0]
+        self._slew_target = None
+        if kind == 'park':
+            self._at_park = True
+            self._parking = False
+            log.debug("Montagem simulada estacionada")
+        elif kind == 'home':
+            self._homing = False
+
+    @staticmethod
+    def _wrap_ha(ha):
+        return (ha + 180.0) % 360.0 - 180.0
+
+    def _start_slew(self, kind, first, second):
+        self.ha_axis.move_rate = 0.0
+        self.dec_axis.move_rate = 0.0
+        self._slew_target = (kind, first, second)
+
+    def _horizontal(self):
+        """Altitude e azimute, em graus, da posição atual."""
+        phi = math.radians(self.latitude)
+        ha = math.radians(self.ha_axis.position)
+        dec = math.radians(self.dec_axis.position)
+        altitude = math.asin(math.sin(phi) * math.sin(dec) + math.cos(phi) * math.cos(dec) * math.cos(ha))
+        azimuth = math.atan2(-math.cos(dec) * math.sin(ha),
+                             math.sin(dec) * math.cos(phi) - math.cos(dec) * math.sin(phi) * math.cos(ha))
+        return math.degrees(altitude), math.degrees(azimuth) % 360
+
+    # ======= Conexão e características
+
+    @property
+    def Connected(self):
+        self._round_trip('Connected')
+        return self._connected
+
+    @Connected.setter
+    def Connected(self, value):
+        self._round_trip('Connected')
+        self._connected = bool(value)
+
+    Name = 'OnStep simulado'
+    Description = 'Montagem equatorial simulada do Telescope Controller'
+    DriverVersion = '1.0'
+    CanFindHome = True
+    CanPark = True
+    CanUnpark = True
+    CanSetPark = True
+    CanSlewAsync = True
+    CanMoveAxis = True
+
+    @property
+    def SiteLatitude(self):
+        self._round_trip('SiteLatitude')
+        return self.latitude
+
+    @property
+    def SiteLongitude(self):
+        self._round_trip('SiteLongitude')
+        return self.longitude
+
+    def AxisRates(self, Axis):
+        self._round_trip('AxisRates')
+        if int(Axis) not in (0, 1):
+            raise InvalidValueError(f"Eixo inválido: {Axis}")
+        return [Rate(0.0, self.ha_axis.max_rate)]
+
+    # ======= Posição
+
+    @property
+    def RightAscension(self):
+        self._round_trip('RightAscension')
+        self._check_connected()
+        return ((self.sidereal_time() - self.ha_axis.position) % 360) / 15
+
+    @property
+    def Declination(self):
+        self._round_trip('Declination')
+        self._check_connected()
+        return self.dec_axis.position
+
+    @property
+    def Altitude(self):
+        self._round_trip('Altitude')
+        self._check_connected()
+        return self._horizontal()[0]
+
+    @property
+    def Azimuth(self):
+        self._round_trip('Azimuth')
+        self._check_connected()
+        return self._horizontal()[1]
+
+    # ======= Estado
+
+    @property
+    def Slewing(self):
+        self._round_trip('Slewing')
+        self._check_connected()
+        return self._slew_target is not None or self.ha_axis.moving or self.dec_axis.moving
+
+    @property
+    def AtPark(self):
+        self._round_trip('AtPark')
+        self._check_connected()
+        return self._at_park
+
+    @property
+    def AtHome(self):
+        self._round_trip('AtHome')
+        self._check_connected()
+        return (not self.ha_axis.moving and not self.dec_axis.moving
+                and abs(self.ha_axis.position - self.home_position[0]) < 1e-3
+                and abs(self.dec_axis.position - self.home_position[1]) < 1e-3)
+
+    @property
+    def Tracking(self):
+        self._round_trip('Tracking')
+        self._check_connected()
+        return self._tracking
+
+    @Tracking.setter
+    def Tracking(self, value):
+        self._round_trip('Tracking')
+        self._check_connected()
+        if value:
+            self._check_unparked()
+        self._tracking = bool(value)
+
+    @property
+    def TrackingRate(self):
+        self._round_trip('TrackingRate')
+        self._check_connected()
+        return self._tracking_rate
+
+    @TrackingRate.setter
+    def TrackingRate(self, value):
+        self._round_trip('TrackingRate')
+        self._check_connected()
+        if int(value) not in TRACKING_RATES:
+            raise InvalidValueError(f"Taxa de rastreamento inválida: {value}")
+        self._tracking_rate = int(value)
+
+    # ======= Movimentos
+
+    @property
+    def TargetRightAscension(self):
+        self._round_trip('TargetRightAscension')
+        if self._target_ra is None:
+            raise InvalidOperationError("Ascensão reta do alvo não definida")
+        return self._target_ra
+
+    @TargetRightAscension.setter
+    def TargetRightAscension(self, value):
+        self._round_trip('TargetRightAscension')
+        self._check_connected()
+        if not 0 <= float(value) < 24:
+            raise InvalidValueError(f"Ascensão reta inválida: {value}")
+        self._target_ra = float(value)
+
+    @property
+    def TargetDeclination(self):
+        self._round_trip('TargetDeclination')
+        if self._target_dec is None:
+            raise InvalidOperationError("Declinação do alvo não definida")
+        return self._target_dec
+
+    @TargetDeclination.setter
+    def TargetDeclination(self, value):
+        self._round_trip('TargetDeclination')
+        self._check_connected()
+        if not -90 <= float(value) <= 90:
+            raise InvalidValueError(f"Declinação inválida: {value}")
+        self._target_dec = float(value)
+
+    def SlewToTargetAsync(self):
+        self._round_trip('SlewToTargetAsync')
+        self._check_connected()
+        self._check_unparked()
+        if self._target_ra is None or self._target_dec is None:
+            raise InvalidOperationError("Alvo não definido")
+        with self.lock:
+            self._start_slew('radec', self._target_ra, self._target_dec)
+
+    def AbortSlew(self):
+        self._round_trip('AbortSlew')
+        self._check_connected()
+        with self.lock:
+            self._slew_target = None
+            self._parking = False
+            self._homing = False
+            self.ha_axis.move_rate = 0.0
+            self.dec_axis.move_rate = 0.0
+
+    def MoveAxis(self, Axis, Rate):
+        self._round_trip('MoveAxis')
+        self._check_connected()
+        self._check_unparked()
+        rate = float(Rate)
+        if abs(rate) > self.ha_axis.max_rate:
+            raise InvalidValueError(f"Velocidade fora da faixa: {Rate}")
+        with self.lock:
+            self._slew_target = None
+            if int(Axis) == 0:
+                # Velocidade positiva aumenta a ascensão reta, ou seja, diminui o ângulo horário
+                self.ha_axis.move_rate = -rate
+            elif int(Axis) == 1:
+                self.dec_axis.move_rate = rate
+            else:
+                raise InvalidValueError(f"Eixo inválido: {Axis}")
+
+    def Park(self):
+        self._round_trip('Park')
+        self._check_connected()
+        if self._at_park:
+            return
+        with self.lock:
+            self._tracking = False
+            self._parking = True
+            self._start_slew('park', *self.park_position)
+
+    def Unpark(self):
+        self._round_trip('Unpark')
+        self._check_connected()
+        self._at_park = False
+
+    def SetPark(self):
+        self._round_trip('SetPark')
+        self._check_connected()
+        self.park_position = (self.ha_axis.position, self.dec_axis.position)
+
+    def FindHome(self):
+        self._round_trip('FindHome')
+        self._check_connected()
+        self._check_unparked()
+        with self.lock:
+            self._tracking = False
+            self._homing = True
+            self._start_slew('home', *self.home_position)
+
+
+class AlpacaRequestHandler(BaseHTTPRequestHandler):
+    """Requisições ASCOM Alpaca para a montagem simulada (dispositivo 0)."""
+    server_version = 'TelescopeControllerSimulator/1.0'
+    # Conexões keep-alive, como nos servidores Alpaca reais
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo saem em envios separados; com o Nagle ligado, o segundo esperaria o ACK
+    # atrasado do cliente (~40ms) em toda resposta de uma conexão keep-alive
+    disable_nagle_algorithm = True
+    BASE = '/api/v1/telescope/0/'
+    # Tipos dos parâmetros aceitos nos PUT
+    PARAM_TYPES = {
+        'connected': 'bool', 'tracking': 'bool', 'trackingrate': 'int', 'axis': 'int', 'rate': 'float',
+        'targetrightascension': 'float', 'targetdeclination': 'float',
+    }
+    # Nomes das propriedades e métodos do ITelescope, em minúsculas, como aparecem na URL
+    MEMBERS = {name.lower(): name for name in dir(SimulatedTelescope) if name[:1].isupper()}
+
+    def log_message(self, format, *args):
+        log.debug(f"Alpaca simulado: {format % args}")
+
+    def do_GET(self):
+        self.handle_request('GET', dict(parse_qsl(urlsplit(self.path).query)))
+
+    def do_PUT(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        self.handle_request('PUT', dict(parse_qsl(self.rfile.read(length).decode('utf-8'))))
+
+    def handle_request(self, method, params):
+        path = urlsplit(self.path).path
+        params = {key.lower(): value for key, value in params.items()}
+        if path == '/management/apiversions':
+            return self.reply(params, [1])
+        if path == '/management/v1/configureddevices':
+            return self.reply(params, [{'DeviceName': SimulatedTelescope.Name, 'DeviceType': 'Telescope',
+                                        'DeviceNumber': 0, 'UniqueID': 'telescope-controller-simulator'}])
+        if path == '/management/v1/description':
+            return self.reply(params, {'ServerName': 'Telescope Controller', 'Manufacturer': 'Telescope Controller',
+                                       'ManufacturerVersion': SimulatedTelescope.DriverVersion, 'Location': 'Simulador'})
+        member = self.MEMBERS.get(path[len(self.BASE):].lower()) if path.startswith(self.BASE) else None
+        if member is None:
+            self.send_error(404)
+            return
+        telescope = self.server.telescope
+        attribute = getattr(SimulatedTelescope, member)
+        try:
+            if method == 'GET':
+                if member == 'AxisRates':
+                    value = [{'Minimum': rate.Minimum, 'Maximum': rate.Maximum}
+                             for rate in telescope.AxisRates(self.convert('axis', params))]
+                elif callable(attribute):
+                    raise InvalidOperationError(f"{member} deve ser chamado com PUT")
+                else:
+                    value = getattr(telescope, member)
+                self.reply(params, value)
+            elif isinstance(attribute, property):
+                setattr(telescope, member, self.convert(member.lower(), params))
+                self.reply(params)
+            elif member == 'MoveAxis':
+                telescope.MoveAxis(self.convert('axis', params), self.convert('rate', params))
+                self.reply(params)
+            elif callable(attribute):
+                getattr(telescope, member)()
+                self.reply(params)
+            else:
+                raise InvalidOperationError(f"{member} é somente leitura")
+        except SimulatorError as e:
+            self.reply(params, error=(e.error_number, str(e)))
+        except (KeyError, ValueError) as e:
+            self.reply(params, error=(InvalidValueError.error_number, f"Parâmetro inválido: {e}"))
+
+    def convert(self, name, params):
+        value = params[name]
+        kind = self.PARAM_TYPES.get(name, 'float')
+        if kind == 'bool':
+            return value.strip().lower() == 'true'
+        return int(value) if kind == 'int' else float(value)
+
+    def reply(self, params, value=None, error=(0, '')):
+        with self.server.lock:
+            self.server.transaction_id += 1
+            transaction_id = self.server.transaction_id
+        body = {
+            'ClientTransactionID': int(params.get('clienttransactionid', 0) or 0),
+            'ServerTransactionID': transaction_id,
+            'ErrorNumber': error[0],
+            'ErrorMessage': error[1],
+        }
+        if value is not None:
+            body['Value'] = value
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def serve_alpaca(telescope, host='127.0.0.1', port=11111):
+    """Cria o servidor Alpaca HTTP da montagem simulada (use ``serve_forever`` para atender).
+
+    Returns:
+        ThreadingHTTPServer: servidor criado
+    """
+    server = ThreadingHTTPServer((host, port), AlpacaRequestHandler)
+    server.telescope = telescope
+    server.transaction_id = 0
+    server.lock = threading.Lock()
+    return server
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Servidor ASCOM Alpaca com uma montagem simulada")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=11111)
+    parser.add_argument('--latency', type=float, default=0.0, help="tempo médio de cada acesso, em segundos")
+    parser.add_argument('--jitter', type=float, default=0.0, help="variação do tempo de cada acesso, em segundos")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--latitude', type=float, default=-23.5)
+    parser.add_argument('--longitude', type=float, default=-46.6)
+    args = parser.parse_args()
+    simulated = SimulatedTelescope(latitude=args.latitude, longitude=args.longitude,
+                                   latency=args.latency, jitter=args.jitter, seed=args.seed)
+    httpd = serve_alpaca(simulated, args.host, args.port)
+    print(f"Montagem simulada em http://{args.host}:{args.port}{AlpacaRequestHandler.BASE}")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        httpd.server_close()
@@ -0,0 +1,170 @@
+import math
+import numpy as np
+import logandprint as log
+from catalog import Catalog
+
+
+class SkyIndex:
+    """Índice espacial de objetos do céu para buscas em cone.
+
+    O céu é dividido em faixas de declinação de ``cell_degrees`` graus, e cada
+    faixa em células de ascensão reta com largura proporcional a cos(dec), de
+    modo que as células têm área parecida. Os objetos ficam ordenados por
+    célula, com um vetor de posições de início de cada célula. Uma busca só
+    examina as células que encostam no cone e confere a distância exata com
+    vetores unitários, numa única operação vetorizada.
+
+    Args:
+        ra_hours (np.ndarray): ascensão reta dos objetos, em horas
+        dec_degrees (np.ndarray): declinação dos objetos, em graus
+        cell_degrees (float): tamanho aproximado das células, em graus
+    """
+    def __init__(self, ra_hours, dec_degrees, cell_degrees=2.0):
+        self.cell_degrees = cell_degrees
+        ra = np.radians(np.asarray(ra_hours, dtype=np.float64) * 15)
+        dec = np.radians(np.asarray(dec_degrees, dtype=np.float64))
+        self.vectors = np.column_stack((np.cos(dec) * np.cos(ra), np.cos(dec) * np.sin(ra), np.sin(dec)))
+
+        self.n_bands = int(math.ceil(180 / cell_degrees))
+        band_centers = -90 + (np.arange(self.n_bands) + 0.5) * 180 / self.n_bands
+        self.band_cells = np.maximum(1, np.floor(360 * np.cos(np.radians(band_centers)) / cell_degrees)).astype(np.int64)
+        self.band_start = np.concatenate(([0], np.cumsum(self.band_cells)))
+
+        cells = self.cell_of(np.degrees(ra) % 360, np.degrees(dec))
+        self.order = np.argsort(cells, kind='stable')
+        self.cell_start = np.searchsorted(cells[self.order], np.arange(self.band_start[-1] + 1))
+
+    def __len__(self):
+        return len(self.vectors)
+
+    def band_of(self, dec_degrees):
+        return np.clip(((np.asarray(dec_degrees) + 90) * self.n_bands / 180).astype(np.int64), 0, self.n_bands - 1)
+
+    def cell_of(self, ra_degrees, dec_degrees):
+        """Número da célula de cada par (ascensão reta, declinação), em graus."""
+        band = self.band_of(dec_degrees)
+        ra_cell = (np.asarray(ra_degrees) * self.band_cells[band] / 360).astype(np.int64)
+        return self.band_start[band] + np.minimum(ra_cell, self.band_cells[band] - 1)
+
+    def candidates(self, ra_degrees, dec_degrees, radius):
+        """Posições (em ``order``) dos objetos das células que encostam no cone."""
+        low, high = max(dec_degrees - radius, -90.0), min(dec_degrees + radius, 90.0)
+        # Maior afastamento em ascensão reta de um ponto do cone; o cone inteiro se ele contém um polo
+        if radius < 90 - abs(dec_degrees):
+            half_width = math.degrees(math.asin(math.sin(math.radians(radius)) / math.cos(math.radians(dec_degrees))))
+        else:
+            half_width = 180.0
+        slices = []
+        for band in range(int(self.band_of(low)), int(self.band_of(high)) + 1):
+            cells = int(self.band_cells[band])
+            first = int(self.band_start[band])
+            if half_width >= 180 or cells == 1:
+                slices.append((first, first + cells))
+                continue
+            start = int(((ra_degrees - half_width) % 360) * cells / 360)
+            end = int(((ra_degrees + half_width) % 360) * cells / 360)
+            if ra_degrees - half_width >= 0 and ra_degrees + half_width < 360:
+                slices.append((first + start, first + end + 1))
+            else:
+                # O cone atravessa 0h: duas faixas de células
+                slices.append((first + start, first + cells))
+                slices.append((first, first + end + 1))
+        ranges = [np.arange(self.cell_start[a], self.cell_start[b]) for a, b in slices]
+        return np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+
+    def cone(self, ra_hours, dec_degrees, radius):
+        """Objetos a até ``radius`` graus de um ponto.
+
+        Args:
+            ra_hours (float): ascensão reta do centro, em horas
+            dec_degrees (float): declinação do centro, em graus
+            radius (float): raio do cone, em graus
+
+        Returns:
+            tuple: (índices dos objetos, distâncias em graus), em ordem de distância
+        """
+        ra = math.radians(ra_hours * 15)
+        dec = math.radians(dec_degrees)
+        center = np.array((math.cos(dec) * math.cos(ra), math.cos(dec) * math.sin(ra), math.sin(dec)))
+        indices = self.order[self.candidates(math.degrees(ra) % 360, dec_degrees, radius)]
+        cosines = self.vectors[indices] @ center
+        inside = cosines >= math.cos(math.radians(radius))
+        indices = indices[inside]
+        distances = np.degrees(np.arccos(np.clip(cosines[inside], -1.0, 1.0)))
+        order = np.argsort(distances)
+        return indices[order], distances[order]
+
+    def nearest(self, ra_hours, dec_degrees, radii=(5.0, 15.0, 45.0, 180.0)):
+        """Objeto mais próximo de um ponto, ampliando o cone até encontrar algum.
+
+        Returns:
+            tuple: (índice do objeto, distância em graus) ou None se o índice está vazio
+        """
+        for radius in radii:
+            indices, distances = self.cone(ra_hours, dec_degrees, radius)
+            if len(indices):
+                return int(indices[0]), float(distances[0])
+        return None
+
+
+class NearbyObjects:
+    """Objetos do catálogo perto de onde a montagem está apontando.
+
+    Monta dois índices: um com todos os objetos do catálogo e outro só com as
+    estrelas brilhantes usadas para alinhamento. É consultado pela thread de
+    atualização a cada leitura; se a montagem não se mexeu, repete o último
+    resultado.
+
+    Args:
+        catalog (Catalog): catálogo aberto; o padrão é aberto se None
+        radius (float): raio, em graus, da busca por objetos próximos
+        limit (int): quantidade máxima de objetos próximos retornados
+        star_magnitude (float): magnitude máxima das estrelas de alinhamento
+    """
+    STAR_KINDS = ('Estrela',)
+
+    def __init__(self, catalog=None, radius=2.0, limit=3, star_magnitude=2.5):
+        self.catalog = Catalog() if catalog is None else catalog
+        self.radius = radius
+        self.limit = limit
+        ra, dec, mag, kind = self.catalog.columns()
+        self.objects = SkyIndex(ra, dec)
+        star_kinds = [self.catalog.kinds.index(name) for name in self.STAR_KINDS if name in self.catalog.kinds]
+        self.stars = np.flatnonzero(np.isin(kind, star_kinds) & (mag <= star_magnitude))
+        self.star_index = SkyIndex(ra[self.stars], dec[self.stars], cell_degrees=10.0)
+        self.names = {}
+        self.last_pointing = None
+        self.last_result = None
+        log.debug(f"Índice espacial com {len(self.objects)} objetos e {len(self.stars)} estrelas de alinhamento")
+
+    def name(self, index):
+        name = self.names.get(index)
+        if name is None:
+            if len(self.names) >= 1024:
+                self.names.clear()
+            name = self.names[index] = self.catalog.entry(index).name
+        return name
+
+    def around(self, ra_hours, dec_degrees):
+        """Objetos próximos e estrela de alinhamento mais próxima do ponto.
+
+        Args:
+            ra_hours (float): ascensão reta, em horas
+            dec_degrees (float): declinação, em graus
+
+        Returns:
+            tuple: (tupla de pares (nome, distância em graus) dos objetos próximos,
+            par (nome, distância) da estrela mais próxima ou None)
+        """
+        pointing = (round(ra_hours, 4), round(dec_degrees, 3))
+        if pointing == self.last_pointing:
+            return self.last_result
+        indices, distances = self.objects.cone(ra_hours, dec_degrees, self.radius)
+        nearby = tuple((self.name(int(index)), float(distance))
+                       for index, distance in zip(indices[:self.limit], distances[:self.limit]))
+        star = self.star_index.nearest(ra_hours, dec_degrees)
+        if star is not None:
+            star = (self.name(int(self.stars[star[0]])), star[1])
+        self.last_pointing = pointing
+        self.last_result = (nearby, star)
+        return self.last_result
@@ -0,0 +1,226 @@
+import os
+import struct
+import threading
+import time
+import numpy as np
+import logandprint as log
+
+# Uma linha por leitura da montagem
+TELEMETRY_DTYPE = np.dtype([
+    ('timestamp', '<f8'),
+    ('right_ascension', '<f8'),
+    ('declination', '<f8'),
+    ('azimuth', '<f8'),
+    ('altitude', '<f8'),
+    ('duration', '<f4'),
+    ('tracking_rate', 'u1'),
+    ('flags', 'u1'),
+])
+
+# Bits do campo flags
+TRACKING = 1
+AT_PARK = 2
+AT_HOME = 4
+SLEWING = 8
+MANUAL_SLEW = 16
+GOTO = 32
+
+MAGIC = b'TCTELEM\0'
+VERSION = 1
+# magic, versão, tamanho da linha, início da sessão (time.time)
+HEADER = struct.Struct('<8sIId')
+
+TELEMETRY_DIR = 'telemetry'
+
+
+class TelemetryRecorder:
+    """Guarda as leituras da montagem num buffer circular e num arquivo de sessão.
+
+    O buffer tem tamanho fixo (``capacity`` linhas de ``TELEMETRY_DTYPE``) e é
+    sobrescrito em círculo, então a memória usada não cresce durante a noite.
+    A cada ``chunk`` linhas novas, elas são acrescentadas de uma vez ao arquivo
+    binário da sessão, que nunca é reescrito. O arquivo pode ser aberto depois
+    com :func:`load_session`, sem carregá-lo inteiro na memória.
+
+    Args:
+        path (str): arquivo da sessão; se None, só o buffer em memória é usado
+        capacity (int): quantidade de linhas do buffer circular
+        chunk (int): quantidade de linhas acumuladas antes de gravar no arquivo
+    """
+    def __init__(self, path=None, capacity=36000, chunk=600):
+        if chunk > capacity:
+            raise ValueError("O bloco de gravação não pode ser maior que o buffer")
+        self.path = path
+        self.capacity = capacity
+        self.chunk = chunk
+        self.buffer = np.zeros(capacity, dtype=TELEMETRY_DTYPE)
+        self.lock = threading.Lock()
+        # Total de linhas já recebidas e total de linhas já gravadas no arquivo
+        self.count = 0
+        self.flushed = 0
+        self.dropped = 0
+        if path is not None:
+            self._create_file()
+
+    @classmethod
+    def for_session(cls, config):
+        """Cria o gravador da sessão atual conforme a seção [TELEMETRY] do config.ini.
+
+        A gravação em arquivo só acontece com ``record = true``. A pasta
+        (``directory``, padrão ``telemetry``), se relativa, fica ao lado do
+        config.ini, e não na pasta de onde o programa foi aberto.
+
+        Returns:
+            TelemetryRecorder: gravador com arquivo na pasta de telemetria ou só
+            em memória, se ``record`` estiver desligado
+        """
+        path = None
+        if config.get_bool('TELEMETRY', 'record', False):
+            directory = config.get('TELEMETRY', 'directory') or TELEMETRY_DIR
+            directory = os.path.join(os.path.dirname(os.path.abspath(config.path)), directory)
+            try:
+                os.makedirs(directory, exist_ok=True)
+                path = os.path.join(directory, time.strftime('session-%Y%m%d-%H%M%S.tlm'))
+            except OSError as e:
+                log.error(f"Não foi possível criar a pasta de telemetria {directory}: {e}")
+        try:
+            return cls(path)
+        except OSError as e:
+            log.error(f"Não foi possível criar o arquivo de telemetria {path}: {e}")
+            return cls()
+
+    def _create_file(self):
+        with open(self.path, 'xb') as session:
+            session.write(HEADER.pack(MAGIC, VERSION, TELEMETRY_DTYPE.itemsize, time.time()))
+        log.debug(f"Gravando telemetria em {self.path}")
+
+    def append(self, snapshot, manual_slew=False, goto=False):
+        """Acrescenta uma leitura ao buffer e grava o bloco no arquivo quando completo.
+
+        Args:
+            snapshot (MountSnapshot): leitura da montagem
+            manual_slew (bool): se um movimento manual está em andamento
+            goto (bool): se um goto está em andamento
+        """
+        flags = ((TRACKING if snapshot.tracking else 0) | (AT_PARK if snapshot.at_park else 0)
+                 | (AT_HOME if snapshot.at_home else 0) | (SLEWING if snapshot.slewing else 0)
+                 | (MANUAL_SLEW if manual_slew else 0) | (GOTO if goto else 0))
+        with self.lock:
+            self.buffer[self.count % self.capacity] = (
+                snapshot.timestamp, snapshot.right_ascension, snapshot.declination, snapshot.azimuth,
+                snapshot.altitude, snapshot.duration, snapshot.tracking_rate, flags)
+            self.count += 1
+            if self.path is not None and self.count - self.flushed >= self.chunk:
+                self._flush()
+
+    def flush(self):
+        """Grava no arquivo as linhas que ainda não foram gravadas."""
+        with self.lock:
+            if self.path is not None and self.count > self.flushed:
+                self._flush()
+
+    def _flush(self):
+        pending = self.count - self.flushed
+        if pending > self.capacity:
+            # O buffer deu a volta antes de ser gravado; as linhas mais antigas se perderam
+            self.dropped += pending - self.capacity
+            self.flushed = self.count - self.capacity
+        rows = self._rows(self.flushed, self.count)
+        try:
+            with open(self.path, 'ab') as session:
+                session.write(rows.tobytes())
+            self.flushed = self.count
+        except OSError as e:
+            log.error(f"Erro ao gravar a telemetria em {self.path}: {e}")
+
+    def _rows(self, start, end):
+        """Linhas de ``start`` até ``end`` (contagem total), em ordem cronológica."""
+        first, last = start % self.capacity, end % self.capacity
+        if end - start == 0:
+            return self.buffer[:0]
+        if first < last:
+            return self.buffer[first:last]
+        return np.concatenate((self.buffer[first:], self.buffer[:last]))
+
+    def recent(self, rows=None):
+        """Cópia das últimas leituras em memória, da mais antiga para a mais nova.
+
+        Args:
+            rows (int): quantidade de linhas; todas as que estão no buffer se None
+
+        Returns:
+            np.ndarray: linhas com ``TELEMETRY_DTYPE``
+        """
+        with self.lock:
+            available = min(self.count, self.capacity)
+            rows = available if rows is None else min(rows, available)
+            return self._rows(self.count - rows, self.count).copy()
+
+    def close(self):
+        self.flush()
+
+
+def load_session(path):
+    """Abre um arquivo de sessão de telemetria com mmap.
+
+    Args:
+        path (str): arquivo gravado pelo ``TelemetryRecorder``
+
+    Returns:
+        tuple: (início da sessão em time.time, ``np.memmap`` com ``TELEMETRY_DTYPE``)
+    """
+    with open(path, 'rb') as session:
+        magic, version, row_size, started = HEADER.unpack(session.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or row_size != TELEMETRY_DTYPE.itemsize:
+        raise ValueError(f"Arquivo de telemetria inválido: {path}")
+    # Uma linha incompleta no fim (programa fechado no meio da gravação) é ignorada
+    rows = (os.path.getsize(path) - HEADER.size) // row_size
+    if rows == 0:
+        return started, np.zeros(0, dtype=TELEMETRY_DTYPE)
+    return started, np.memmap(path, dtype=TELEMETRY_DTYPE, mode='r', offset=HEADER.size, shape=(rows,))
+
+
+FLAG_NAMES = ((TRACKING, 'rastreando'), (AT_PARK, 'estacionado'), (AT_HOME, 'home'), (SLEWING, 'slew'),
+              (MANUAL_SLEW, 'manual'), (GOTO, 'goto'))
+
+
+def export_csv(path, output, chunk=50000):
+    """Exporta uma sessão de telemetria para CSV (separado por ponto e vírgula).
+
+    Além dos valores da montagem (época da data), cada linha traz as
+    coordenadas em sexagesimal e convertidas para J2000, calculadas em blocos
+    de ``chunk`` linhas.
+
+    Args:
+        path (str): arquivo gravado pelo ``TelemetryRecorder``
+        output (str): arquivo CSV a criar
+
+    Returns:
+        int: número de linhas exportadas
+    """
+    from astrometry import format_degrees, format_hours, jnow_to_j2000
+    _, data = load_session(path)
+    with open(output, 'w', encoding='utf-8', newline='') as csvfile:
+        csvfile.write('horario;ra;dec;ra_hms;dec_dms;ra_j2000;dec_j2000;azimute;altitude;taxa;estado\n')
+        for start in range(0, len(data), chunk):
+            rows = np.array(data[start:start + chunk])
+            ra_j2000, dec_j2000 = jnow_to_j2000(rows['right_ascension'], rows['declination'], rows['timestamp'])
+            columns = zip(rows['timestamp'], rows['right_ascension'], rows['declination'],
+                          format_hours(rows['right_ascension'], 1), format_degrees(rows['declination']),
+                          format_hours(ra_j2000, 1), format_degrees(dec_j2000),
+                          rows['azimuth'], rows['altitude'], rows['tracking_rate'], rows['flags'])
+            csvfile.writelines(
+                f"{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))};{ra:.6f};{dec:.5f};"
+                f"{ra_hms};{dec_dms};{ra_old};{dec_old};{az:.4f};{alt:.4f};{rate};"
+                f"{','.join(name for bit, name in FLAG_NAMES if flags & bit)}\n"
+                for timestamp, ra, dec, ra_hms, dec_dms, ra_old, dec_old, az, alt, rate, flags in columns)
+    return len(data)
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Exporta uma sessão de telemetria para CSV")
+    parser.add_argument('session', help="arquivo .tlm da pasta telemetry")
+    parser.add_argument('output', help="arquivo CSV a criar")
+    arguments = parser.parse_args()
+    print(f"{export_csv(arguments.session, arguments.output)} linha(s) exportada(s) para {arguments.output}")
@@ -0,0 +1,319 @@
+"""Servidor local que repassa as leituras da montagem para outros programas.
+
+A thread de atualização publica cada :class:`MountSnapshot` no
+:class:`SnapshotHub`, e planetários, programas de imagem e painéis web leem as
+leituras daqui em vez de consultar a montagem por conta própria. O tráfego na
+serial continua o mesmo, qualquer que seja o número de clientes.
+
+Endpoints (somente leitura)::
+
+    GET /          estado do servidor (clientes, leituras publicadas e descartadas)
+    GET /snapshot  última leitura, em JSON
+    GET /events    Server-Sent Events, um evento por leitura
+    GET /ws        WebSocket, uma mensagem de texto JSON por leitura
+
+Cada cliente recebe sempre a leitura mais recente: um cliente lento não acumula
+fila nem atrasa os outros, e as leituras que ele não conseguiu receber são
+descartadas.
+"""
+import base64
+import hashlib
+import json
+import select
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+import logandprint as log
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 11112
+
+# RFC 6455
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+OPCODE_TEXT = 0x1
+OPCODE_CLOSE = 0x8
+OPCODE_PING = 0x9
+OPCODE_PONG = 0xA
+# Os clientes só mandam quadros de controle; acima disso a conexão é fechada
+MAX_CLIENT_FRAME = 4096
+
+
+class SnapshotHub:
+    """Última leitura da montagem, compartilhada entre vários assinantes.
+
+    :meth:`publish` só guarda a leitura e acorda quem está esperando, sem nunca
+    bloquear a thread de atualização. O JSON é gerado uma única vez por leitura,
+    quando o primeiro cliente a pede, e sem clientes não é gerado.
+
+    Attributes:
+        sequence (int): número de leituras publicadas
+        subscribers (int): clientes conectados em /events e /ws
+        dropped (int): leituras que algum cliente não recebeu por estar lento
+    """
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.snapshot = None
+        self.sequence = 0
+        # (sequência, JSON em bytes) da última leitura já convertida
+        self.payload = None
+        self.closed = False
+        self.subscribers = 0
+        self.dropped = 0
+
+    def publish(self, snapshot):
+        """Substitui a última leitura e acorda os assinantes."""
+        with self.condition:
+            self.snapshot = snapshot
+            self.sequence += 1
+            self.condition.notify_all()
+
+    def latest(self):
+        """Última leitura.
+
+        Returns:
+            tuple: (sequência, JSON em bytes), ou (0, None) antes da primeira leitura
+        """
+        with self.condition:
+            sequence, snapshot, payload = self.sequence, self.snapshot, self.payload
+        if snapshot is None:
+            return 0, None
+        if payload is None or payload[0] != sequence:
+            # Fora do lock, para não segurar a thread de atualização
+            payload = (sequence, json.dumps(snapshot.to_dict(), ensure_ascii=False).encode('utf-8'))
+            with self.condition:
+                if self.payload is None or self.payload[0] < sequence:
+                    self.payload = payload
+        return payload
+
+    def wait(self, after, timeout):
+        """Espera uma leitura mais nova que ``after``.
+
+        Se várias leituras foram publicadas enquanto o cliente estava ocupado,
+        só a última é retornada e as outras são contadas em ``dropped``.
+
+        Returns:
+            tuple: (sequência, JSON em bytes), ou None se o tempo acabou ou o hub foi fechado
+        """
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.closed or self.sequence > after, timeout) or self.closed:
+                return None
+            if after:
+                self.dropped += self.sequence - after - 1
+        return self.latest()
+
+    def attach(self):
+        with self.condition:
+            self.subscribers += 1
+
+    def detach(self):
+        with self.condition:
+            self.subscribers -= 1
+
+    def close(self):
+        """Libera todos os assinantes; usado ao fechar o servidor."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+    def status(self):
+        with self.condition:
+            return {'subscribers': self.subscribers, 'published': self.sequence, 'dropped': self.dropped}
+
+
+def websocket_frame(opcode, data=b''):
+    """Quadro WebSocket do servidor (sem máscara, numa única parte)."""
+    length = len(data)
+    if length < 126:
+        header = struct.pack('!BB', 0x80 | opcode, length)
+    elif length < 65536:
+        header = struct.pack('!BBH', 0x80 | opcode, 126, length)
+    else:
+        header = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+    return header + data
+
+
+class TelemetryRequestHandler(BaseHTTPRequestHandler):
+    """Requisições dos clientes do :class:`TelemetryServer`."""
+    server_version = 'TelescopeController/1.0'
+    protocol_version = 'HTTP/1.1'
+    # Cabeçalhos e corpo saem em envios separados; com o Nagle ligado, um cliente keep-alive
+    # esperaria o ACK atrasado (~40ms) a cada /snapshot
+    disable_nagle_algorithm = True
+    # Um cliente que para de ler sem fechar a conexão é desconectado depois desse tempo
+    timeout = 30
+
+    def log_message(self, format, *args):
+        log.debug(f"Servidor de telemetria: {format % args}")
+
+    def do_GET(self):
+        path = urlsplit(self.path).path.rstrip('/') or '/'
+        hub = self.server.hub
+        try:
+            if path == '/':
+                self.send_body(json.dumps(hub.status()).encode('utf-8'))
+            elif path == '/snapshot':
+                _, payload = hub.latest()
+                if payload is None:
+                    self.send_error(503, "Nenhuma leitura da montagem ainda")
+                else:
+                    self.send_body(payload)
+            elif path == '/events':
+                self.stream_events()
+            elif path == '/ws':
+                self.stream_websocket()
+            else:
+                self.send_error(404)
+        except OSError as e:
+            # Cliente desconectado ou parado por mais que ``timeout``
+            log.debug(f"Servidor de telemetria: cliente {self.client_address[0]} desconectado: {e}")
+            self.close_connection = True
+
+    def send_body(self, data):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def subscribe(self):
+        """Gera o JSON de cada leitura nova, começando pela atual.
+
+        Gera None quando passa ``keepalive`` segundos sem leitura, para o
+        cliente saber que a conexão continua aberta. Termina quando o servidor
+        é fechado.
+        """
+        hub = self.server.hub
+        hub.attach()
+        try:
+            sequence, payload = hub.latest()
+            if payload is not None:
+                yield payload
+            while not hub.closed:
+                update = hub.wait(sequence, self.server.keepalive)
+                if update is None:
+                    if not hub.closed:
+                        yield None
+                    continue
+                sequence, payload = update
+                yield payload
+        finally:
+            hub.detach()
+
+    def stream_events(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream; charset=utf-8')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.close_connection = True
+        for payload in self.subscribe():
+            self.wfile.write(b': keepalive\n\n' if payload is None else b'data: ' + payload + b'\n\n')
+            self.wfile.flush()
+
+    def stream_websocket(self):
+        key = self.headers.get('Sec-WebSocket-Key')
+        if 'websocket' not in (self.headers.get('Upgrade') or '').lower() or not key:
+            self.send_error(400, "Esperado um pedido de WebSocket")
+            return
+        accept = base64.b64encode(hashlib.sha1((key.strip() + WEBSOCKET_GUID).encode('ascii')).digest())
+        self.send_response(101, 'Switching Protocols')
+        self.send_header('Upgrade', 'websocket')
+        self.send_header('Connection', 'Upgrade')
+        self.send_header('Sec-WebSocket-Accept', accept.decode('ascii'))
+        self.end_headers()
+        self.close_connection = True
+        for payload in self.subscribe():
+            if not self.read_websocket():
+                return
+            self.wfile.write(websocket_frame(OPCODE_PING) if payload is None else websocket_frame(OPCODE_TEXT, payload))
+            self.wfile.flush()
+
+    def read_websocket(self):
+        """Responde aos quadros já enviados pelo cliente (close e ping), sem esperar por eles.
+
+        Returns:
+            bool: False se o cliente fechou a conexão
+        """
+        while select.select([self.connection], [], [], 0)[0]:
+            header = self.rfile.read(2)
+            if len(header) < 2:
+                return False
+            opcode, length = header[0] & 0x0F, header[1] & 0x7F
+            if length == 126:
+                length = struct.unpack('!H', self.rfile.read(2))[0]
+            elif length == 127:
+                length = struct.unpack('!Q', self.rfile.read(8))[0]
+            if length > MAX_CLIENT_FRAME:
+                return False
+            mask = self.rfile.read(4) if header[1] & 0x80 else b''
+            data = self.rfile.read(length)
+            if mask:
+                data = bytes(byte ^ mask[i % 4] for i, byte in enumerate(data))
+            if opcode == OPCODE_CLOSE:
+                self.wfile.write(websocket_frame(OPCODE_CLOSE, data[:2]))
+                return False
+            if opcode == OPCODE_PING:
+                self.wfile.write(websocket_frame(OPCODE_PONG, data))
+        return True
+
+
+class TelemetryHTTPServer(ThreadingHTTPServer):
+    # Vários programas costumam conectar juntos quando o controlador abre
+    request_queue_size = 64
+
+
+class TelemetryServer:
+    """Servidor HTTP/WebSocket local com as leituras publicadas no ``hub``.
+
+    Cada cliente é atendido numa thread própria, que só lê do hub; a montagem
+    continua sendo consultada apenas pela thread de atualização.
+
+    Args:
+        hub (SnapshotHub): leituras publicadas pela thread de atualização
+        host (str): endereço de escuta; o padrão aceita só conexões do próprio computador
+        port (int): porta TCP (0 escolhe uma porta livre)
+        keepalive (float): segundos sem leitura até mandar um sinal de conexão ativa
+    """
+    def __init__(self, hub, host=DEFAULT_HOST, port=DEFAULT_PORT, keepalive=15.0):
+        self.hub = hub
+        self.httpd = TelemetryHTTPServer((host, port), TelemetryRequestHandler)
+        self.httpd.hub = hub
+        self.httpd.keepalive = keepalive
+        self.thread = None
+
+    @classmethod
+    def for_config(cls, config, hub):
+        """Cria o servidor conforme a seção [SERVER] do config.ini.
+
+        Returns:
+            TelemetryServer: servidor criado, ou None se desativado ou se a porta não pôde ser aberta
+        """
+        if not config.get_bool('SERVER', 'enabled', False):
+            return None
+        host = config.get('SERVER', 'host') or DEFAULT_HOST
+        port = int(config.get_float('SERVER', 'port', DEFAULT_PORT) or DEFAULT_PORT)
+        try:
+            return cls(hub, host, port)
+        except OSError as e:
+            log.error(f"Não foi possível abrir o servidor de telemetria em {host}:{port}: {e}")
+            return None
+
+    @property
+    def address(self):
+        """(host, porta) em que o servidor está escutando."""
+        return self.httpd.server_address[:2]
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='TelemetryServer', daemon=True)
+        self.thread.start()
+        log.debug(f"Servidor de telemetria em http://{self.address[0]}:{self.address[1]}/")
+
+    def stop(self):
+        """Fecha o servidor e desconecta os clientes."""
+        self.hub.close()
+        if self.thread is not None:
+            self.httpd.shutdown()
+        self.httpd.server_close()
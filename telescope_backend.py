@@ -0,0 +1,324 @@
+"""Backends de comunicação com a montagem.
+
+O controlador conversa com a montagem sempre pela mesma superfície do ASCOM
+(RightAscension, MoveAxis, SlewToTargetAsync...). Este módulo decide quem
+implementa essa superfície, de acordo com a opção ``backend`` da seção
+``[COMMUNICATION]`` do config.ini:
+
+- ``ascom`` (padrão): driver COM do ASCOM via ``win32com`` (somente Windows);
+- ``alpaca``: cliente HTTP nativo do ASCOM Alpaca, que funciona em qualquer
+  sistema operacional. Nesse caso a opção ``driver`` guarda o endereço do
+  dispositivo no formato ``host:porta/número`` (ex.: ``192.168.0.20:11111/0``);
+- ``simulator``: montagem simulada em processo (``simulated_telescope``), para
+  usar e medir o programa sem hardware. A opção ``driver`` pode trazer os
+  parâmetros da simulação (ex.: ``simulador?latency=0.03&jitter=0.01``).
+"""
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from alpaca.device import Device
+from alpaca.telescope import Telescope, TelescopeAxes, DriveRates
+from alpaca.exceptions import *
+import logandprint as log
+from alpaca_async import AsyncAlpacaTelescope, run_coroutine, submit
+from instrumentation import InstrumentedTelescope
+
+BACKEND_ASCOM = 'ascom'
+BACKEND_ALPACA = 'alpaca'
+BACKEND_SIMULATOR = 'simulator'
+BACKENDS = (BACKEND_ASCOM, BACKEND_ALPACA, BACKEND_SIMULATOR)
+
+ALPACA_DEFAULT_PORT = 11111
+
+
+def get_backend_name(config_value):
+    """Normaliza o nome do backend lido do config.ini.
+
+    Args:
+        config_value (str): valor da opção ``backend`` (pode ser None)
+
+    Returns:
+        str: ``ascom``, ``alpaca`` ou ``simulator``
+    """
+    backend = (config_value or BACKEND_ASCOM).strip().lower()
+    if backend not in BACKENDS:
+        log.warning(f"Backend {backend} desconhecido, usando {BACKEND_ASCOM}")
+        return BACKEND_ASCOM
+    return backend
+
+
+def create_telescope(backend, device_id):
+    """Cria a instância da montagem para o backend escolhido.
+
+    Args:
+        backend (str): ``ascom``, ``alpaca`` ou ``simulator``
+        device_id (str): ProgID do driver ASCOM, endereço Alpaca ou parâmetros da simulação
+
+    Returns:
+        object: objeto com a interface ITelescope do ASCOM
+    """
+    if backend == BACKEND_ALPACA:
+        address, device_number = parse_alpaca_device_id(device_id)
+        log.debug(f"Conectando via Alpaca em {address}, dispositivo {device_number}")
+        return AlpacaTelescope(address, device_number)
+    if backend == BACKEND_SIMULATOR:
+        from simulated_telescope import SimulatedTelescope
+        log.debug(f"Usando a montagem simulada: {device_id}")
+        return SimulatedTelescope.from_device_id(device_id)
+    import win32com.client
+    return win32com.client.Dispatch(device_id)
+
+
+def parse_alpaca_device_id(device_id):
+    """Separa o endereço e o número do dispositivo de um id Alpaca.
+
+    Args:
+        device_id (str): id no formato ``host[:porta][/número]``
+
+    Returns:
+        tuple: (endereço ``host:porta``, número do dispositivo)
+    """
+    device_id = device_id.strip()
+    if '://' in device_id:
+        device_id = device_id.split('://', 1)[1]
+    address, _, number = device_id.partition('/')
+    if not address:
+        raise ValueError(f"Endereço Alpaca inválido: {device_id}")
+    if ':' not in address.rsplit(']', 1)[-1]:
+        address = f"{address}:{ALPACA_DEFAULT_PORT}"
+    return address, int(number or 0)
+
+
+def discover_alpaca_telescopes(timeout=2):
+    """Procura montagens Alpaca na rede local.
+
+    Returns:
+        list: ids no formato ``host:porta/número`` das montagens encontradas
+    """
+    from alpaca import discovery, management
+    found = []
+    for address in discovery.search_ipv4(numquery=2, timeout=timeout):
+        try:
+            for device in management.configureddevices(address):
+                if device['DeviceType'].lower() == 'telescope':
+                    found.append(f"{address}/{device['DeviceNumber']}")
+        except Exception as e:
+            log.warning(f"Não foi possível listar os dispositivos de {address}: {e}")
+    return found
+
+
+class AlpacaTelescope(Telescope):
+    """Montagem ASCOM Alpaca com conexões HTTP persistentes.
+
+    Aproveita toda a interface do ``alpaca.telescope.Telescope``, mas:
+
+    - mantém um único pool de conexões keep-alive por dispositivo, compartilhado
+      entre todas as instâncias que apontam para o mesmo dispositivo (por exemplo,
+      após reconectar pela tela de configurações);
+    - continua usando a sequência global de ClientID/ClientTransactionID do
+      ``alpaca.device.Device``, mas só segura o lock para reservar o número da
+      transação, de forma que leituras de threads diferentes não fiquem em fila;
+    - aceita inteiros onde o ASCOM COM aceita inteiros (eixos do MoveAxis e
+      TrackingRate), como o restante do programa já faz;
+    - lê as propriedades de cada ciclo todas ao mesmo tempo
+      (:meth:`fetch_snapshot`) e envia comandos sem bloquear quem chamou
+      (:meth:`submit`), pelo cliente assíncrono do ``alpaca_async``.
+    """
+
+    # Conexões simultâneas por dispositivo (opção alpaca_concurrency do config.ini)
+    POOL_SIZE = 4
+    TIMEOUT = 5.0
+
+    _sessions = {}
+    _async_clients = {}
+    _sessions_lock = threading.Lock()
+
+    def __init__(self, address, device_number, protocol='http'):
+        super().__init__(address, device_number, protocol)
+        self.rqs = self._get_session(self.base_url)
+
+    @classmethod
+    def _get_session(cls, base_url):
+        """Retorna o pool de conexões do dispositivo, criando se necessário."""
+        with cls._sessions_lock:
+            session = cls._sessions.get(base_url)
+            if session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=cls.POOL_SIZE)
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                cls._sessions[base_url] = session
+            return session
+
+    @classmethod
+    def close_sessions(cls):
+        """Fecha todas as conexões persistentes abertas."""
+        with cls._sessions_lock:
+            for session in cls._sessions.values():
+                session.close()
+            cls._sessions.clear()
+            clients = list(cls._async_clients.values())
+            cls._async_clients.clear()
+        for client in clients:
+            try:
+                run_coroutine(client.close(), cls.TIMEOUT)
+            except Exception as e:
+                log.warning(f"Erro ao fechar as conexões assíncronas de {client.address}: {e}")
+
+    @property
+    def async_client(self):
+        """Cliente assíncrono do dispositivo, compartilhado como o pool de conexões."""
+        with self._sessions_lock:
+            client = self._async_clients.get(self.base_url)
+            if client is None:
+                client = AsyncAlpacaTelescope(self.address, self.device_number, self.POOL_SIZE, self.TIMEOUT)
+                self._async_clients[self.base_url] = client
+            return client
+
+    def fetch_snapshot(self):
+        """Lê todas as propriedades do ciclo em paralelo.
+
+        Returns:
+            MountSnapshot: estado da montagem
+        """
+        return run_coroutine(self.async_client.fetch_snapshot(), self.TIMEOUT * 2)
+
+    def submit(self, command, *args):
+        """Envia um comando do cliente assíncrono sem esperar a resposta.
+
+        Args:
+            command (str): nome da corrotina do AsyncAlpacaTelescope (ex.: ``goto``, ``move_axis``)
+
+        Returns:
+            concurrent.futures.Future: conclusão do comando
+        """
+        return submit(getattr(self.async_client, command)(*args))
+
+    def _transaction_params(self, data):
+        """Monta os parâmetros comuns reservando o próximo ClientTransactionID."""
+        with Device._ctid_lock:
+            transaction_id = Device._client_trans_id
+            Device._client_trans_id += 1
+        params = {
+            "ClientTransactionID": f"{transaction_id}",
+            "ClientID": f"{Device._client_id}",
+        }
+        params.update(data)
+        return params
+
+    def _headers(self):
+        # Host seguro para IPv6, como no alpaca.device
+        if self.address.startswith('[') and not self.address.startswith('[::1]'):
+            return {'Host': f'{self.address.split("%")[0]}]'}
+        return {}
+
+    def _get(self, attribute, tmo=TIMEOUT, **data):
+        response = self.rqs.get(f"{self.base_url}/{attribute}", params=self._transaction_params(data),
+                                timeout=tmo, headers=self._headers())
+        return check_alpaca_response(response)["Value"]
+
+    def _put(self, attribute, tmo=TIMEOUT, **data):
+        response = self.rqs.put(f"{self.base_url}/{attribute}", data=self._transaction_params(data),
+                                timeout=tmo, headers=self._headers())
+        return check_alpaca_response(response)
+
+    def MoveAxis(self, Axis, Rate):
+        super().MoveAxis(TelescopeAxes(int(Axis)), Rate)
+
+    def AxisRates(self, Axis):
+        return super().AxisRates(TelescopeAxes(int(Axis)))
+
+    @property
+    def TrackingRate(self):
+        return DriveRates(self._get("trackingrate"))
+
+    @TrackingRate.setter
+    def TrackingRate(self, TrackingRate):
+        self._put("trackingrate", TrackingRate=int(TrackingRate))
+
+
+def check_alpaca_response(response):
+    """Verifica a resposta do servidor Alpaca e levanta a exceção ASCOM correspondente.
+
+    Args:
+        response (requests.Response): resposta HTTP do servidor
+
+    Returns:
+        dict: corpo JSON da resposta
+    """
+    if response.status_code not in range(200, 204):
+        raise AlpacaRequestException(response.status_code, f"{response.text} (URL {response.url})")
+    j = response.json()
+    n = j["ErrorNumber"]
+    m = j["ErrorMessage"]
+    if n == 0:
+        return j
+    raise alpaca_error(n, m)
+
+
+def alpaca_error(number, message):
+    """Exceção ASCOM correspondente ao ErrorNumber de uma resposta Alpaca.
+
+    Args:
+        number (int): ErrorNumber da resposta (diferente de zero)
+        message (str): ErrorMessage da resposta
+
+    Returns:
+        Exception: exceção a ser levantada
+    """
+    if number == 0x0400:
+        return NotImplementedException(message)
+    elif number == 0x0401:
+        return InvalidValueException(message)
+    elif number == 0x0402:
+        return ValueNotSetException(message)
+    elif number == 0x0407:
+        return NotConnectedException(message)
+    elif number == 0x0408:
+        return ParkedException(message)
+    elif number == 0x0409:
+        return SlavedException(message)
+    elif number == 0x040B:
+        return InvalidOperationException(message)
+    elif number == 0x040C:
+        return ActionNotImplementedException(message)
+    return DriverException(number, message)
+
+
+def send_goto(telescope, ra_hours, dec_degrees, tracking_rate=0):
+    """Liga o rastreamento e inicia o goto.
+
+    No Alpaca os comandos vão pelo cliente assíncrono e a função não espera a
+    resposta; nos outros backends o goto já foi iniciado quando ela retorna.
+
+    Args:
+        telescope: montagem
+        ra_hours (float): ascensão reta do alvo, em horas
+        dec_degrees (float): declinação do alvo, em graus
+        tracking_rate (int): taxa de rastreamento (DriveRates) depois do goto
+
+    Returns:
+        concurrent.futures.Future: conclusão dos comandos no Alpaca, ou None
+    """
+    driver = alpaca_driver(telescope)
+    if driver:
+        log.debug(f"Enviando goto para RA: {ra_hours} DEC: {dec_degrees}")
+        return driver.submit('goto', ra_hours, dec_degrees, tracking_rate)
+    telescope.TargetRightAscension = ra_hours
+    telescope.TargetDeclination = dec_degrees
+    log.debug(f"Enviando goto para RA: {telescope.TargetRightAscension} DEC: {telescope.TargetDeclination}")
+    telescope.Tracking = True
+    telescope.SlewToTargetAsync()
+    telescope.TrackingRate = tracking_rate
+    return None
+
+
+def alpaca_driver(telescope):
+    """Retorna o AlpacaTelescope por trás da montagem, ou None se ela usa outro backend.
+
+    Args:
+        telescope: montagem, possivelmente envolvida pelo InstrumentedTelescope
+    """
+    if isinstance(telescope, InstrumentedTelescope):
+        telescope = object.__getattribute__(telescope, '_telescope')
+    return telescope if isinstance(telescope, AlpacaTelescope) else None
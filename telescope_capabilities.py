@@ -0,0 +1,65 @@
+import logandprint as log
+
+
+class TelescopeCapabilities:
+    """Características fixas do driver, lidas uma única vez na conexão.
+
+    Valores como ``CanPark`` ou as taxas do ``AxisRates`` não mudam enquanto o
+    driver estiver conectado, então são consultados apenas quando a conexão é
+    feita e descartados quando o driver é trocado ou reconectado.
+
+    Attributes:
+        can_find_home (bool): a montagem sabe ir para a posição home
+        can_park (bool): a montagem pode ser estacionada
+        can_unpark (bool): a montagem pode sair do estacionamento
+        can_set_park (bool): a posição de estacionamento pode ser definida
+        axis_rates (list): faixas (mínimo, máximo) em graus/s do MoveAxis no eixo primário
+        site_latitude (float): latitude do local, em graus
+        site_longitude (float): longitude do local, em graus
+    """
+    def __init__(self, can_find_home=False, can_park=False, can_unpark=False, can_set_park=False,
+                 axis_rates=None, site_latitude=None, site_longitude=None):
+        self.can_find_home = can_find_home
+        self.can_park = can_park
+        self.can_unpark = can_unpark
+        self.can_set_park = can_set_park
+        self.axis_rates = axis_rates or []
+        self.site_latitude = site_latitude
+        self.site_longitude = site_longitude
+
+    @classmethod
+    def from_telescope(cls, telescope):
+        """Lê as características do driver conectado.
+
+        Propriedades que o driver não implementa ficam com o valor padrão.
+
+        Args:
+            telescope: objeto com a interface ITelescope do ASCOM
+
+        Returns:
+            TelescopeCapabilities: características do driver
+        """
+        def read(name, default):
+            try:
+                return getattr(telescope, name)
+            except Exception as e:
+                log.warning(f"Não foi possível ler {name} do driver: {e}")
+                return default
+
+        try:
+            axis_rates = [(float(rate.Minimum), float(rate.Maximum)) for rate in telescope.AxisRates(0)]
+        except Exception as e:
+            log.warning(f"Não foi possível ler as taxas de movimento do driver: {e}")
+            axis_rates = []
+
+        capabilities = cls(
+            can_find_home=bool(read('CanFindHome', False)),
+            can_park=bool(read('CanPark', False)),
+            can_unpark=bool(read('CanUnpark', False)),
+            can_set_park=bool(read('CanSetPark', False)),
+            axis_rates=axis_rates,
+            site_latitude=read('SiteLatitude', None),
+            site_longitude=read('SiteLongitude', None),
+        )
+        log.debug(f"Características do driver: {vars(capabilities)}")
+        return capabilities
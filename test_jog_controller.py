@@ -0,0 +1,101 @@
+"""Testes do JogController sem janela: raiz, configurações e montagem falsas.
+
+    python -m unittest test_jog_controller
+"""
+import unittest
+from unittest import mock
+import jog_controller
+from jog_controller import JogController
+
+
+class FakeRoot:
+    def after(self, delay, callback, *args):
+        return object()
+
+    def after_cancel(self, job):
+        pass
+
+    def focus_set(self):
+        pass
+
+
+class FakeConfig:
+    def get_float(self, section, option, default=None):
+        return default
+
+    def get_bool(self, section, option, default=False):
+        return default
+
+    def get(self, section, option):
+        return None
+
+
+class FakeWidget:
+    def __init__(self, values=None, value=None):
+        self.values = values
+        self.value = value
+
+    def cget(self, option):
+        return self.values
+
+    def get(self):
+        return self.value
+
+    def wake(self):
+        pass
+
+
+class FakeController:
+    """Controlador cuja montagem recusa o MoveAxis com taxa diferente de 0 em ``failing_axis``."""
+    def __init__(self, failing_axis=None):
+        self.root = FakeRoot()
+        self.config = FakeConfig()
+        self.comboSpeed = FakeWidget(values=('0.5', '1.0', '2.0'))
+        self.axis_rate = FakeWidget(value='1.0')
+        self.thread_update_values = FakeWidget()
+        self.manual_slew = False
+        self.failing_axis = failing_axis
+        self.calls = []
+        self.rates = [0.0, 0.0]
+
+    def require_telescope(self):
+        return True
+
+    def unpark(self):
+        pass
+
+    def move_axis(self, axis, rate):
+        self.calls.append((axis, rate))
+        if axis == self.failing_axis and rate:
+            raise RuntimeError(f"SlewError: eixo {axis} recusou o movimento")
+        self.rates[axis] = rate
+
+
+class JogControllerTest(unittest.TestCase):
+    def test_press_and_release_stop_only_their_axis(self):
+        controller = FakeController()
+        jog = JogController(controller)
+        jog.press('NE')
+        self.assertEqual(controller.rates, [-1.0, 1.0])
+        jog.release('N')
+        self.assertEqual(controller.rates, [-1.0, 0.0])
+        jog.release('E')
+        self.assertEqual(controller.rates, [0.0, 0.0])
+        self.assertFalse(controller.manual_slew)
+
+    def test_failure_on_second_axis_stops_the_first(self):
+        controller = FakeController(failing_axis=1)
+        jog = JogController(controller)
+        with mock.patch.object(jog_controller.messagebox, 'showerror') as showerror:
+            jog.press('NE')
+        showerror.assert_called_once()
+        # O eixo 0 começou antes da falha do eixo 1 e precisa ter sido parado
+        self.assertEqual(controller.calls, [(0, -1.0), (1, 1.0), (0, 0)])
+        self.assertEqual(controller.rates, [0.0, 0.0])
+        self.assertEqual(jog.sent, [0.0, 0.0])
+        self.assertFalse(jog.held)
+        self.assertFalse(controller.manual_slew)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+"""Testes do PointingModel com estrelas sintéticas: montagem com erros conhecidos e ruído de centralização.
+
+    python -m unittest test_pointing_model
+"""
+import math
+import unittest
+import numpy as np
+from night_planner import local_sidereal_time
+from pointing_model import PointingModel
+
+LATITUDE = -23.5
+LONGITUDE = -46.6
+WHEN = 1.7e9
+LST = math.degrees(float(local_sidereal_time(WHEN, LONGITUDE))) / 15
+
+
+def mount_with(coefficients):
+    """Modelo fixo que faz o papel da montagem real, com os erros dados (graus)."""
+    model = PointingModel(None, LATITUDE)
+    model._fit = (coefficients, None)
+    return model
+
+
+def register(mount, stars, noise, rng):
+    """Modelo com as estrelas (ângulo horário em horas, declinação em graus) centralizadas com ruído (minutos)."""
+    model = PointingModel(None, LATITUDE)
+    for index, (hour_angle, dec) in enumerate(stars):
+        ra = (LST - hour_angle) % 24
+        mount_ra, mount_dec = mount.correct(ra, dec, LONGITUDE, WHEN)
+        mount_ra += rng.normal(0, noise / 60) / 15 / math.cos(math.radians(dec))
+        mount_dec += rng.normal(0, noise / 60)
+        model.add(f"Estrela {index}", ra, dec, mount_ra, mount_dec, LATITUDE, LONGITUDE, WHEN)
+    return model
+
+
+def miss(model, mount, hour_angle, dec):
+    """Erro no céu, em minutos de arco, de um goto corrigido pelo modelo."""
+    ra = (LST - hour_angle) % 24
+    sent_ra, sent_dec = model.correct(ra, dec, LONGITUDE, WHEN)
+    needed_ra, needed_dec = mount.correct(ra, dec, LONGITUDE, WHEN)
+    error_ra = ((sent_ra - needed_ra + 12) % 24 - 12) * 15 * math.cos(math.radians(dec))
+    return math.hypot(error_ra, sent_dec - needed_dec) * 60
+
+
+class PointingModelTest(unittest.TestCase):
+    def test_recovers_known_coefficients(self):
+        known = {'IH': 0.3, 'ID': -0.2, 'MA': 0.1, 'ME': -0.15, 'CH': 0.05, 'NP': -0.04, 'TF': 0.03}
+        stars = [(hour_angle, dec) for hour_angle in (-4, -2, 0, 2, 4) for dec in (-80, -50, -20, 10, 40)]
+        model = register(mount_with(known), stars, 0.5, np.random.default_rng(1))
+        coefficients, rms = model.fit()
+        self.assertEqual(tuple(coefficients), tuple(known))
+        for term, value in known.items():
+            self.assertAlmostEqual(coefficients[term], value, delta=0.01, msg=term)
+        self.assertAlmostEqual(rms * 60, 0.5, delta=0.2)
+
+    def test_narrow_declination_band_does_not_make_goto_worse(self):
+        # Só erro de índice; IH, CH e NP são quase iguais entre -48° e -55°
+        mount = mount_with({'IH': 0.3, 'ID': -0.2})
+        uncorrected = miss(PointingModel(None, LATITUDE), mount, 0, -60)
+        rng = np.random.default_rng(2)
+        for stars in ([(-2, -50), (0.5, -55), (2.5, -52)], [(-2, -50), (0.5, -55), (2.5, -52), (1, -48)]):
+            for _ in range(20):
+                model = register(mount, stars, 1.0, rng)
+                self.assertNotIn('CH', model.terms)
+                self.assertNotIn('NP', model.terms)
+                self.assertLess(miss(model, mount, 0, -60), uncorrected / 4)
+
+    def test_no_rms_without_redundancy(self):
+        model = register(mount_with({'IH': 0.3, 'ID': -0.2}), [(1, -30)], 1.0, np.random.default_rng(3))
+        coefficients, rms = model.fit()
+        self.assertEqual(tuple(coefficients), ('IH', 'ID'))
+        self.assertIsNone(rms)
+        self.assertIn("sem sobra", model.describe())
+
+    def test_terms_need_two_spare_equations(self):
+        stars = [(-3, -70), (0, -10), (3, 30)]
+        model = register(mount_with({'IH': 0.3, 'ID': -0.2}), stars, 1.0, np.random.default_rng(4))
+        # 3 estrelas = 6 equações: no máximo 4 termos
+        self.assertLessEqual(len(model.terms), 4)
+        self.assertIsNotNone(model.fit()[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,116 +1,183 @@
 import logandprint as log
-from tkinter import messagebox
-import sys
-import threading
-import pythoncom
+import queue
 import threading
+import time
+from dataclasses import replace
+from mount_snapshot import MountSnapshot
+from poll_cadence import PollCadence
+from driver_worker import StalePoll
+try:
+    import pythoncom
+except ImportError:  # fora do Windows não há COM (backend Alpaca)
+    pythoncom = None
 
 class UpdateValues(threading.Thread):
+    """Thread única que consulta a montagem periodicamente.
+
+    O intervalo entre as leituras é definido pelo :class:`PollCadence` a partir
+    do estado da montagem e agendado pelo relógio monotônico: cada ciclo começa
+    um intervalo depois do início do anterior, sem acumular o tempo gasto na
+    leitura. Se uma leitura demorar mais que o intervalo, os ciclos perdidos são
+    descartados em vez de enfileirados. :meth:`wake` antecipa a próxima leitura,
+    por exemplo quando o usuário inicia um movimento com a montagem ociosa.
+
+    Cada leitura vira um :class:`MountSnapshot` publicado em ``updates``; quem
+    atualiza a interface é o ``UiUpdater``, na thread principal do Tk.
+
+    Enquanto a montagem é trocada (nova escolha do driver em Config) não há
+    montagem conectada; a thread espera a nova montagem e continua lendo dela.
+    """
+    # Intervalo entre as verificações da montagem durante uma reconexão, em segundos
+    RECONNECT_WAIT = 0.2
+
     def __init__(self, controller):
-        super().__init__()
+        super().__init__(name='UpdateValues', daemon=True)
         self.controller = controller
-        self.stop_thread = False
+        self.stop_event = threading.Event()
+        self.wake_event = threading.Event()
+        self.cadence = PollCadence(controller)
+        # Métricas de duração, jitter e atrasos dos ciclos (None se desativadas)
+        self.metrics = getattr(controller, 'metrics', None)
+        # Leituras repassadas ao servidor de telemetria local (None se não há servidor)
+        self.hub = getattr(controller, 'snapshot_hub', None)
+        self.ticks = 0
+        self.skipped_ticks = 0
+        # Leituras descartadas pelo DriverWorker por causa de uma parada
+        self.stale_polls = 0
+        # Índice espacial do catálogo, montado na primeira leitura; False se não pôde ser montado
+        self.nearby_objects = None
+        # Função de leitura escolhida para a montagem atual: (montagem, função)
+        self.fetcher = (None, None)
+        # Fila lida pela thread do Tk (UiUpdater); esta thread nunca mexe nos widgets
+        self.updates = queue.Queue()
 
     def stop(self):
-        self.stop_thread = True
-        self.run()
+        """Pede para a thread terminar; ela sai ao fim do ciclo atual."""
+        self.stop_event.set()
+        self.wake_event.set()
+
+    def wake(self):
+        """Antecipa a próxima leitura, sem esperar o fim do intervalo atual."""
+        self.wake_event.set()
 
     def run(self):
-        if self.stop_thread:
-            sys.exit()
-        pythoncom.CoInitialize()
-        threading.Timer(float(self.controller.cache), self.run).start()
+        # O COM é inicializado uma única vez para toda a vida da thread
+        if pythoncom:
+            pythoncom.CoInitialize()
+        try:
+            next_tick = time.monotonic()
+            while not self.stop_event.is_set():
+                started = time.monotonic()
+                snapshot = self.tick()
+                if snapshot is None:
+                    break
+                interval = self.cadence.next_interval(snapshot)
+                scheduled = next_tick
+                next_tick += interval
+                now = time.monotonic()
+                missed = 0
+                if now > next_tick:
+                    missed = int((now - next_tick) // interval) + 1
+                    self.skipped_ticks += missed
+                    next_tick += missed * interval
+                    log.debug(f"Leitura atrasada, {missed} ciclo(s) descartado(s)")
+                if self.metrics:
+                    self.metrics.record_tick(started - scheduled, now - started, missed)
+                if self.wake_event.wait(next_tick - now):
+                    self.wake_event.clear()
+                    next_tick = time.monotonic()
+        finally:
+            if pythoncom:
+                pythoncom.CoUninitialize()
+
+    def tick(self):
+        """Faz uma leitura da montagem e atualiza a interface.
+
+        Returns:
+            MountSnapshot: leitura feita, ou None se a thread deve parar
+        """
+        self.ticks += 1
         try:
-            self.controller.ra.set(self.convert_ra(self.controller.Telescope.RightAscension or 0.0))
-            self.controller.dec.set(self.convert_to_degrees(self.controller.Telescope.Declination or 0.0))
-            self.controller.az.set(self.convert_to_degrees(self.controller.Telescope.Azimuth or 0.0))
-            self.controller.alt.set(self.convert_to_degrees(self.controller.Telescope.Altitude or 0.0))
-            if self.controller.Telescope.Tracking == False:
-                self.controller.tracking_rate.set('Off')
-            elif self.controller.Telescope.TrackingRate == 0:
-                self.controller.tracking_rate.set('Sideral')
-            elif self.controller.Telescope.TrackingRate == 1:
-                self.controller.tracking_rate.set('Lunar')
-            elif self.controller.Telescope.TrackingRate == 2:
-                self.controller.tracking_rate.set('Solar')
-            elif self.controller.Telescope.TrackingRate == 3:
-                self.controller.tracking_rate.set('King rate')
-            self.define_status_moviment()
-            self.set_find_home_status()
-            self.set_park_status()
+            snapshot = self.read()
+            if snapshot is None or self.stop_event.is_set():
+                return None
+            snapshot = self.locate(snapshot)
+            self.controller.telemetry.append(snapshot, self.controller.manual_slew, self.controller.gotoInProgress)
+            self.updates.put(snapshot)
+            if self.hub is not None:
+                self.hub.publish(snapshot)
+            return snapshot
         except Exception as e:
-            self.stop_thread = True
-            if not self.controller.Telescope.Connected or 'could not communicate' in str(e):
+            if self.stop_event.is_set():
+                return None
+            self.stop_event.set()
+            telescope = self.controller.Telescope
+            if telescope is None or not telescope.Connected or 'could not communicate' in str(e):
                 error_message = 'A montagem foi desconectada. Uma das causas possíveis é o tempo de atualização que pode está muito baixo.\n' + str(e)
             else:
                 error_message = 'Não é possível obter as informações do Telescópio: ' + str(e)
             log.error(error_message)
-            messagebox.showerror("Erro crítico", error_message)
-            self.controller.root.destroy()
-            sys.exit()
-
-
-    def convert_ra(self, ra):
-        """Converts the RA string to the format hh:mm:ss"""
-        ra = float(ra)
-        h = int(ra)
-        m = int((ra - h) * 60)
-        s = int((ra - h - m / 60) * 3600)
-        return f"{h:02d}h{m:02d}m{s:02d}s"
-
-    def convert_to_degrees(self, value):
-        """Converts the value string to degrees format"""
-        value = float(value)
-        d = int(value)
-        m = int(abs((value - d) * 60))
-        s = int(abs((value - d) * 3600) % 60)
-        return f"{d:02d}°{m:02d}'{s:02d}\""
-
-    def define_status_moviment(self):
-        """Define the status of the telescope moviment"""
-        telescope = self.controller.Telescope
-        if telescope.AtPark:
-            moviment = "Estacionado"
-        elif telescope.AtHome:
-            moviment = "Em casa"
-            self.controller.going_home = False
-        elif telescope.Slewing:
-            if self.controller.manual_slew:
-                moviment = "Movimento manual"
-            elif self.controller.gotoInProgress:
-                moviment = "Buscando objeto"
-            elif self.controller.going_home:
-                moviment = "Retornando para casa"
+            self.updates.put(PollerError(error_message))
+            return None
+
+    def read(self):
+        """Lê a montagem atual, esperando a nova durante uma reconexão.
+
+        Returns:
+            MountSnapshot: leitura feita, ou None se a thread foi parada enquanto esperava
+        """
+        while True:
+            telescope = self.controller.Telescope
+            if telescope is None:
+                if self.stop_event.wait(self.RECONNECT_WAIT):
+                    return None
+                continue
+            try:
+                return self.fetch(telescope)
+            except Exception:
+                if telescope is self.controller.Telescope:
+                    raise
+                # A montagem foi trocada durante a leitura (o worker da anterior
+                # responde com WorkerClosed): lê a nova
+                log.debug("Montagem trocada durante a leitura, lendo de novo")
+
+    def fetch(self, telescope):
+        """Lê a montagem; no Alpaca, todas as propriedades vão ao mesmo tempo.
+
+        Com o DriverWorker a leitura cede a vez às paradas e é descartada se uma
+        delas for executada no meio; nesse caso a montagem é lida de novo na hora.
+        """
+        if self.fetcher[0] is not telescope:
+            from telescope_backend import alpaca_driver
+            from driver_worker import driver_worker
+            if alpaca_driver(telescope) or driver_worker(telescope):
+                self.fetcher = (telescope, telescope.fetch_snapshot)
             else:
-                moviment = "Movendo-se"
-        elif telescope.Tracking:
-            moviment = "Rastreando"
-        else:
-            moviment = "Parado"
-        self.controller.statusMoviment.set(moviment)
-        log.debug(f"Status de movimento: {moviment}")
-
-    def set_find_home_status(self):
-        """Set the status of the find home button"""
-        at_home = self.controller.Telescope.AtHome
-        can_find_home = self.controller.Telescope.CanFindHome
-        if at_home or not can_find_home:
-            self.controller.btnFindHome.config(state='disabled')
-        else:
-            self.controller.btnFindHome.config(state='normal')
-        if self.controller.going_home:
-            self.controller.btnFindHome.config(state='disabled')
-
-    def set_park_status(self):
-        """Set the status of the park button"""
-        # o botão park_button está na classe frmConfig do arquivo frame_config.py e é chamado no arquivo main.py através do comando self.frmConfig = frmConfig(self)
-        btnPark = self.controller.frmConfig.park_button
-        btnSetPark = self.controller.frmConfig.set_park_button
-        at_park = self.controller.Telescope.AtPark
-        can_park = self.controller.Telescope.CanPark
-        if at_park or not can_park:
-            btnPark.config(state='disabled')
-            btnSetPark.config(state='disabled')
-        else:
-            btnPark.config(state='normal')
-            btnSetPark.config(state='normal')
+                self.fetcher = (telescope, lambda: MountSnapshot.fetch(telescope))
+        while True:
+            try:
+                return self.fetcher[1]()
+            except StalePoll:
+                self.stale_polls += 1
+                if self.stop_event.is_set():
+                    raise
+
+    def locate(self, snapshot):
+        """Acrescenta à leitura os objetos do catálogo perto do apontamento."""
+        if self.nearby_objects is None:
+            try:
+                from sky_index import NearbyObjects
+                self.nearby_objects = NearbyObjects()
+            except Exception as e:
+                log.error(f"Não foi possível montar o índice do catálogo: {e}")
+                self.nearby_objects = False
+        if not self.nearby_objects:
+            return snapshot
+        nearby, star = self.nearby_objects.around(snapshot.right_ascension, snapshot.declination)
+        return replace(snapshot, nearby=nearby, alignment_star=star)
+
+
+class PollerError:
+    """Erro crítico de leitura publicado na fila de atualizações."""
+    def __init__(self, message):
+        self.message = message
@@ -0,0 +1,174 @@
+import queue
+from tkinter import messagebox
+import logandprint as log
+from astrometry import format_degrees, format_hours
+from thread_update_values import PollerError
+
+
+class UiUpdater:
+    """Aplica na interface as leituras publicadas pela thread UpdateValues.
+
+    Roda sempre na thread principal do Tk, agendado com ``root.after``. A cada
+    execução esvazia a fila de atualizações, usa apenas a leitura mais recente e
+    só escreve nos widgets cujo valor exibido realmente mudou.
+
+    Com ``motion`` (padrão), as coordenadas são estimadas pelo
+    :class:`MotionEstimator` a cada execução, e não só quando chega uma
+    leitura, para que a posição ande suavemente durante slews e movimentos
+    manuais mesmo com leituras espaçadas.
+
+    Args:
+        controller (Controller): controlador principal
+        updates (queue.Queue): fila de atualizações da thread UpdateValues
+        interval (int): intervalo em milissegundos entre as verificações da fila
+        motion (MotionEstimator): estimador da posição entre leituras, ou None para
+            exibir só as leituras
+    """
+    def __init__(self, controller, updates, interval=50, motion=None):
+        self.controller = controller
+        self.updates = updates
+        self.interval = interval
+        self.motion = motion
+        self.rendered = {}
+        self.after_id = None
+        self.snapshot = None
+
+    def start(self):
+        self.after_id = self.controller.root.after(self.interval, self.pump)
+
+    def stop(self):
+        if self.after_id is not None:
+            self.controller.root.after_cancel(self.after_id)
+            self.after_id = None
+
+    def pump(self):
+        """Esvazia a fila e aplica a leitura mais recente."""
+        self.after_id = None
+        snapshot = None
+        try:
+            while True:
+                item = self.updates.get_nowait()
+                if isinstance(item, PollerError):
+                    self.fatal_error(item.message)
+                    return
+                snapshot = item
+        except queue.Empty:
+            pass
+        if snapshot is not None:
+            self.snapshot = snapshot
+            if self.motion:
+                self.motion.add(snapshot)
+            self.render(snapshot)
+        if self.motion and self.snapshot is not None:
+            self.render_position(*self.motion.estimate())
+        self.start()
+
+    def fatal_error(self, message):
+        messagebox.showerror("Erro crítico", message)
+        self.controller.root.destroy()
+
+    def render(self, snapshot):
+        """Atualiza os widgets com os valores da leitura."""
+        controller = self.controller
+        if not self.motion:
+            self.render_position(snapshot.right_ascension, snapshot.declination, snapshot.azimuth, snapshot.altitude)
+        self.write('tracking_rate', snapshot.tracking_name, controller.tracking_rate.set)
+        self.write('nearby', self.describe_nearby(snapshot), controller.nearby.set)
+        self.write('alignment_star', self.describe_alignment_star(snapshot), controller.alignment_star.set)
+        self.write('status', self.define_status_moviment(snapshot), self.set_status_moviment)
+        self.write('find_home', self.find_home_state(snapshot), lambda state: controller.btnFindHome.config(state=state))
+        if controller.frmConfig is not None:  # a tela de Configurações só existe depois de aberta
+            self.write('park', self.park_state(snapshot), lambda state: controller.frmConfig.park_button.config(state=state))
+            self.write('set_park', self.set_park_state(snapshot), lambda state: controller.frmConfig.set_park_button.config(state=state))
+
+    def render_position(self, right_ascension, declination, azimuth, altitude):
+        """Atualiza as coordenadas exibidas."""
+        controller = self.controller
+        self.write('ra', format_hours(right_ascension), controller.ra.set)
+        self.write('dec', format_degrees(declination), controller.dec.set)
+        self.write('az', format_degrees(azimuth), controller.az.set)
+        self.write('alt', format_degrees(altitude), controller.alt.set)
+
+    def write(self, key, value, apply):
+        """Aplica o valor somente se ele for diferente do último exibido.
+
+        Args:
+            key (str): identificador do widget
+            value: valor a ser exibido
+            apply (callable): função que escreve o valor no widget
+        """
+        if self.rendered.get(key) == value:
+            return
+        apply(value)
+        self.rendered[key] = value
+
+    def invalidate(self, *keys):
+        """Esquece os valores exibidos, forçando a reescrita na próxima leitura.
+
+        Args:
+            *keys (str): widgets a esquecer; se nenhum for informado, esquece todos
+        """
+        if not keys:
+            self.rendered.clear()
+        for key in keys:
+            self.rendered.pop(key, None)
+
+    def describe_nearby(self, snapshot):
+        """Objetos do catálogo perto do apontamento, ex.: "M31 (0.0°), M32 (0.4°)"."""
+        if not snapshot.nearby:
+            return "—"
+        return ", ".join(f"{name} ({distance:.1f}°)" for name, distance in snapshot.nearby)
+
+    def describe_alignment_star(self, snapshot):
+        """Estrela de alinhamento mais próxima, ex.: "Mirach (7.7°)"."""
+        if snapshot.alignment_star is None:
+            return "—"
+        name, distance = snapshot.alignment_star
+        return f"{name} ({distance:.1f}°)"
+
+    def define_status_moviment(self, snapshot):
+        """Define the status of the telescope moviment"""
+        # O goto terminou quando uma leitura feita depois do comando mostra a montagem parada
+        if self.controller.gotoInProgress and not snapshot.slewing and snapshot.monotonic > self.controller.goto_started:
+            self.controller.gotoInProgress = False
+        if snapshot.at_park:
+            moviment = "Estacionado"
+        elif snapshot.at_home:
+            moviment = "Em casa"
+            self.controller.going_home = False
+        elif snapshot.slewing:
+            if self.controller.manual_slew:
+                moviment = "Movimento manual"
+            elif self.controller.gotoInProgress:
+                moviment = "Buscando objeto"
+            elif self.controller.going_home:
+                moviment = "Retornando para casa"
+            else:
+                moviment = "Movendo-se"
+        elif snapshot.tracking:
+            moviment = "Rastreando"
+        else:
+            moviment = "Parado"
+        return moviment
+
+    def set_status_moviment(self, moviment):
+        self.controller.statusMoviment.set(moviment)
+        log.debug(f"Status de movimento: {moviment}")
+
+    def find_home_state(self, snapshot):
+        """Estado do botão de home"""
+        if snapshot.at_home or not self.controller.capabilities.can_find_home or self.controller.going_home:
+            return 'disabled'
+        return 'normal'
+
+    def park_state(self, snapshot):
+        """Estado dos botões de estacionamento da tela de configurações"""
+        if snapshot.at_park or not self.controller.capabilities.can_park:
+            return 'disabled'
+        return 'normal'
+
+    def set_park_state(self, snapshot):
+        """Estado do botão que define a posição de estacionamento"""
+        if snapshot.at_park or not self.controller.capabilities.can_set_park:
+            return 'disabled'
+        return 'normal'